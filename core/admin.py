@@ -0,0 +1,10 @@
+from django.contrib import admin
+
+from .models import PlatformStats
+
+
+@admin.register(PlatformStats)
+class PlatformStatsAdmin(admin.ModelAdmin):
+    # maintained by core.stats; recount with `manage.py recompute_platform_stats`
+    list_display = ('review_count', 'rating_sum', 'business_profile_count', 'offer_count')
+    readonly_fields = ('review_count', 'rating_sum', 'business_profile_count', 'offer_count')
@@ -0,0 +1,42 @@
+"""
+helpers for aggregate rows that are maintained on write (order counters and rollups,
+rating summaries, ...)
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Case, F, Q, Value, When
+
+
+def apply_deltas(model, key_fields, deltas, **assignments):
+    """
+    adds {key: {column: delta}} to the rows of `model` identified by key_fields, with at
+    most two queries no matter how many rows change: one INSERT .. ON CONFLICT DO NOTHING
+    for rows that may not exist yet and one UPDATE col = col + CASE .. END for all of them.
+    `assignments` are extra column expressions set on the same rows by that UPDATE.
+    """
+    if not deltas:
+        return
+    columns = sorted({column for values in deltas.values() for column in values})
+    with transaction.atomic(savepoint=False):
+        # only increments can hit a missing row; skipping decrements also keeps cascading
+        # user deletes from re-creating rows of a user that is being deleted
+        new_keys = [key for key, values in deltas.items() if any(v > 0 for v in values.values())]
+        if new_keys:
+            model.objects.bulk_create(
+                [model(**dict(zip(key_fields, key))) for key in new_keys],
+                ignore_conflicts=True,
+            )
+        whens, matches = defaultdict(list), Q()
+        for key, values in deltas.items():
+            match = Q(**dict(zip(key_fields, key)))
+            matches |= match
+            for column, delta in values.items():
+                if delta:
+                    whens[column].append(When(match, then=Value(delta)))
+        model.objects.filter(matches).update(**{
+            column: F(column) + Case(
+                *whens[column], default=Value(0),
+                output_field=model._meta.get_field(column))
+            for column in columns if whens[column]
+        }, **assignments)
@@ -1,12 +1,8 @@
-from django.contrib.auth import get_user_model
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from django.db.models import Avg
-from reviews_app.models import Review
-from offers_app.models import Offer
-
-User = get_user_model()
+from django.utils.cache import get_conditional_response
+from core.stats import get_config, platform_stats
 
 
 class BaseInfoView(APIView):
@@ -15,21 +11,18 @@ class BaseInfoView(APIView):
     No auth required.
     """
     permission_classes = [AllowAny]
+    # nothing user specific here; skipping auth also skips the token lookup
+    authentication_classes = []
 
     def get(self, request, *args, **kwargs):
         """
-        calculates total reviews, average rating, number of business profiles, and total offers, then returns them as JSON.
+        total reviews, average rating, number of business profiles and total offers from the
+        maintained snapshot (core.stats), with ETag / Cache-Control for clients and proxies.
         """
-        review_count = Review.objects.count()
-        avg_val = Review.objects.aggregate(avg=Avg('rating'))['avg']
-        average_rating = round(avg_val or 0.0, 1)
-        business_profile_count = User.objects.filter(type='business').count()
-        offer_count = Offer.objects.count()
-
-        data = {
-            'review_count': review_count,
-            'average_rating': average_rating,
-            'business_profile_count': business_profile_count,
-            'offer_count': offer_count,
-        }
-        return Response(data)
+        data, etag = platform_stats()
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = Response(data)
+        response['ETag'] = etag
+        response['Cache-Control'] = f"public, max-age={get_config()['TIMEOUT']}"
+        return response
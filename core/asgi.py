@@ -3,6 +3,11 @@ ASGI config for core project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Serve the project through this module (e.g. ``uvicorn core.asgi:application``) for the
+server-sent order events at /api/orders/events/: under ASGI every open stream is a
+suspended coroutine, under WSGI each one would hold a worker thread. With more than one
+worker set ORDER_EVENTS['BROKER'] to 'orders_app.events.DatabasePollingBroker'.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
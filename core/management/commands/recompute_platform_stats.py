@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from core.stats import recompute_platform_stats
+
+
+class Command(BaseCommand):
+    """
+    full recount of PlatformStats, meant to run periodically (e.g. hourly cron)
+    """
+    help = 'Recompute the /api/base-info/ platform stats from the review, user and offer tables.'
+
+    def handle(self, *args, **options):
+        stats = recompute_platform_stats()
+        self.stdout.write(self.style.SUCCESS(f'Recomputed platform stats: {stats}.'))
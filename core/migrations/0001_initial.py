@@ -0,0 +1,47 @@
+# Generated by Django 5.2.6 on 2026-10-18 19:48
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def compute_stats(apps, schema_editor):
+    Review = apps.get_model('reviews_app', 'Review')
+    Offer = apps.get_model('offers_app', 'Offer')
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    PlatformStats = apps.get_model('core', 'PlatformStats')
+    reviews = Review.objects.aggregate(n=Count('pk'), total=Sum('rating'))
+    PlatformStats.objects.create(
+        review_count=reviews['n'] or 0,
+        rating_sum=reviews['total'] or 0,
+        business_profile_count=User.objects.filter(type='business').count(),
+        offer_count=Offer.objects.count(),
+    )
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('offers_app', '0004_offer_search_index'),
+        ('reviews_app', '0003_review_list_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PlatformStats',
+            fields=[
+                ('id', models.PositiveSmallIntegerField(default=1, primary_key=True, serialize=False)),
+                ('review_count', models.BigIntegerField(default=0)),
+                ('rating_sum', models.BigIntegerField(default=0)),
+                ('business_profile_count', models.IntegerField(default=0)),
+                ('offer_count', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'platform stats',
+            },
+        ),
+        migrations.RunPython(compute_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+from django.db import models
+
+
+class PlatformStats(models.Model):
+    """
+    single row with the landing page numbers of /api/base-info/, maintained on write by
+    core.stats; `manage.py recompute_platform_stats` recomputes it as a safety net
+    """
+    SINGLETON_PK = 1
+
+    id = models.PositiveSmallIntegerField(primary_key=True, default=SINGLETON_PK)
+    review_count = models.BigIntegerField(default=0)
+    rating_sum = models.BigIntegerField(default=0)
+    business_profile_count = models.IntegerField(default=0)
+    offer_count = models.IntegerField(default=0)
+
+    class Meta:
+        verbose_name_plural = 'platform stats'
+
+    def as_payload(self):
+        return {
+            'review_count': self.review_count,
+            'average_rating': (
+                round(self.rating_sum / self.review_count, 1) if self.review_count else 0.0),
+            'business_profile_count': self.business_profile_count,
+            'offer_count': self.offer_count,
+        }
+
+    def __str__(self):
+        return f"{self.review_count} review(s), {self.business_profile_count} business(es), {self.offer_count} offer(s)"
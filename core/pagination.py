@@ -0,0 +1,215 @@
+"""
+keyset (cursor) pagination shared by the offer, order and review lists
+"""
+import base64
+import binascii
+import json
+from collections import OrderedDict
+from itertools import chain
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    cursor pagination that seeks on (ordering field, pk) instead of OFFSET and runs no COUNT.
+    the ordering is taken from the queryset (e.g. set by OrderingFilter); orderings outside
+    ordering_fields fall back to default_ordering. the cursor is an opaque base64 token.
+    """
+    cursor_query_param = 'cursor'
+    page_size = 6
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    ordering_fields = ('updated_at',)
+    default_ordering = '-updated_at'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(queryset)
+        self.field, self.descending = self.ordering.lstrip('-'), self.ordering.startswith('-')
+        self.model_field = queryset.model._meta.get_field(self.field)
+        self.nullable = self.model_field.null
+
+        cursor = self.decode_cursor(request)
+        backwards = bool(cursor and cursor['r'])
+        page = self.fetch_page(queryset, cursor, backwards, view)
+        has_more = len(page) > self.page_size
+        page = page[:self.page_size]
+        if backwards:
+            page.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, cursor is not None
+        self.page = page
+        return page
+
+    def seek(self, queryset, cursor, backwards):
+        """
+        queryset ordered in scan direction and positioned after the cursor
+        """
+        qs = queryset.order_by(*self.get_order_by(backwards))
+        if cursor:
+            qs = qs.filter(self.get_seek_filter(cursor['v'], cursor['pk'], backwards))
+        return qs
+
+    def fetch_page(self, queryset, cursor, backwards, view=None):
+        """
+        page_size + 1 rows in scan direction (the extra row tells whether there is more)
+        """
+        return list(self.seek(queryset, cursor, backwards)[:self.page_size + 1])
+
+    def get_page_size(self, request):
+        raw = request.query_params.get(self.page_size_query_param)
+        if raw:
+            try:
+                value = int(raw)
+            except (TypeError, ValueError):
+                return self.page_size
+            if value > 0:
+                return min(value, self.max_page_size)
+        return self.page_size
+
+    def get_ordering(self, queryset):
+        """
+        first ordering term of the queryset if it is a keyset field, default_ordering otherwise
+        """
+        order_by = queryset.query.order_by
+        if order_by and isinstance(order_by[0], str) and order_by[0].lstrip('-') in self.ordering_fields:
+            return order_by[0]
+        return self.default_ordering
+
+    def get_order_by(self, backwards):
+        """
+        (field, pk) in scan direction; nulls always sort after values in forward direction
+        """
+        scan_desc = self.descending != backwards
+        nulls = {'nulls_first': True} if backwards else {'nulls_last': True}
+        field = F(self.field).desc(**nulls) if scan_desc else F(self.field).asc(**nulls)
+        if not self.nullable:
+            field = '-' + self.field if scan_desc else self.field
+        return [field, '-pk' if scan_desc else 'pk']
+
+    def get_seek_filter(self, value, pk, backwards):
+        """
+        rows strictly after (value, pk) in scan direction
+        """
+        op = 'lt' if self.descending != backwards else 'gt'
+        if value is None:
+            seek = Q(**{f'{self.field}__isnull': True, f'pk__{op}': pk})
+            if backwards:
+                seek |= Q(**{f'{self.field}__isnull': False})
+            return seek
+        seek = Q(**{f'{self.field}__{op}': value}) | Q(**{self.field: value, f'pk__{op}': pk})
+        if self.nullable and not backwards:
+            seek |= Q(**{f'{self.field}__isnull': True})
+        return seek
+
+    def encode_cursor(self, obj, backwards):
+        value = getattr(obj, self.field)
+        payload = {
+            'o': self.ordering,
+            'v': None if value is None else (
+                value.isoformat() if hasattr(value, 'isoformat') else str(value)),
+            'pk': obj.pk,
+            'r': int(backwards),
+        }
+        token = base64.urlsafe_b64encode(
+            json.dumps(payload, separators=(',', ':')).encode()).decode()
+        return replace_query_param(
+            self.request.build_absolute_uri(), self.cursor_query_param, token)
+
+    def decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(token.encode()))
+            if payload['o'] != self.ordering:
+                raise ValueError
+            payload['v'] = None if payload['v'] is None else self.model_field.to_python(payload['v'])
+            payload['pk'] = int(payload['pk'])
+            payload['r'] = bool(payload['r'])
+        except (TypeError, ValueError, KeyError, binascii.Error, DjangoValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        return payload
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], backwards=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+        return self.encode_cursor(self.page[0], backwards=True)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class UnionKeysetPagination(KeysetPagination):
+    """
+    keyset pagination for OR filters across columns that are indexed separately.
+    the view returns one queryset per index from get_queryset_branches(); every branch is
+    seeked and limited on its own index and only those short pages are merged, instead of
+    scanning the OR filter. views without branches paginate as usual.
+    branches may come from different tables with disjoint pks (e.g. hot and archived rows);
+    their pages are merged in python, which needs a non-nullable ordering field.
+    """
+
+    def fetch_page(self, queryset, cursor, backwards, view=None):
+        get_branches = getattr(view, 'get_queryset_branches', None)
+        branches = get_branches() if get_branches else [queryset]
+        per_model = {}
+        for branch in branches:
+            per_model.setdefault(branch.model, []).append(branch)
+        pages = [self.fetch_model_page(group, cursor, backwards) for group in per_model.values()]
+        if len(pages) == 1:
+            return pages[0]
+        merged = sorted(
+            chain.from_iterable(pages),
+            key=lambda obj: (getattr(obj, self.field), obj.pk),
+            reverse=self.descending != backwards,
+        )
+        return merged[:self.page_size + 1]
+
+    def fetch_model_page(self, branches, cursor, backwards):
+        if len(branches) == 1:
+            return super().fetch_page(branches[0], cursor, backwards)
+        limit = self.page_size + 1
+        # the limited branch scans are merged via pk IN (...) rather than a compound UNION,
+        # since sqlite rejects LIMIT inside compound statements; the plan is the same:
+        # one bounded index scan per branch plus a pk lookup of at most branches * limit rows
+        merged = Q()
+        for branch in branches:
+            merged |= Q(pk__in=self.seek(branch, cursor, backwards).values('pk')[:limit])
+        # the first branch without its filters keeps select_related, prefetches and
+        # annotations, while the pk lists alone pick the rows (OR-ing the branch
+        # filters back in would let the planner scan them instead)
+        base = branches[0].all()
+        base.query.clear_where()
+        return list(base.filter(merged).order_by(*self.get_order_by(backwards))[:limit])
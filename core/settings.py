@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -98,6 +99,64 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+# set REDIS_URL (e.g. redis://127.0.0.1:6379/1) wherever more than one worker serves
+# the API; the local-memory fallback is private to each process
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Versioned response cache for public offer reads (offers_app.cache).
+# Entries are keyed on a version counter that every Offer/OfferDetail write and every
+# business user name change bumps. ENABLED None: on only for a shared backend (Redis),
+# since a bump in one worker's local memory never reaches the other workers.
+OFFERS_CACHE = {
+    'ENABLED': None,
+    'ALIAS': 'default',
+    'TIMEOUT': 300,
+    'COUNT_STATS': True,
+}
+
+# /api/base-info/ numbers (core.stats): served from this cache for TIMEOUT seconds, which is
+# also the Cache-Control max-age; `manage.py recompute_platform_stats` is the periodic recount
+PLATFORM_STATS = {
+    'ALIAS': 'default',
+    'TIMEOUT': 60,
+}
+
+# how long a replayable response is kept per Idempotency-Key (seconds);
+# expired keys are removed by `manage.py purge_idempotency_keys`
+ORDER_IDEMPOTENCY_KEY_TTL = 24 * 60 * 60
+
+# completed/cancelled orders untouched for this many days are moved to ArchivedOrder
+# by `manage.py archive_orders`
+ORDER_ARCHIVE_AFTER_DAYS = 180
+
+# server-sent order events (/api/orders/events/), see orders_app/events.py; only served
+# under ASGI (core/asgi.py). InProcessBroker only reaches streams in the process that wrote
+# the order: use 'orders_app.events.DatabasePollingBroker' with more than one worker or when
+# the events are served by their own process. TICKET_TTL: seconds a stream ticket stays valid.
+ORDER_EVENTS = {
+    'BROKER': 'orders_app.events.InProcessBroker',
+    'KEEPALIVE': 15,
+    'POLL_INTERVAL': 1.0,
+    'RETENTION': 60 * 60,
+    'TICKET_TTL': 60,
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -0,0 +1,48 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from offers_app.models import Offer
+
+from .stats import record_platform_changes
+
+User = get_user_model()
+
+
+def is_business(user_type):
+    return int(user_type == 'business')
+
+
+@receiver(post_init, sender=User)
+def remember_user_type(sender, instance, **kwargs):
+    # None when the type column was deferred
+    instance._stats_type = instance.__dict__.get('type')
+
+
+@receiver(post_save, sender=User)
+def count_business_user(sender, instance, created, **kwargs):
+    """new business users and type changes move business_profile_count"""
+    if kwargs.get('raw'):
+        return
+    before = None if created else instance._stats_type
+    after = instance.__dict__.get('type')
+    if after is not None and (created or before is not None):
+        record_platform_changes(business_profile_count=is_business(after) - is_business(before))
+    instance._stats_type = after
+
+
+@receiver(post_delete, sender=User)
+def uncount_business_user(sender, instance, **kwargs):
+    record_platform_changes(business_profile_count=-is_business(instance._stats_type))
+
+
+@receiver(post_save, sender=Offer)
+def count_offer(sender, instance, created, **kwargs):
+    """the bulk import counts its offers itself (offers_app.importers)"""
+    if created and not kwargs.get('raw'):
+        record_platform_changes(offer_count=1)
+
+
+@receiver(post_delete, sender=Offer)
+def uncount_offer(sender, instance, **kwargs):
+    record_platform_changes(offer_count=-1)
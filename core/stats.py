@@ -0,0 +1,91 @@
+"""
+platform stats for /api/base-info/.
+
+review writes (reviews_app.aggregates), user and offer writes (core.signals) and the bulk
+offer import add their deltas to the PlatformStats row inside their own transaction.
+reads are served from the process cache for PLATFORM_STATS['TIMEOUT'] seconds and only
+touch the row on a miss, so steady state costs no queries at all.
+"""
+import hashlib
+import json
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.utils.http import quote_etag
+
+from .aggregates import apply_deltas
+from .models import PlatformStats
+
+DEFAULTS = {
+    'ALIAS': 'default',
+    'TIMEOUT': 60,
+}
+
+CACHE_KEY = 'core:platform-stats'
+STATS_KEY = ('id',)
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'PLATFORM_STATS', {})}
+
+
+def get_cache():
+    return caches[get_config()['ALIAS']]
+
+
+def record_platform_changes(**deltas):
+    """
+    adds review_count=, rating_sum=, business_profile_count=, offer_count= deltas
+    """
+    deltas = {column: delta for column, delta in deltas.items() if delta}
+    if deltas:
+        apply_deltas(PlatformStats, STATS_KEY, {(PlatformStats.SINGLETON_PK,): deltas})
+
+
+def computed_platform_stats():
+    """
+    PlatformStats (unsaved) straight from the review, user and offer tables
+    """
+    from offers_app.models import Offer
+    from reviews_app.models import Review
+
+    reviews = Review.objects.aggregate(n=Count('pk'), total=Sum('rating'))
+    return PlatformStats(
+        review_count=reviews['n'] or 0,
+        rating_sum=reviews['total'] or 0,
+        business_profile_count=get_user_model().objects.filter(type='business').count(),
+        offer_count=Offer.objects.count(),
+    )
+
+
+def recompute_platform_stats():
+    """
+    overwrites the row with computed values; the locked row keeps concurrent deltas
+    from being applied in between the counts and the write
+    """
+    with transaction.atomic():
+        current = PlatformStats.objects.select_for_update().filter(pk=PlatformStats.SINGLETON_PK).first()
+        stats = computed_platform_stats()
+        stats.save(force_update=current is not None, force_insert=current is None)
+    get_cache().delete(CACHE_KEY)
+    return stats
+
+
+def platform_stats():
+    """
+    (payload, etag) from the process cache; a miss reads the row (computing it once if missing)
+    """
+    cache = get_cache()
+    entry = cache.get(CACHE_KEY)
+    if entry is None:
+        stats = PlatformStats.objects.filter(pk=PlatformStats.SINGLETON_PK).first()
+        if stats is None:
+            stats = recompute_platform_stats()
+        payload = stats.as_payload()
+        digest = hashlib.sha1(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+        entry = (payload, quote_etag(digest))
+        cache.set(CACHE_KEY, entry, get_config()['TIMEOUT'])
+    return entry
@@ -0,0 +1,67 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from rest_framework.test import APITestCase
+
+from core.models import PlatformStats
+from core.stats import get_cache
+from offers_app.models import Offer
+from reviews_app.models import Review
+
+User = get_user_model()
+
+
+class BaseInfoTests(APITestCase):
+    def setUp(self):
+        get_cache().clear()
+        self.business = User.objects.create_user(username='biz', password='pw', type='business')
+        self.customer = User.objects.create_user(username='cust', password='pw', type='customer')
+        Offer.objects.create(business_user=self.business, title='Website')
+        Review.objects.create(business_user=self.business, reviewer=self.customer, rating=4)
+
+    def base_info(self, **headers):
+        get_cache().clear()
+        return self.client.get('/api/base-info/', **headers)
+
+    def test_numbers_follow_writes(self):
+        self.assertEqual(self.base_info().data, {
+            'review_count': 1, 'average_rating': 4.0,
+            'business_profile_count': 1, 'offer_count': 1,
+        })
+        other = User.objects.create_user(username='biz2', password='pw', type='business')
+        Review.objects.create(business_user=other, reviewer=self.customer, rating=5)
+        Offer.objects.create(business_user=other, title='Logo')
+        self.customer.type = 'business'
+        self.customer.save()
+        self.assertEqual(self.base_info().data, {
+            'review_count': 2, 'average_rating': 4.5,
+            'business_profile_count': 3, 'offer_count': 2,
+        })
+        other.delete()
+        self.assertEqual(self.base_info().data, {
+            'review_count': 1, 'average_rating': 4.0,
+            'business_profile_count': 2, 'offer_count': 1,
+        })
+
+    def test_steady_state_costs_no_queries(self):
+        first = self.client.get('/api/base-info/', HTTP_AUTHORIZATION='Token unknown')
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first['Cache-Control'], 'public, max-age=60')
+        with self.assertNumQueries(0):
+            res = self.client.get('/api/base-info/')
+        self.assertEqual(res.data, first.data)
+        with self.assertNumQueries(0):
+            res = self.client.get('/api/base-info/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(res.status_code, 304)
+
+    def test_recompute_repairs_drift(self):
+        PlatformStats.objects.update(review_count=50, offer_count=0)
+        call_command('recompute_platform_stats', stdout=StringIO())
+        self.assertEqual(self.base_info().data['review_count'], 1)
+        self.assertEqual(self.base_info().data['offer_count'], 1)
+
+    def test_missing_row_is_computed_on_first_read(self):
+        PlatformStats.objects.all().delete()
+        self.assertEqual(self.base_info().data['business_profile_count'], 1)
+        self.assertTrue(PlatformStats.objects.exists())
@@ -17,6 +17,8 @@ class OfferAdmin(admin.ModelAdmin):
         'business_user',
         'created_at',
         'updated_at',
+        'min_price',
+        'min_delivery_time',
         'details_count',
     )
     list_filter = ('created_at', 'updated_at')
@@ -27,7 +29,8 @@ class OfferAdmin(admin.ModelAdmin):
         'business_user__email',
     )
     date_hierarchy = 'created_at'
-    readonly_fields = ('created_at', 'updated_at')
+    # derived from the details, maintained on every detail write
+    readonly_fields = ('created_at', 'updated_at', 'min_price', 'min_delivery_time')
     raw_id_fields = ('business_user',)
     list_select_related = ('business_user',)
     inlines = [OfferDetailInline]
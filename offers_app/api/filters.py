@@ -0,0 +1,26 @@
+from rest_framework.filters import OrderingFilter, SearchFilter
+
+from offers_app.search import get_search_backend
+
+
+class OfferSearchFilter(SearchFilter):
+    """
+    ?search= backed by the configured full-text backend instead of icontains scans
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        terms = ' '.join(self.get_search_terms(request))
+        if not terms:
+            return queryset
+        return get_search_backend().search(queryset, terms)
+
+
+class RelevanceOrderingFilter(OrderingFilter):
+    """
+    orders search results by relevance (then recency) unless ?ordering= is given
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        if 'search_rank' in queryset.query.annotations and not request.query_params.get(self.ordering_param):
+            return queryset.order_by('search_rank', '-updated_at')
+        return super().filter_queryset(request, queryset, view)
@@ -0,0 +1,193 @@
+import hashlib
+
+from django.db import transaction
+from django.db.models import Prefetch
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from offers_app import cache as offers_cache
+from offers_app.models import OfferDetail
+
+# HEAD runs the GET handler, so it reads with the same serializer and queryset
+READ_METHODS = ('GET', 'HEAD')
+
+
+class VersionedCacheMixin:
+    """
+    serves GET responses from the versioned offers cache; only 200 responses are stored.
+    HEAD bypasses the cache so it never stores or answers for a GET.
+    """
+    cache_kind = None
+    cache_query_params = ()
+
+    def cached_response(self, request, build):
+        if request.method != 'GET' or not offers_cache.is_enabled():
+            return build()
+        config = offers_cache.get_config()
+
+        params = {
+            name: request.query_params[name]
+            for name in self.cache_query_params if name in request.query_params
+        }
+        key = offers_cache.make_key(
+            self.cache_kind, request.build_absolute_uri(request.path), params)
+        cache = offers_cache.get_cache()
+
+        data = cache.get(key)
+        if data is not None:
+            offers_cache.record(hit=True)
+            response = Response(data)
+            response['X-Cache'] = 'HIT'
+            return response
+
+        offers_cache.record(hit=False)
+        response = build()
+        if response.status_code == 200:
+            cache.set(key, response.data, config['TIMEOUT'])
+        response['X-Cache'] = 'MISS'
+        return response
+
+
+class ConditionalRequestMixin:
+    """
+    strong ETag + Last-Modified derived from one indexed updated_at lookup, checked
+    before anything is serialized. GET answers 304 on a match; unsafe methods answer
+    412 when If-Match / If-Unmodified-Since no longer match. last_modified_field may
+    span a relation (e.g. 'offer__updated_at' to validate by the parent).
+    """
+    etag_namespace = None
+    last_modified_field = 'updated_at'
+    precondition_headers = ('HTTP_IF_MATCH', 'HTTP_IF_UNMODIFIED_SINCE',
+                            'HTTP_IF_NONE_MATCH', 'HTTP_IF_MODIFIED_SINCE')
+
+    def get_last_modified(self, lock=False):
+        """last_modified_field of the resource or None if it does not exist"""
+        lookup = self.lookup_url_kwarg or self.lookup_field
+        qs = self.get_queryset().model._default_manager.filter(
+            **{self.lookup_field: self.kwargs[lookup]})
+        if lock:
+            qs = qs.select_for_update()
+        return qs.values_list(self.last_modified_field, flat=True).first()
+
+    def get_validators(self, lock=False):
+        return self.validators_for(self.get_last_modified(lock=lock))
+
+    def validators_for(self, updated_at):
+        if updated_at is None:
+            return None
+        pk = self.kwargs[self.lookup_url_kwarg or self.lookup_field]
+        raw = f'{self.etag_namespace}:{pk}:{updated_at.isoformat()}'
+        return {
+            'etag': quote_etag(hashlib.sha1(raw.encode()).hexdigest()),
+            'last_modified': int(updated_at.timestamp()),
+        }
+
+    def precondition_response(self, request, validators):
+        """304/412 response when the request's conditional headers say so, else None"""
+        if validators is None:
+            return None
+        return get_conditional_response(request, **validators)
+
+    def set_validators(self, response, validators):
+        if validators is not None and response.status_code == 200:
+            response['ETag'] = validators['etag']
+            response['Last-Modified'] = http_date(validators['last_modified'])
+        return response
+
+    def conditional_read(self, request, build):
+        validators = self.get_validators()
+        response = self.precondition_response(request, validators)
+        if response is None:
+            response = build()
+        return self.set_validators(response, validators)
+
+    def conditional_write(self, request, build):
+        """
+        runs the write in a transaction holding the row, so a concurrent editor
+        whose If-Match went stale gets 412 instead of overwriting
+        """
+        if not any(header in request.META for header in self.precondition_headers):
+            return build()
+        with transaction.atomic():
+            response = self.precondition_response(request, self.get_validators(lock=True))
+            if response is not None:
+                return response
+            return build()
+
+
+class SparseFieldsMixin:
+    """
+    ?fields=a,b limits the GET response to those fields and loads only the columns
+    they need (no user join / details prefetch unless requested); ?expand=details
+    inlines full detail data from the prefetch
+    """
+    fields_param = 'fields'
+    expand_param = 'expand'
+    expandable = ('details',)
+    # response field -> columns to load (defaults to the field name itself)
+    field_columns = {
+        'user': ('business_user',),
+        'user_details': ('business_user', 'business_user__first_name',
+                         'business_user__last_name', 'business_user__username'),
+        'details': (),
+    }
+    # pk and the keyset/ordering columns are always needed
+    always_loaded = ('id', 'updated_at', 'min_price')
+
+    def get_read_serializer_class(self):
+        return self.get_serializer_class()
+
+    def _split_param(self, name):
+        raw = self.request.query_params.get(name)
+        if not raw:
+            return None
+        return [part.strip() for part in raw.split(',') if part.strip()]
+
+    def get_sparse_fields(self):
+        if not hasattr(self, '_sparse_fields'):
+            names = self._split_param(self.fields_param)
+            if names is not None:
+                unknown = sorted(set(names) - set(self.get_read_serializer_class().Meta.fields))
+                if unknown:
+                    raise ValidationError({self.fields_param: f"Unknown field(s): {', '.join(unknown)}."})
+            self._sparse_fields = names
+        return self._sparse_fields
+
+    def get_expand(self):
+        if not hasattr(self, '_expand'):
+            names = set(self._split_param(self.expand_param) or ())
+            unknown = sorted(names - set(self.expandable))
+            if unknown:
+                raise ValidationError({self.expand_param: f"Cannot expand: {', '.join(unknown)}."})
+            self._expand = names
+        return self._expand
+
+    def wants(self, name):
+        fields = self.get_sparse_fields()
+        return name in (fields if fields is not None else self.get_read_serializer_class().Meta.fields)
+
+    def sparse_queryset(self, qs):
+        if self.wants('user_details'):
+            qs = qs.select_related('business_user')
+        if self.wants('details'):
+            if 'details' in self.get_expand():
+                qs = qs.prefetch_related('details')
+            else:
+                qs = qs.prefetch_related(
+                    Prefetch('details', queryset=OfferDetail.objects.only('id', 'offer')))
+        fields = self.get_sparse_fields()
+        if fields is not None:
+            columns = set(self.always_loaded)
+            for name in fields:
+                columns.update(self.field_columns.get(name, (name,)))
+            qs = qs.only(*columns)
+        return qs
+
+    def get_serializer_context(self):
+        ctx = super().get_serializer_context()
+        if self.request.method in READ_METHODS:
+            ctx['fields'] = self.get_sparse_fields()
+            ctx['expand'] = self.get_expand()
+        return ctx
@@ -1,6 +1,51 @@
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination, PageNumberPagination
+
+from core.pagination import KeysetPagination
+
 
 class DefaultPageNumberPagination(PageNumberPagination):
     page_size = 6
     page_size_query_param = 'page_size'
     max_page_size = 100
+
+
+class OfferKeysetPagination(KeysetPagination):
+    ordering_fields = ('updated_at', 'min_price')
+    default_ordering = '-updated_at'
+
+
+class CursorOrPageNumberPagination(BasePagination):
+    """
+    page-number pagination by default (with count); switches to keyset pagination
+    without count when the cursor param is present, e.g. ?cursor= for the first page
+    """
+    page_number_class = DefaultPageNumberPagination
+    cursor_class = OfferKeysetPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        use_cursor = self.cursor_class.cursor_query_param in request.query_params
+        if use_cursor and queryset.query.order_by[:1] == ('search_rank',):
+            # the rank is not a keyset column; silently paging by -updated_at would reorder hits
+            raise ValidationError({self.cursor_class.cursor_query_param: (
+                'Search results ordered by relevance are paged with ?page=; '
+                'pass ?ordering= to page them by cursor.')})
+        self.delegate = self.cursor_class() if use_cursor else self.page_number_class()
+        return self.delegate.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.delegate.get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        return self.page_number_class().get_paginated_response_schema(schema)
+
+    def get_schema_operation_parameters(self, view):
+        params = self.page_number_class().get_schema_operation_parameters(view)
+        params.append({
+            'name': self.cursor_class.cursor_query_param,
+            'required': False,
+            'in': 'query',
+            'description': 'Keyset cursor; send it empty for the first page. Responses then omit count.',
+            'schema': {'type': 'string'},
+        })
+        return params
@@ -1,4 +1,10 @@
+from functools import lru_cache
+from operator import attrgetter
+
+from django.db import models, transaction
+from django.urls import get_script_prefix
 from rest_framework import serializers
+from offers_app import cache as offers_cache
 from offers_app.models import Offer, OfferDetail
 from django.urls import reverse
 from django.utils.functional import cached_property
@@ -46,7 +52,50 @@ class OfferDetailSerializer(serializers.ModelSerializer):
         return cleaned
 
 
-class OfferListItemSerializer(serializers.ModelSerializer):
+@lru_cache(maxsize=None)
+def offerdetail_url_template(script_prefix):
+    """
+    splits the "offerdetail-detail" url around the pk once per script prefix
+    """
+    marker = 987654321
+    prefix, suffix = reverse('offerdetail-detail', args=[marker]).split(str(marker))
+    return prefix, suffix
+
+
+def offerdetail_url(pk):
+    prefix, suffix = offerdetail_url_template(get_script_prefix())
+    return f'{prefix}{pk}{suffix}'
+
+
+class SparseFieldsetMixin:
+    """
+    keeps only the fields listed in context["fields"] (None = all) and, when
+    "details" is in context["expand"], inlines full OfferDetailSerializer data
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        fields = self.context.get('fields')
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+        if 'details' in self.context.get('expand', ()) and 'details' in self.fields:
+            self.fields['details'] = OfferDetailSerializer(many=True, read_only=True)
+
+
+class OfferListItemListSerializer(serializers.ListSerializer):
+    """
+    renders many list items through the child's precompiled renderer
+    instead of running the per-field loop for every row
+    """
+
+    def to_representation(self, data):
+        iterable = data.all() if isinstance(data, models.manager.BaseManager) else data
+        render = self.child.compile_renderer()
+        return [render(item) for item in iterable]
+
+
+class OfferListItemSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """
     compact list serializer exposing user id, basic offer fields, min stats, and user details
     """
@@ -80,6 +129,49 @@ class OfferListItemSerializer(serializers.ModelSerializer):
             'min_delivery_time',
             'user_details',
         )
+        list_serializer_class = OfferListItemListSerializer
+
+    # fields whose to_representation is the identity for the values the model holds
+    passthrough_fields = (serializers.CharField, serializers.IntegerField)
+
+    def compile_renderer(self):
+        """
+        builds a row renderer from (name, getter) pairs resolved once per serializer;
+        output is identical to to_representation()
+        """
+        fast = {
+            'details': self.fast_details,
+            'user_details': self.get_user_details,
+        }
+        steps = []
+        for field in self._readable_fields:
+            name = field.field_name
+            if name in fast and isinstance(field, serializers.SerializerMethodField):
+                steps.append((name, fast[name]))
+                continue
+            get = attrgetter('.'.join(field.source_attrs))
+            if isinstance(field, self.passthrough_fields):
+                steps.append((name, get))
+            else:
+                steps.append((name, self._converted(get, field.to_representation)))
+
+        def render(obj):
+            return {name: getter(obj) for name, getter in steps}
+        return render
+
+    @staticmethod
+    def _converted(get, convert):
+        def getter(obj):
+            value = get(obj)
+            return None if value is None else convert(value)
+        return getter
+
+    def fast_details(self, obj):
+        """
+        same as get_details() but formats urls from the cached template
+        """
+        return [{'id': d.id, 'url': offerdetail_url(d.id)}
+                for d in getattr(obj, 'details_all', None) or obj.details.all()]
 
     def get_details(self, obj):
         """
@@ -113,6 +205,8 @@ class OfferSerializer(serializers.ModelSerializer):
     """
     details = OfferDetailSerializer(many=True, required=False)
 
+    DETAIL_UPDATE_FIELDS = ("title", "revisions", "delivery_time_in_days", "price", "features")
+
     class Meta:
         model = Offer
         fields = ("id", "title", "image", "description",
@@ -143,42 +237,60 @@ class OfferSerializer(serializers.ModelSerializer):
         if getattr(user, "type", None) != "business":
             raise serializers.ValidationError(
                 "Only business users can create offers.")
+        if details_data:
+            validated_data["min_price"] = min(d["price"] for d in details_data)
+            validated_data["min_delivery_time"] = min(
+                d.get("delivery_time_in_days", 1) for d in details_data)
         offer = Offer.objects.create(business_user=user, **validated_data)
         OfferDetail.objects.bulk_create(
             [OfferDetail(offer=offer, **d) for d in details_data])
+        offers_cache.invalidate()
         offer.refresh_from_db()
         return offer
 
     def update(self, instance, validated_data):
         """
-        updates offer fields; for each incoming detail finds by id or offer_type and updates allowed fields
+        updates offer fields; matches each incoming detail by id or offer_type against the
+        offer's details (loaded once, prefetched when available), applies changes in memory
+        and persists them atomically: one bulk_update for the details, one UPDATE for the offer
         """
-        for f in ("title", "image", "description"):
-            if f in validated_data:
-                setattr(instance, f, validated_data[f])
+        offer_fields = [f for f in ("title", "image", "description") if f in validated_data]
+        for f in offer_fields:
+            setattr(instance, f, validated_data[f])
 
+        changed, changed_fields = {}, set()
         details_data = validated_data.get("details")
         if details_data is not None:
+            details = list(instance.details.all())
+            by_id = {od.pk: od for od in details}
+            by_type = {od.offer_type: od for od in details}
             for d in details_data:
                 od = None
                 if "id" in d:
-                    od = instance.details.filter(pk=d["id"]).first()
+                    od = by_id.get(d["id"])
                 elif "offer_type" in d:
-                    od = instance.details.filter(
-                        offer_type=d["offer_type"]).first()
+                    od = by_type.get(d["offer_type"])
                 if not od:
                     raise serializers.ValidationError(
                         "Each detail must include a valid 'id' or 'offer_type'.")
-                for f in ("title", "revisions", "delivery_time_in_days", "price", "features"):
+                for f in self.DETAIL_UPDATE_FIELDS:
                     if f in d:
                         setattr(od, f, d[f])
-                od.save()
+                        changed_fields.add(f)
+                changed[od.pk] = od
+            if details:
+                instance.min_price = min(od.price for od in details)
+                instance.min_delivery_time = min(od.delivery_time_in_days for od in details)
+                offer_fields += ["min_price", "min_delivery_time"]
 
-        instance.save()
+        with transaction.atomic():
+            if changed and changed_fields:
+                OfferDetail.objects.bulk_update(changed.values(), sorted(changed_fields))
+            instance.save(update_fields=offer_fields + ["updated_at"])
         return instance
 
 
-class OfferReadSerializer(serializers.ModelSerializer):
+class OfferReadSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """
     READ serializer (GET list/detail). Returns:
     - user = business_user_id
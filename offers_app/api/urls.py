@@ -1,5 +1,5 @@
 from django.urls import path
-from .views import OfferListCreateView, OfferDetailView, OfferDetailRetrieveView
+from .views import OfferListCreateView, OfferDetailView, OfferDetailRetrieveView, OfferImportView, OfferFacetsView
 
 urlpatterns = [
     path(
@@ -7,6 +7,16 @@ urlpatterns = [
         OfferListCreateView.as_view(),
         name='offer-list-create'
     ),
+    path(
+        'offers/import/',
+        OfferImportView.as_view(),
+        name='offer-import'
+    ),
+    path(
+        'offers/facets/',
+        OfferFacetsView.as_view(),
+        name='offer-facets'
+    ),
     path(
         'offers/<int:pk>/',
         OfferDetailView.as_view(),
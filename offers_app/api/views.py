@@ -1,45 +1,63 @@
-from django.db.models import Min
 from rest_framework.generics import ListCreateAPIView, RetrieveAPIView, RetrieveUpdateDestroyAPIView
 from rest_framework.permissions import IsAuthenticatedOrReadOnly, IsAuthenticated
-from rest_framework.filters import SearchFilter, OrderingFilter
 from django_filters.rest_framework import DjangoFilterBackend
 from offers_app.models import Offer, OfferDetail
 from .serializers import OfferSerializer, OfferListItemSerializer, OfferDetailSerializer, OfferReadSerializer, OfferReadWithDetailsSerializer
 from .permissions import IsBusinessForWrite, IsOfferOwnerOrReadOnly
-from .pagination import DefaultPageNumberPagination
-from django.db.models.functions import Cast
-from django.db.models import Min, IntegerField
+from .pagination import CursorOrPageNumberPagination
+from .filters import OfferSearchFilter, RelevanceOrderingFilter
+from .mixins import READ_METHODS, ConditionalRequestMixin, SparseFieldsMixin, VersionedCacheMixin
 from rest_framework.response import Response
+from rest_framework.views import APIView
+from rest_framework import status
+from offers_app.importers import READERS, import_offers
+from offers_app.facets import DEFAULT_PRICE_BUCKET, compute_facets
 from rest_framework.exceptions import ValidationError
 from decimal import Decimal, InvalidOperation
+from functools import partial
 
 
-class OfferDetailView(RetrieveUpdateDestroyAPIView):
+class OfferDetailView(ConditionalRequestMixin, SparseFieldsMixin, VersionedCacheMixin, RetrieveUpdateDestroyAPIView):
     """
-    retrieve/update/delete a single offer with owner-only writes and annotated mins
+    retrieve/update/delete a single offer with owner-only writes and stored mins;
+    GET supports ?fields= and ?expand=details
     """
     permission_classes = [IsAuthenticated,
                           IsBusinessForWrite, IsOfferOwnerOrReadOnly]
+    cache_kind = 'offer'
+    cache_query_params = ('fields', 'expand')
+    etag_namespace = 'offer'
+
+    def retrieve(self, request, *args, **kwargs):
+        """answers 304 from the validators, else serves the versioned offers cache"""
+        build = partial(super().retrieve, request, *args, **kwargs)
+        return self.conditional_read(request, partial(self.cached_response, request, build))
+
+    def destroy(self, request, *args, **kwargs):
+        """deletes unless If-Match/If-Unmodified-Since no longer match (412)"""
+        return self.conditional_write(request, partial(super().destroy, request, *args, **kwargs))
 
     def get_queryset(self):
         """
-        joins user, prefetches details, annotates min_price/min_delivery_time
+        GET/HEAD load only what the requested fields need; writes join user and prefetch
+        details. min_price/min_delivery_time are stored columns
         """
+        if self.request.method in READ_METHODS:
+            return self.sparse_queryset(Offer.objects.all())
         return (
             Offer.objects
             .select_related("business_user")
             .prefetch_related("details")
-            .annotate(
-                min_price=Cast(Min("details__price"), IntegerField()),
-                min_delivery_time=Min("details__delivery_time_in_days"),
-            )
         )
 
     def get_serializer_class(self):
         """
-        uses read serializer for GET, write serializer otherwise
+        uses read serializer for GET/HEAD, write serializer otherwise
         """
-        return OfferReadSerializer if self.request.method == "GET" else OfferSerializer
+        return OfferReadSerializer if self.request.method in READ_METHODS else OfferSerializer
+
+    def get_read_serializer_class(self):
+        return OfferReadSerializer
 
     def get_serializer_context(self):
         """injects request into serializer context"""
@@ -48,6 +66,12 @@ class OfferDetailView(RetrieveUpdateDestroyAPIView):
         return ctx
 
     def update(self, request, *args, **kwargs):
+        """
+        checks If-Match/If-Unmodified-Since (412 when stale), then writes
+        """
+        return self.conditional_write(request, partial(self.apply_update, request, *args, **kwargs))
+
+    def apply_update(self, request, *args, **kwargs):
         """
         validates with write serializer, saves, then returns full details via read-with-details serializer
         """
@@ -60,48 +84,21 @@ class OfferDetailView(RetrieveUpdateDestroyAPIView):
         write_ser.is_valid(raise_exception=True)
         self.perform_update(write_ser)
 
-        obj = self.get_queryset().get(pk=instance.pk)
+        # the instance already carries the updated prefetched details and min stats
         read_ser = OfferReadWithDetailsSerializer(
-            obj, context=self.get_serializer_context())
-        return Response(read_ser.data)
+            instance, context=self.get_serializer_context())
+        return self.set_validators(Response(read_ser.data), self.validators_for(instance.updated_at))
 
 
-class OfferListCreateView(ListCreateAPIView):
+class OfferFilterMixin:
     """
-    list and create offers with optional search/filter/order and pagination
+    query param filters shared by the offer list and the facets endpoint
     """
-    permission_classes = [IsAuthenticatedOrReadOnly, IsBusinessForWrite]
-    pagination_class = DefaultPageNumberPagination
-
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
-    search_fields = ['title', 'description']
-    ordering_fields = ['updated_at', 'min_price']
-    ordering = ['-updated_at']
-    
-    def get_serializer_class(self):
-        if self.request.method == "POST":
-            return OfferSerializer
-        return OfferListItemSerializer
-
-    def get_serializer_context(self):
-        ctx = super().get_serializer_context()
-        ctx["request"] = self.request
-        return ctx
 
-    def get_queryset(self):
+    def filter_offers(self, qs):
         """
-        annotates min stats; supports filters: creator_id, min_price, max_delivery_time
+        filters on the indexed min stat columns: creator_id, min_price, max_delivery_time
         """
-        qs = (
-            Offer.objects
-            .select_related('business_user')
-            .prefetch_related('details')
-            .annotate(
-                min_price=Min('details__price'),                     
-                min_delivery_time=Min('details__delivery_time_in_days')
-            )
-        )
-
         # creator_id (integer pnly)
         creator_id = self.request.query_params.get('creator_id')
         if creator_id is not None and creator_id != '':
@@ -144,34 +141,143 @@ class OfferListCreateView(ListCreateAPIView):
             value = Decimal(str(raw))
         except (InvalidOperation, TypeError, ValueError):
             raise ValidationError({field_name: 'Must be a number.'})
+        # NaN/Infinity parse fine but can neither be compared nor stored in a query
+        if not value.is_finite():
+            raise ValidationError({field_name: 'Must be a number.'})
         if value < 0:
             raise ValidationError({field_name: 'Must be >= 0.'})
         return value
 
 
-class OfferRetrieveView(RetrieveAPIView):
+class OfferListCreateView(OfferFilterMixin, SparseFieldsMixin, VersionedCacheMixin, ListCreateAPIView):
     """
-    retrieve a single offer list item with annotated min stats
+    list and create offers with optional search/filter/order, pagination,
+    sparse fieldsets (?fields=) and inlined details (?expand=details)
+    """
+    permission_classes = [IsAuthenticatedOrReadOnly, IsBusinessForWrite]
+    pagination_class = CursorOrPageNumberPagination
+    cache_kind = 'offer-list'
+    cache_query_params = (
+        'search', 'creator_id', 'min_price', 'max_delivery_time',
+        'ordering', 'page', 'page_size', 'cursor', 'fields', 'expand',
+    )
+
+    filter_backends = [DjangoFilterBackend, OfferSearchFilter, RelevanceOrderingFilter]
+    search_fields = ['title', 'description']
+    ordering_fields = ['updated_at', 'min_price']
+    ordering = ['-updated_at']
+    
+    def list(self, request, *args, **kwargs):
+        """serves the page from the versioned offers cache"""
+        build = partial(super().list, request, *args, **kwargs)
+        return self.cached_response(request, build)
+
+    def get_serializer_class(self):
+        if self.request.method == "POST":
+            return OfferSerializer
+        return OfferListItemSerializer
+
+    def get_read_serializer_class(self):
+        return OfferListItemSerializer
+
+    def get_serializer_context(self):
+        ctx = super().get_serializer_context()
+        ctx["request"] = self.request
+        return ctx
+
+    def get_queryset(self):
+        """
+        loads the columns/relations the requested fields need and applies the OfferFilterMixin filters
+        """
+        return self.filter_offers(self.sparse_queryset(Offer.objects.all()))
+
+
+class OfferFacetsView(OfferFilterMixin, VersionedCacheMixin, APIView):
+    """
+    GET /api/offers/facets/
+    price histograms per offer_type, delivery-time buckets and totals over the offers
+    matching creator_id / min_price / max_delivery_time / search; ?price_bucket= sets the
+    histogram width. computed in one grouped query and cached per filter set.
+    """
+    permission_classes = [IsAuthenticatedOrReadOnly]
+    cache_kind = 'offer-facets'
+    cache_query_params = ('search', 'creator_id', 'min_price', 'max_delivery_time', 'price_bucket')
+
+    def get(self, request, *args, **kwargs):
+        return self.cached_response(request, partial(self.build_facets, request))
+
+    def build_facets(self, request):
+        bucket = request.query_params.get('price_bucket')
+        bucket = self._parse_non_negative_decimal(bucket, 'price_bucket') if bucket else DEFAULT_PRICE_BUCKET
+        if bucket < 1:
+            raise ValidationError({'price_bucket': 'Must be >= 1.'})
+
+        offers = self.filter_offers(Offer.objects.all())
+        offers = OfferSearchFilter().filter_queryset(request, offers, self)
+        return Response(compute_facets(offers, bucket))
+
+
+class OfferRetrieveView(ConditionalRequestMixin, RetrieveAPIView):
+    """
+    retrieve a single offer list item with stored min stats
     """
     permission_classes = [IsAuthenticatedOrReadOnly]
     serializer_class = OfferListItemSerializer
+    etag_namespace = 'offer-item'
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_read(request, partial(super().retrieve, request, *args, **kwargs))
 
     def get_queryset(self):
         return (
             Offer.objects
-            .select_related("business_user")
-            .prefetch_related("details")
-            .annotate(
-                min_price=Min("details__price"),
-                min_delivery_time=Min("details__delivery_time_in_days"),
-            )
+            .select_related('business_user')
+            .prefetch_related('details')
         )
 
 
-class OfferDetailRetrieveView(RetrieveAPIView):
+class OfferDetailRetrieveView(ConditionalRequestMixin, RetrieveAPIView):
     """
-    retrieve a single offer detail by primary key
+    retrieve a single offer detail by primary key; validated by the parent offer's updated_at
     """
     queryset = OfferDetail.objects.all()
     serializer_class = OfferDetailSerializer
     lookup_field = "pk"
+    etag_namespace = 'offerdetail'
+    last_modified_field = 'offer__updated_at'
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_read(request, partial(super().retrieve, request, *args, **kwargs))
+
+
+class OfferImportView(APIView):
+    """
+    POST /api/offers/import/
+    streams NDJSON (default) or CSV (Content-Type text/csv or ?format=csv) from the request
+    body into batched inserts and returns a per-row error report. business users only.
+    """
+    permission_classes = [IsAuthenticated, IsBusinessForWrite]
+    max_batch_size = 1000
+
+    def post(self, request, *args, **kwargs):
+        fmt = request.query_params.get('format')
+        if not fmt:
+            fmt = 'csv' if request.content_type.startswith('text/csv') else 'ndjson'
+        if fmt not in READERS:
+            raise ValidationError({'format': f"Must be one of: {', '.join(READERS)}."})
+
+        options = {}
+        batch_size = request.query_params.get('batch_size')
+        if batch_size:
+            try:
+                batch_size = int(batch_size)
+            except ValueError:
+                raise ValidationError({'batch_size': 'Must be an integer.'})
+            if batch_size < 1:
+                raise ValidationError({'batch_size': 'Must be >= 1.'})
+            options['batch_size'] = min(batch_size, self.max_batch_size)
+
+        # iterate the raw body line by line instead of parsing request.data
+        stream = request.stream or []
+        report = import_offers(READERS[fmt](stream), request.user, **options)
+        return Response(report, status=status.HTTP_200_OK)
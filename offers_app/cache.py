@@ -0,0 +1,103 @@
+"""
+versioned response cache for offer reads.
+
+every cache key embeds the current version number; writes bump the version instead of
+deleting entries, so stale entries are never served and simply expire via TIMEOUT.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.http import urlencode
+
+DEFAULTS = {
+    # None: on unless ALIAS points at a per-process backend (see is_enabled)
+    'ENABLED': None,
+    'ALIAS': 'default',
+    'TIMEOUT': 300,
+    'COUNT_STATS': True,
+}
+
+# backends whose entries live in one process: a version bump in one worker would never
+# reach the others, so they keep serving stale offers until TIMEOUT
+PROCESS_LOCAL_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+VERSION_KEY = 'offers:version'
+HITS_KEY = 'offers:stats:hits'
+MISSES_KEY = 'offers:stats:misses'
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'OFFERS_CACHE', {})}
+
+
+def is_enabled():
+    enabled = get_config()['ENABLED']
+    if enabled is None:
+        backend = settings.CACHES[get_config()['ALIAS']]['BACKEND']
+        return backend not in PROCESS_LOCAL_BACKENDS
+    return enabled
+
+
+def get_cache():
+    return caches[get_config()['ALIAS']]
+
+
+def current_version():
+    """
+    version of the offer data; seeded from the clock so a lost key never reuses old entries
+    """
+    cache = get_cache()
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, time.time_ns(), timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def bump_version():
+    cache = get_cache()
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.add(VERSION_KEY, time.time_ns(), timeout=None)
+
+
+def invalidate():
+    """
+    bumps the version now and again after commit, so a read that races an open
+    transaction cannot pin pre-commit data under the new version
+    """
+    bump_version()
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(bump_version)
+
+
+def make_key(kind, base_uri, params, version=None):
+    """
+    key over the request base uri and the normalized (sorted, stripped) query params
+    """
+    normalized = urlencode(sorted((name, value.strip()) for name, value in params.items()))
+    digest = hashlib.sha1(f'{base_uri}?{normalized}'.encode()).hexdigest()
+    return f'offers:{version if version is not None else current_version()}:{kind}:{digest}'
+
+
+def record(hit):
+    if not get_config()['COUNT_STATS']:
+        return
+    cache = get_cache()
+    key = HITS_KEY if hit else MISSES_KEY
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 1, timeout=None)
+
+
+def stats():
+    cache = get_cache()
+    return {'hits': cache.get(HITS_KEY, 0), 'misses': cache.get(MISSES_KEY, 0)}
@@ -0,0 +1,67 @@
+"""
+price / delivery-time facets over the details of a filtered offer queryset.
+
+one GROUP BY (offer_type, price bucket, delivery bucket) query is folded into
+per-type histograms, delivery buckets and totals in python.
+"""
+from decimal import Decimal
+
+from django.db.models import Case, CharField, Count, F, Max, Min, Value, When
+from django.db.models.functions import Floor
+
+from .models import OfferDetail
+
+DEFAULT_PRICE_BUCKET = Decimal('50')
+
+# (label, inclusive upper bound in days); the last bucket is open-ended
+DELIVERY_BUCKETS = (('1', 1), ('2-3', 3), ('4-7', 7), ('8-14', 14), ('15+', None))
+
+
+def delivery_bucket_expression():
+    whens = [When(delivery_time_in_days__lte=upper, then=Value(label))
+             for label, upper in DELIVERY_BUCKETS if upper is not None]
+    return Case(*whens, default=Value(DELIVERY_BUCKETS[-1][0]), output_field=CharField())
+
+
+def compute_facets(offers, price_bucket=DEFAULT_PRICE_BUCKET):
+    rows = (
+        OfferDetail.objects
+        .filter(offer__in=offers.order_by().values('pk'))
+        .annotate(
+            price_bucket=Floor(F('price') / Value(price_bucket)),
+            delivery_bucket=delivery_bucket_expression(),
+        )
+        .values('offer_type', 'price_bucket', 'delivery_bucket')
+        .annotate(count=Count('pk'), min_price=Min('price'), max_price=Max('price'))
+        .order_by()
+    )
+
+    types = {t: {'count': 0, 'min_price': None, 'max_price': None, 'price_histogram': {}}
+             for t in OfferDetail.OfferType.values}
+    delivery = {label: 0 for label, _ in DELIVERY_BUCKETS}
+    total = 0
+
+    for row in rows:
+        facet = types[row['offer_type']]
+        facet['count'] += row['count']
+        if facet['min_price'] is None or row['min_price'] < facet['min_price']:
+            facet['min_price'] = row['min_price']
+        if facet['max_price'] is None or row['max_price'] > facet['max_price']:
+            facet['max_price'] = row['max_price']
+        index = int(row['price_bucket'])
+        facet['price_histogram'][index] = facet['price_histogram'].get(index, 0) + row['count']
+        delivery[row['delivery_bucket']] += row['count']
+        total += row['count']
+
+    for facet in types.values():
+        facet['price_histogram'] = [
+            {'from': price_bucket * index, 'to': price_bucket * (index + 1), 'count': count}
+            for index, count in sorted(facet['price_histogram'].items())
+        ]
+
+    return {
+        'price_bucket': price_bucket,
+        'total_details': total,
+        'offer_types': types,
+        'delivery_time': [{'bucket': label, 'count': delivery[label]} for label, _ in DELIVERY_BUCKETS],
+    }
@@ -0,0 +1,146 @@
+"""
+streaming bulk import of offers (NDJSON or CSV).
+
+rows flow through generators (read -> batch -> validate -> write), so memory depends on
+the batch size and the number of failed rows, never on the size of the input.
+every batch is written with two bulk INSERTs inside its own transaction.
+"""
+import csv
+import json
+from itertools import islice
+
+from django.db import connection, transaction
+
+from core.stats import record_platform_changes
+
+from . import cache as offers_cache
+from .api.serializers import OfferSerializer
+from .models import Offer, OfferDetail
+from .search import get_search_backend
+
+TIERS = ('basic', 'standard', 'premium')
+TIERS_ERROR = 'details must include exactly one of each: basic, standard, premium.'
+DETAIL_FIELDS = ('title', 'revisions', 'delivery_time_in_days', 'price', 'features')
+DEFAULT_BATCH_SIZE = 200
+
+
+def _text_lines(lines):
+    for line in lines:
+        yield line.decode('utf-8') if isinstance(line, bytes) else line
+
+
+def read_ndjson(lines):
+    """
+    yields (row_number, data) for every non-blank line; unparsable lines yield an error dict
+    """
+    for number, line in enumerate(_text_lines(lines), start=1):
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+        except ValueError as exc:
+            yield number, {'_parse_error': f'Invalid JSON: {exc}'}
+            continue
+        if not isinstance(data, dict):
+            data = {'_parse_error': 'Each line must be a JSON object.'}
+        yield number, data
+
+
+def read_csv(lines):
+    """
+    yields (row_number, data) from a flat CSV with title/description/image and
+    <tier>_<field> columns per tier; features are separated by "|"
+    """
+    reader = csv.DictReader(_text_lines(lines))
+    for number, row in enumerate(reader, start=1):
+        data = {f: row[f] for f in ('title', 'description', 'image') if row.get(f)}
+        details = []
+        for tier in TIERS:
+            detail = {'offer_type': tier}
+            for field in DETAIL_FIELDS:
+                value = row.get(f'{tier}_{field}')
+                if value is None or value == '':
+                    continue
+                if field == 'features':
+                    value = value.split('|')
+                detail[field] = value
+            details.append(detail)
+        data['details'] = details
+        yield number, data
+
+
+READERS = {'ndjson': read_ndjson, 'csv': read_csv}
+
+
+def batched(rows, size):
+    rows = iter(rows)
+    while batch := list(islice(rows, size)):
+        yield batch
+
+
+def validate_batch(batch):
+    """
+    splits a batch into (valid, errors) using the regular write serializer; the serializer
+    leaves details optional, so a row without all three tiers is rejected here
+    """
+    valid, errors = [], []
+    for number, data in batch:
+        if '_parse_error' in data:
+            errors.append({'row': number, 'errors': {'non_field_errors': [data['_parse_error']]}})
+            continue
+        serializer = OfferSerializer(data=data)
+        if not serializer.is_valid():
+            errors.append({'row': number, 'errors': serializer.errors})
+        elif sorted(d.get('offer_type') for d in serializer.validated_data.get('details', [])) != sorted(TIERS):
+            errors.append({'row': number, 'errors': {'details': [TIERS_ERROR]}})
+        else:
+            valid.append((number, serializer.validated_data))
+    return valid, errors
+
+
+def write_batch(valid, user):
+    """
+    one transaction per batch: bulk INSERT of offers (min stats precomputed), then of details
+    """
+    offers, details_per_offer = [], []
+    for _, data in valid:
+        data = dict(data)
+        details = data.pop('details', [])
+        offers.append(Offer(
+            business_user=user,
+            min_price=min(d['price'] for d in details),
+            min_delivery_time=min(d.get('delivery_time_in_days', 1) for d in details),
+            **data,
+        ))
+        details_per_offer.append(details)
+
+    with transaction.atomic():
+        if connection.features.can_return_rows_from_bulk_insert:
+            Offer.objects.bulk_create(offers)
+            # bulk_create sends no post_save, count the batch here
+            record_platform_changes(offer_count=len(offers))
+        else:
+            for offer in offers:
+                offer.save()
+        OfferDetail.objects.bulk_create([
+            OfferDetail(offer=offer, **d)
+            for offer, details in zip(offers, details_per_offer)
+            for d in details
+        ])
+        get_search_backend().index(offers)
+        offers_cache.invalidate()
+    return len(offers)
+
+
+def import_offers(rows, user, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    runs the pipeline over (row_number, data) pairs and returns the import report
+    """
+    report = {'created': 0, 'failed': 0, 'errors': []}
+    for batch in batched(rows, batch_size):
+        valid, errors = validate_batch(batch)
+        if valid:
+            report['created'] += write_batch(valid, user)
+        report['failed'] += len(errors)
+        report['errors'].extend(errors)
+    return report
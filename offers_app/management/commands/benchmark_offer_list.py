@@ -0,0 +1,58 @@
+import timeit
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from offers_app.api.serializers import OfferListItemSerializer
+from offers_app.models import Offer, OfferDetail
+
+User = get_user_model()
+
+
+def build_offers(count):
+    """
+    unsaved offers with details attached as details_all, so no query is involved
+    """
+    user = User(pk=1, username='bench', first_name='Bench', last_name='User', type='business')
+    now = timezone.now()
+    offers = []
+    for i in range(1, count + 1):
+        offer = Offer(
+            pk=i, business_user=user, title=f'Offer {i}', description='x' * 200,
+            created_at=now, updated_at=now, min_price=Decimal('100.00'), min_delivery_time=3,
+        )
+        offer.details_all = [
+            OfferDetail(pk=i * 3 + n, offer=offer, offer_type=t, price=Decimal('100.00'), title=t)
+            for n, t in enumerate(('basic', 'standard', 'premium'))
+        ]
+        offers.append(offer)
+    return offers
+
+
+class Command(BaseCommand):
+    """
+    micro-benchmark: per-row cost of the field-by-field serializer vs the precompiled list path
+    """
+    help = 'Compare per-row rendering cost of OfferListItemSerializer (per-field vs fast list path).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100)
+        parser.add_argument('--repeat', type=int, default=50)
+
+    def handle(self, *args, **options):
+        rows, repeat = options['rows'], options['repeat']
+        offers = build_offers(rows)
+
+        child = OfferListItemSerializer()
+
+        def per_field():
+            return [child.to_representation(o) for o in offers]
+
+        def fast_path():
+            return OfferListItemSerializer(offers, many=True).data
+
+        for label, fn in (('per-field', per_field), ('fast list path', fast_path)):
+            best = min(timeit.repeat(fn, number=1, repeat=repeat))
+            self.stdout.write(f'{label:>15}: {best / rows * 1e6:8.1f} µs/row ({rows} rows)')
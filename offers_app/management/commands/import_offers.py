@@ -0,0 +1,37 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from offers_app.importers import DEFAULT_BATCH_SIZE, READERS, import_offers
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    """
+    streams offers from an NDJSON or CSV file into the catalog of one business user
+    """
+    help = 'Bulk import offers (NDJSON or CSV) for a business user and print the error report.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--user', type=int, required=True, help='business user id')
+        parser.add_argument('--format', choices=sorted(READERS), default=None,
+                            help='defaults to csv for *.csv files, ndjson otherwise')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(pk=options['user'], type='business')
+        except User.DoesNotExist:
+            raise CommandError('No business user with this id.')
+
+        fmt = options['format'] or ('csv' if options['path'].endswith('.csv') else 'ndjson')
+        with open(options['path'], encoding='utf-8', newline='') as fh:
+            report = import_offers(READERS[fmt](fh), user, batch_size=options['batch_size'])
+
+        for error in report['errors']:
+            self.stderr.write(f"row {error['row']}: {json.dumps(error['errors'])}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {report['created']} offer(s), {report['failed']} row(s) failed."))
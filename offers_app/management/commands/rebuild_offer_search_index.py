@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from offers_app.search import get_search_backend
+
+
+class Command(BaseCommand):
+    """
+    rebuilds the offer full-text index from the offer table
+    """
+    help = 'Rebuild the full-text search index for offers.'
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        backend.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt offer search index ({type(backend).__name__}).'))
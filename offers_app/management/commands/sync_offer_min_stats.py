@@ -0,0 +1,58 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Min, OuterRef, Subquery
+
+from offers_app.models import Offer, OfferDetail
+
+
+def computed_min_stats():
+    """
+    correlated subqueries computing min price / delivery time from the details of each offer
+    """
+    per_offer = OfferDetail.objects.filter(offer=OuterRef('pk')).values('offer')
+    return {
+        'min_price': Subquery(per_offer.annotate(m=Min('price')).values('m')),
+        'min_delivery_time': Subquery(
+            per_offer.annotate(m=Min('delivery_time_in_days')).values('m')),
+    }
+
+
+class Command(BaseCommand):
+    """
+    backfills or verifies the denormalized Offer.min_price / Offer.min_delivery_time columns
+    """
+    help = 'Recompute Offer.min_price/min_delivery_time from the details (use --check to only report drift).'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Only report offers whose stored values differ, do not write.',
+        )
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        stats = computed_min_stats()
+        rows = Offer.objects.annotate(
+            computed_min_price=stats['min_price'],
+            computed_min_delivery_time=stats['min_delivery_time'],
+        ).values_list(
+            'pk', 'min_price', 'min_delivery_time',
+            'computed_min_price', 'computed_min_delivery_time',
+        )
+
+        drifted = [
+            pk for pk, price, days, expected_price, expected_days in rows.iterator()
+            if price != expected_price or days != expected_days
+        ]
+
+        if options['check']:
+            for pk in drifted:
+                self.stdout.write(f'offer #{pk} is out of sync')
+            self.stdout.write(f'{len(drifted)} offer(s) out of sync.')
+            return
+
+        batch_size = options['batch_size']
+        for start in range(0, len(drifted), batch_size):
+            Offer.objects.filter(pk__in=drifted[start:start + batch_size]).update(
+                **computed_min_stats())
+        self.stdout.write(self.style.SUCCESS(f'Repaired {len(drifted)} offer(s).'))
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.6 on 2026-10-18 18:44
+
+from django.db import migrations, models
+from django.db.models import Min, OuterRef, Subquery
+
+
+def backfill_min_stats(apps, schema_editor):
+    Offer = apps.get_model('offers_app', 'Offer')
+    OfferDetail = apps.get_model('offers_app', 'OfferDetail')
+    per_offer = (OfferDetail.objects
+                 .filter(offer=OuterRef('pk'))
+                 .values('offer'))
+    Offer.objects.update(
+        min_price=Subquery(per_offer.annotate(m=Min('price')).values('m')),
+        min_delivery_time=Subquery(
+            per_offer.annotate(m=Min('delivery_time_in_days')).values('m')),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('offers_app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='offer',
+            name='min_delivery_time',
+            field=models.PositiveIntegerField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='offer',
+            name='min_price',
+            field=models.DecimalField(blank=True, db_index=True, decimal_places=2, max_digits=10, null=True),
+        ),
+        migrations.RunPython(backfill_min_stats, migrations.RunPython.noop),
+    ]
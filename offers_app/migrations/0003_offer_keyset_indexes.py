@@ -0,0 +1,28 @@
+# Generated by Django 5.2.6 on 2026-10-18 18:45
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('offers_app', '0002_offer_min_price_min_delivery_time'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='offer',
+            name='min_price',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='offer',
+            index=models.Index(fields=['updated_at', 'id'], name='offers_app__updated_3bd5fe_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='offer',
+            index=models.Index(fields=['min_price', 'id'], name='offers_app__min_pri_fbee87_idx'),
+        ),
+    ]
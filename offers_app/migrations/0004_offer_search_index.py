@@ -0,0 +1,47 @@
+from django.db import migrations
+
+
+FTS_TABLE = 'offers_app_offer_fts'
+PG_INDEX = 'offers_app_offer_search_idx'
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    qn = connection.ops.quote_name
+    fts, pg_index, offers = qn(FTS_TABLE), qn(PG_INDEX), qn('offers_app_offer')
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute('PRAGMA compile_options')
+            if 'ENABLE_FTS5' not in {row[0] for row in cursor.fetchall()}:
+                return  # search falls back to icontains
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE {fts} USING fts5("
+                f"title, description, tokenize='unicode61 remove_diacritics 2')")
+            cursor.execute(
+                f'INSERT INTO {fts} (rowid, title, description) '
+                f'SELECT id, title, description FROM {offers}')
+        elif connection.vendor == 'postgresql':
+            cursor.execute(
+                f"CREATE INDEX {pg_index} ON {offers} USING GIN ("
+                f"to_tsvector('simple', coalesce(title, '') || ' ' || coalesce(description, '')))")
+
+
+def drop_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    qn = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.execute(f'DROP TABLE IF EXISTS {qn(FTS_TABLE)}')
+        elif connection.vendor == 'postgresql':
+            cursor.execute(f'DROP INDEX IF EXISTS {qn(PG_INDEX)}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('offers_app', '0003_offer_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
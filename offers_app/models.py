@@ -1,5 +1,6 @@
 from django.conf import settings
 from django.db import models
+from django.db.models import Min
 from django.utils import timezone
 
 User = settings.AUTH_USER_MODEL
@@ -19,10 +20,46 @@ class Offer(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(default=timezone.now)
 
+    # denormalized from details, kept in sync by refresh_min_stats()
+    min_price = models.DecimalField(
+        max_digits=10, decimal_places=2, null=True, blank=True
+    )
+    min_delivery_time = models.PositiveIntegerField(
+        null=True, blank=True, db_index=True
+    )
+
+    class Meta:
+        indexes = [
+            # keyset pagination seeks on (ordering field, id)
+            models.Index(fields=["updated_at", "id"]),
+            models.Index(fields=["min_price", "id"]),
+        ]
+
     def save(self, *args, **kwargs):
         self.updated_at = timezone.now()
         return super().save(*args, **kwargs)
 
+    def compute_min_stats(self):
+        """
+        aggregates the cheapest price and fastest delivery over all details
+        """
+        return self.details.aggregate(
+            min_price=Min("price"),
+            min_delivery_time=Min("delivery_time_in_days"),
+        )
+
+    def refresh_min_stats(self, touch=False):
+        """
+        recomputes min_price/min_delivery_time with a single UPDATE;
+        touch=True also bumps updated_at (a detail changed without the offer being saved)
+        """
+        values = self.compute_min_stats()
+        if touch:
+            values["updated_at"] = timezone.now()
+        Offer.objects.filter(pk=self.pk).update(**values)
+        for field, value in values.items():
+            setattr(self, field, value)
+
     def __str__(self):
         return f"Offer #{self.pk} – {self.title}"
 
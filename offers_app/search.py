@@ -0,0 +1,156 @@
+"""
+full-text search backends for offers (title + description).
+
+the backend is picked from settings.OFFER_SEARCH_BACKEND (dotted path) or, by default,
+from the database vendor: FTS5 on SQLite, a GIN-indexed tsvector expression on
+PostgreSQL and plain icontains matching everywhere else. every backend annotates
+``search_rank`` where lower means more relevant.
+"""
+import re
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import F, FloatField, Func, Q
+from django.db.models.expressions import RawSQL
+from django.utils.module_loading import import_string
+
+from .models import Offer
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+class RankByPk(Func):
+    """
+    rank of each outer row from a lookup keyed on its pk ({pk} in `sql`, after `params`);
+    the pk compiles against whatever alias the offer table gets, e.g. U0 in a subquery
+    """
+    output_field = FloatField()
+
+    def __init__(self, sql, params):
+        super().__init__(F('pk'))
+        self.sql, self.params = sql, params
+
+    def as_sql(self, compiler, connection, **extra_context):
+        pk, pk_params = compiler.compile(self.source_expressions[0])
+        return f'({self.sql.format(pk=pk)})', [*self.params, *pk_params]
+
+
+class BaseSearchBackend:
+    """
+    icontains fallback; also the interface every backend implements
+    """
+
+    def search(self, queryset, terms):
+        tokens = TOKEN_RE.findall(terms)
+        for token in tokens:
+            queryset = queryset.filter(
+                Q(title__icontains=token) | Q(description__icontains=token))
+        return queryset.annotate(search_rank=RawSQL('0', [], output_field=FloatField()))
+
+    def index(self, offers):
+        """(re)indexes the given offers after they were written"""
+
+    def remove(self, pks):
+        """drops the given offer ids from the index"""
+
+    def rebuild(self):
+        """rebuilds the whole index from the offer table"""
+
+
+class SqliteFTS5Backend(BaseSearchBackend):
+    """
+    FTS5 virtual table keyed by offer id (rowid); created in migration 0004
+    """
+    table = 'offers_app_offer_fts'
+    # only a positive check is remembered, so a process started before migrate picks
+    # the index up as soon as it exists
+    _available = False
+
+    @classmethod
+    def is_available(cls):
+        if not cls._available:
+            cls._available = cls.table in connection.introspection.table_names()
+        return cls._available
+
+    def match_expression(self, terms):
+        """every token as a quoted prefix query, implicitly ANDed"""
+        return ' '.join(f'"{token}"*' for token in TOKEN_RE.findall(terms))
+
+    def search(self, queryset, terms):
+        """
+        filters on the matching rowids and reads bm25() by rowid seek per hit, instead of
+        joining the FTS table by name (which breaks once the queryset is a subquery)
+        """
+        match = self.match_expression(terms)
+        if not match:
+            return super().search(queryset, terms)
+        fts = connection.ops.quote_name(self.table)
+        return (queryset
+                .filter(pk__in=RawSQL(f'SELECT rowid FROM {fts} WHERE {fts} MATCH %s', [match]))
+                .annotate(search_rank=RankByPk(
+                    f'SELECT bm25({fts}) FROM {fts} WHERE {fts} MATCH %s AND {fts}.rowid = {{pk}}',
+                    [match])))
+
+    def index(self, offers):
+        rows = [(o.pk, o.title or '', o.description or '') for o in offers]
+        if not rows:
+            return
+        fts = connection.ops.quote_name(self.table)
+        with connection.cursor() as cursor:
+            cursor.executemany(f'DELETE FROM {fts} WHERE rowid = %s', [(r[0],) for r in rows])
+            cursor.executemany(
+                f'INSERT INTO {fts} (rowid, title, description) VALUES (%s, %s, %s)', rows)
+
+    def remove(self, pks):
+        fts = connection.ops.quote_name(self.table)
+        with connection.cursor() as cursor:
+            cursor.executemany(f'DELETE FROM {fts} WHERE rowid = %s', [(pk,) for pk in pks])
+
+    def rebuild(self):
+        qn = connection.ops.quote_name
+        fts, offers = qn(self.table), qn(Offer._meta.db_table)
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {fts}')
+            cursor.execute(
+                f'INSERT INTO {fts} (rowid, title, description) '
+                f'SELECT id, title, description FROM {offers}')
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    """
+    matches against the expression indexed by offers_app_offer_search_idx (migration 0004),
+    so postgres keeps the index in sync by itself
+    """
+    config = 'simple'
+    vector = ("to_tsvector('simple', coalesce(\"offers_app_offer\".\"title\", '') || ' ' || "
+              "coalesce(\"offers_app_offer\".\"description\", ''))")
+
+    def search(self, queryset, terms):
+        if not TOKEN_RE.search(terms):
+            return super().search(queryset, terms)
+        query = f"plainto_tsquery('{self.config}', %s)"
+        offers = connection.ops.quote_name(Offer._meta.db_table)
+        return (queryset
+                .filter(pk__in=RawSQL(
+                    f'SELECT "id" FROM {offers} WHERE {self.vector} @@ {query}', [terms]))
+                .annotate(search_rank=RankByPk(
+                    f'SELECT -ts_rank({self.vector}, {query}) FROM {offers} WHERE "id" = {{pk}}',
+                    [terms])))
+
+
+@lru_cache(maxsize=None)
+def _backend(path):
+    return import_string(path)()
+
+
+def get_search_backend():
+    path = getattr(settings, 'OFFER_SEARCH_BACKEND', None)
+    if not path:
+        if connection.vendor == 'sqlite' and SqliteFTS5Backend.is_available():
+            path = 'offers_app.search.SqliteFTS5Backend'
+        elif connection.vendor == 'postgresql':
+            path = 'offers_app.search.PostgresSearchBackend'
+        else:
+            path = 'offers_app.search.BaseSearchBackend'
+    return _backend(path)
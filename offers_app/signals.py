@@ -0,0 +1,55 @@
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import cache as offers_cache
+from .models import Offer, OfferDetail
+from .search import get_search_backend
+
+
+@receiver(post_save, sender=OfferDetail)
+@receiver(post_delete, sender=OfferDetail)
+def sync_offer_min_stats(sender, instance, **kwargs):
+    """
+    keeps min_price/min_delivery_time of the parent offer in sync when a single detail
+    is saved or deleted (admin, shell) and bumps its updated_at so ETags change.
+    bulk writes call refresh_min_stats() themselves.
+    """
+    if kwargs.get("raw"):
+        return
+    offer = instance.offer if OfferDetail.offer.is_cached(instance) else Offer(pk=instance.offer_id)
+    offer.refresh_min_stats(touch=True)
+
+
+@receiver(post_save, sender=Offer)
+def index_offer(sender, instance, **kwargs):
+    """keeps the full-text index in sync with title/description"""
+    update_fields = kwargs.get("update_fields")
+    if kwargs.get("raw") or (update_fields is not None and not {"title", "description"} & update_fields):
+        return
+    get_search_backend().index([instance])
+
+
+@receiver(post_delete, sender=Offer)
+def unindex_offer(sender, instance, **kwargs):
+    get_search_backend().remove([instance.pk])
+
+
+@receiver(post_save, sender=Offer)
+@receiver(post_delete, sender=Offer)
+@receiver(post_save, sender=OfferDetail)
+@receiver(post_delete, sender=OfferDetail)
+def invalidate_offer_cache(sender, instance, **kwargs):
+    """any offer/detail write moves cached offer reads to a new version"""
+    offers_cache.invalidate()
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def invalidate_offer_cache_for_user(sender, instance, **kwargs):
+    """cached offers embed user_details, so a business user's name change bumps the version"""
+    update_fields = kwargs.get("update_fields")
+    if kwargs.get("raw") or getattr(instance, "type", None) != "business":
+        return
+    if update_fields is not None and not {"first_name", "last_name", "username"} & update_fields:
+        return
+    offers_cache.invalidate()
@@ -1,4 +1,40 @@
-from rest_framework.test import APITestCase
+import json
+from decimal import Decimal
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import F
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory, APITestCase, force_authenticate
+
+from offers_app.api.serializers import OfferListItemSerializer
+from offers_app.api.views import OfferRetrieveView
+from offers_app.models import Offer, OfferDetail
+from offers_app.search import SqliteFTS5Backend, get_search_backend
+
+User = get_user_model()
+
+
+def offer_payload(title='Website', prices=(100, 200, 300), days=(7, 5, 3)):
+    return {
+        'title': title,
+        'description': 'A complete website',
+        'details': [
+            {
+                'title': f'{offer_type} package',
+                'revisions': 1,
+                'delivery_time_in_days': delivery,
+                'price': price,
+                'features': ['Design'],
+                'offer_type': offer_type,
+            }
+            for offer_type, price, delivery in zip(('basic', 'standard', 'premium'), prices, days)
+        ],
+    }
 
 
 class OfferListUnhappyPathTests(APITestCase):
@@ -7,3 +43,460 @@ class OfferListUnhappyPathTests(APITestCase):
         res = self.client.get(url)
         self.assertEqual(res.status_code, 400)
         self.assertIn('max_delivery_time', res.data)
+
+
+class OfferMinStatsTests(APITestCase):
+    def setUp(self):
+        self.business = User.objects.create_user(
+            username='biz', password='pw', type='business')
+        self.client.force_authenticate(self.business)
+
+    def test_create_and_update_keep_min_stats_in_sync(self):
+        res = self.client.post('/api/offers/', offer_payload(), format='json')
+        self.assertEqual(res.status_code, 201)
+        offer = Offer.objects.get(pk=res.data['id'])
+        self.assertEqual(offer.min_price, Decimal('100'))
+        self.assertEqual(offer.min_delivery_time, 3)
+
+        res = self.client.patch(
+            f'/api/offers/{offer.pk}/',
+            {'details': [{'offer_type': 'basic', 'price': 50, 'delivery_time_in_days': 1}]},
+            format='json',
+        )
+        self.assertEqual(res.status_code, 200)
+        offer.refresh_from_db()
+        self.assertEqual(offer.min_price, Decimal('50'))
+        self.assertEqual(offer.min_delivery_time, 1)
+
+        res = self.client.get('/api/offers/?min_price=60')
+        self.assertEqual(res.data['count'], 0)
+
+    def test_sync_command_repairs_drift(self):
+        res = self.client.post('/api/offers/', offer_payload(), format='json')
+        Offer.objects.filter(pk=res.data['id']).update(min_price=None, min_delivery_time=None)
+
+        out = StringIO()
+        call_command('sync_offer_min_stats', '--check', stdout=out)
+        self.assertIn('1 offer(s) out of sync', out.getvalue())
+
+        call_command('sync_offer_min_stats', stdout=StringIO())
+        offer = Offer.objects.get(pk=res.data['id'])
+        self.assertEqual(offer.min_price, Decimal('100'))
+        self.assertEqual(offer.min_delivery_time, 3)
+
+    def test_retrieve_view_serves_stored_min_stats(self):
+        offer_id = self.client.post('/api/offers/', offer_payload(prices=(80, 90, 95)), format='json').data['id']
+        request = APIRequestFactory().get(f'/offers/{offer_id}/')
+        force_authenticate(request, self.business)
+        res = OfferRetrieveView.as_view()(request, pk=offer_id)
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.data['min_price'], 80)
+        self.assertIn('ETag', res)
+
+    def test_single_detail_save_refreshes_offer(self):
+        res = self.client.post('/api/offers/', offer_payload(), format='json')
+        detail = OfferDetail.objects.get(offer_id=res.data['id'], offer_type='premium')
+        detail.price = Decimal('10')
+        detail.save()
+        self.assertEqual(Offer.objects.get(pk=res.data['id']).min_price, Decimal('10'))
+
+
+class OfferCursorPaginationTests(APITestCase):
+    def setUp(self):
+        self.business = User.objects.create_user(
+            username='biz', password='pw', type='business')
+        self.client.force_authenticate(self.business)
+        for i, price in enumerate((30, 10, 20, 10, 40)):
+            self.client.post('/api/offers/', offer_payload(
+                title=f'Offer {i}', prices=(price, price + 1, price + 2)), format='json')
+        Offer.objects.create(business_user=self.business, title='No details')
+
+    def walk(self, url):
+        seen, pages = [], []
+        while url:
+            res = self.client.get(url)
+            self.assertEqual(res.status_code, 200)
+            self.assertNotIn('count', res.data)
+            seen += [item['id'] for item in res.data['results']]
+            pages.append(res.data)
+            url = res.data['next']
+        return seen, pages
+
+    def test_cursor_walk_matches_ordering(self):
+        orderings = {
+            '-updated_at': ('-updated_at', '-pk'),
+            'min_price': (F('min_price').asc(nulls_last=True), 'pk'),
+        }
+        for ordering, order_by in orderings.items():
+            seen, pages = self.walk(f'/api/offers/?cursor=&page_size=2&ordering={ordering}')
+            expected = list(Offer.objects.order_by(*order_by).values_list('pk', flat=True))
+            self.assertEqual(seen, expected)
+            self.assertIsNone(pages[0]['previous'])
+
+            back = self.client.get(pages[-1]['previous'])
+            self.assertEqual([item['id'] for item in back.data['results']],
+                             [item['id'] for item in pages[-2]['results']])
+
+    def test_page_number_mode_still_counts(self):
+        res = self.client.get('/api/offers/?page=1&page_size=2')
+        self.assertEqual(res.data['count'], 6)
+
+    def test_invalid_cursor_returns_404(self):
+        res = self.client.get('/api/offers/?cursor=garbage')
+        self.assertEqual(res.status_code, 404)
+
+
+class OfferSearchTests(APITestCase):
+    def setUp(self):
+        self.business = User.objects.create_user(
+            username='biz', password='pw', type='business')
+        self.client.force_authenticate(self.business)
+
+    def create(self, title, description):
+        payload = offer_payload(title=title)
+        payload['description'] = description
+        return self.client.post('/api/offers/', payload, format='json').data['id']
+
+    def test_search_ranks_by_relevance_and_follows_writes(self):
+        weak = self.create('Logo design', 'We also build a website on request')
+        strong = self.create('Website website', 'Website development, website hosting')
+        self.create('Logo design', 'Vector logos')
+
+        res = self.client.get('/api/offers/?search=websit')
+        self.assertEqual([o['id'] for o in res.data['results']], [strong, weak])
+
+        self.client.patch(f'/api/offers/{weak}/', {'description': 'Vector logos'}, format='json')
+        res = self.client.get('/api/offers/?search=website')
+        self.assertEqual([o['id'] for o in res.data['results']], [strong])
+
+        Offer.objects.get(pk=strong).delete()
+        res = self.client.get('/api/offers/?search=website')
+        self.assertEqual(res.data['count'], 0)
+
+    def test_rank_is_read_by_rowid_seek(self):
+        for i in range(3):
+            self.create(f'Website {i}', 'website')
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get('/api/offers/?search=website&page_size=10')
+        self.assertEqual(res.data['count'], 3)
+        listing = [q['sql'] for q in ctx.captured_queries if 'bm25' in q['sql']]
+        self.assertTrue(listing)
+        if 'offers_app_offer_fts' in listing[0]:
+            self.assertIn('"offers_app_offer_fts".rowid = "offers_app_offer"."id"', listing[0])
+            self.assertNotIn('FROM "offers_app_offer" , "offers_app_offer_fts"', listing[0])
+
+    def test_cursor_needs_an_explicit_ordering_with_search(self):
+        self.create('Website', 'website')
+        res = self.client.get('/api/offers/?search=website&cursor=')
+        self.assertEqual(res.status_code, 400)
+        self.assertIn('cursor', res.data)
+        res = self.client.get('/api/offers/?search=website&cursor=&ordering=-updated_at')
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(len(res.data['results']), 1)
+
+    def test_index_is_picked_up_once_it_exists(self):
+        with patch.object(SqliteFTS5Backend, '_available', False), \
+                patch.object(connection.introspection, 'table_names', return_value=[]):
+            self.assertNotIsInstance(get_search_backend(), SqliteFTS5Backend)
+        if connection.vendor == 'sqlite' and SqliteFTS5Backend.table in connection.introspection.table_names():
+            self.assertIsInstance(get_search_backend(), SqliteFTS5Backend)
+
+
+CACHE_ON = {'ENABLED': True, 'ALIAS': 'default', 'TIMEOUT': 300, 'COUNT_STATS': True}
+
+
+@override_settings(OFFERS_CACHE=CACHE_ON)
+class OfferResponseCacheTests(APITestCase):
+    def setUp(self):
+        self.business = User.objects.create_user(
+            username='biz', password='pw', type='business')
+        self.client.force_authenticate(self.business)
+        self.offer_id = self.client.post('/api/offers/', offer_payload(), format='json').data['id']
+
+    def test_reads_are_cached_until_a_write_bumps_the_version(self):
+        first = self.client.get('/api/offers/?page_size=5&search=')
+        self.assertEqual(first['X-Cache'], 'MISS')
+        again = self.client.get('/api/offers/?search=&page_size=5')
+        self.assertEqual(again['X-Cache'], 'HIT')
+        self.assertEqual(again.data, first.data)
+
+        detail = self.client.get(f'/api/offers/{self.offer_id}/')
+        self.assertEqual(detail['X-Cache'], 'MISS')
+        self.assertEqual(self.client.get(f'/api/offers/{self.offer_id}/')['X-Cache'], 'HIT')
+
+        self.client.patch(f'/api/offers/{self.offer_id}/', {'title': 'Renamed'}, format='json')
+        res = self.client.get('/api/offers/?page_size=5&search=')
+        self.assertEqual(res['X-Cache'], 'MISS')
+        self.assertEqual(res.data['results'][0]['title'], 'Renamed')
+        res = self.client.get(f'/api/offers/{self.offer_id}/')
+        self.assertEqual(res['X-Cache'], 'MISS')
+        self.assertEqual(res.data['title'], 'Renamed')
+
+    def test_head_reads_like_get_and_is_not_cached(self):
+        head = self.client.head(f'/api/offers/{self.offer_id}/')
+        self.assertEqual(head.status_code, 200)
+        self.assertNotIn('X-Cache', head)
+        self.assertIn('min_price', head.data)
+        res = self.client.get(f'/api/offers/{self.offer_id}/')
+        self.assertEqual(res['X-Cache'], 'MISS')
+        self.assertEqual(res.data, head.data)
+
+    def test_business_user_rename_bumps_the_version(self):
+        self.client.get('/api/offers/')
+        self.assertEqual(self.client.get('/api/offers/')['X-Cache'], 'HIT')
+        self.business.last_login = self.business.date_joined
+        self.business.save(update_fields=['last_login'])
+        self.assertEqual(self.client.get('/api/offers/')['X-Cache'], 'HIT')
+        self.business.first_name = 'Grace'
+        self.business.save()
+        res = self.client.get('/api/offers/')
+        self.assertEqual(res['X-Cache'], 'MISS')
+        self.assertEqual(res.data['results'][0]['user_details']['first_name'], 'Grace')
+
+    @override_settings(OFFERS_CACHE={})
+    def test_local_memory_backend_leaves_the_cache_off(self):
+        self.client.get('/api/offers/')
+        self.assertNotIn('X-Cache', self.client.get('/api/offers/'))
+
+
+class OfferListFastPathTests(APITestCase):
+    def setUp(self):
+        self.business = User.objects.create_user(
+            username='biz', password='pw', type='business', first_name='Ada')
+        self.client.force_authenticate(self.business)
+        for i in range(3):
+            self.client.post('/api/offers/', offer_payload(title=f'Offer {i}'), format='json')
+        Offer.objects.create(business_user=self.business, title='No details', image=None)
+
+    def test_fast_list_path_matches_per_field_output(self):
+        offers = list(Offer.objects.select_related('business_user').prefetch_related('details'))
+        fast = OfferListItemSerializer(offers, many=True).data
+        slow = [OfferListItemSerializer(o).data for o in offers]
+        self.assertEqual(list(fast), slow)
+        self.assertEqual(fast[0]['details'][0]['url'],
+                         f"/api/offerdetails/{fast[0]['details'][0]['id']}/")
+
+    def test_benchmark_command_reports_per_row_cost(self):
+        out = StringIO()
+        call_command('benchmark_offer_list', '--rows', '5', '--repeat', '1', stdout=out)
+        self.assertIn('µs/row', out.getvalue())
+
+
+class OfferConditionalRequestTests(APITestCase):
+    def setUp(self):
+        self.business = User.objects.create_user(
+            username='biz', password='pw', type='business')
+        self.client.force_authenticate(self.business)
+        self.offer_id = self.client.post('/api/offers/', offer_payload(), format='json').data['id']
+        self.url = f'/api/offers/{self.offer_id}/'
+
+    def test_get_with_matching_etag_returns_304(self):
+        res = self.client.get(self.url)
+        self.assertEqual(res.status_code, 200)
+        self.assertIn('Last-Modified', res)
+        etag = res['ETag']
+
+        res = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, 304)
+
+        detail_id = Offer.objects.get(pk=self.offer_id).details.first().pk
+        detail_etag = self.client.get(f'/api/offerdetails/{detail_id}/')['ETag']
+        res = self.client.get(f'/api/offerdetails/{detail_id}/', HTTP_IF_NONE_MATCH=detail_etag)
+        self.assertEqual(res.status_code, 304)
+
+        self.client.patch(self.url, {'title': 'Changed'}, format='json')
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        res = self.client.get(f'/api/offerdetails/{detail_id}/', HTTP_IF_NONE_MATCH=detail_etag)
+        self.assertEqual(res.status_code, 200)
+
+    def test_patch_with_stale_if_match_returns_412(self):
+        etag = self.client.get(self.url)['ETag']
+        res = self.client.patch(self.url, {'title': 'First'}, format='json', HTTP_IF_MATCH=etag)
+        self.assertEqual(res.status_code, 200)
+        self.assertNotEqual(res['ETag'], etag)
+
+        res = self.client.patch(self.url, {'title': 'Second'}, format='json', HTTP_IF_MATCH=etag)
+        self.assertEqual(res.status_code, 412)
+        self.assertEqual(Offer.objects.get(pk=self.offer_id).title, 'First')
+
+
+class OfferImportTests(APITestCase):
+    def setUp(self):
+        self.business = User.objects.create_user(
+            username='biz', password='pw', type='business')
+        self.client.force_authenticate(self.business)
+
+    def test_ndjson_import_reports_row_errors(self):
+        lines = [
+            json.dumps(offer_payload(title='Imported one')),
+            'not json',
+            json.dumps({'title': 'Missing details', 'details': []}),
+            json.dumps(offer_payload(title='Imported two', prices=(5, 6, 7))),
+        ]
+        res = self.client.generic(
+            'POST', '/api/offers/import/?batch_size=2', '\n'.join(lines),
+            content_type='application/x-ndjson')
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.data['created'], 2)
+        self.assertEqual([e['row'] for e in res.data['errors']], [2, 3])
+
+        offer = Offer.objects.get(title='Imported two')
+        self.assertEqual(offer.min_price, Decimal('5'))
+        self.assertEqual(offer.details.count(), 3)
+        res = self.client.get('/api/offers/?search=imported')
+        self.assertEqual(res.data['count'], 2)
+
+    def test_rows_without_details_are_reported_not_written(self):
+        lines = [
+            json.dumps(offer_payload(title='Imported one')),
+            json.dumps({'title': 'No details', 'description': 'x'}),
+        ]
+        res = self.client.generic(
+            'POST', '/api/offers/import/?batch_size=1', '\n'.join(lines),
+            content_type='application/x-ndjson')
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.data['created'], 1)
+        self.assertEqual(res.data['errors'], [{'row': 2, 'errors': {
+            'details': ['details must include exactly one of each: basic, standard, premium.']}}])
+        self.assertFalse(Offer.objects.filter(title='No details').exists())
+
+    def test_csv_import(self):
+        header = ['title', 'description'] + [
+            f'{tier}_{field}' for tier in ('basic', 'standard', 'premium')
+            for field in ('title', 'revisions', 'delivery_time_in_days', 'price', 'features')]
+        row = ['CSV offer', 'From a spreadsheet'] + [
+            value for price in (10, 20, 30)
+            for value in ('Tier', '1', '3', str(price), 'Logo|Source files')]
+        body = ','.join(header) + '\n' + ','.join(row) + '\n'
+        res = self.client.generic('POST', '/api/offers/import/', body, content_type='text/csv')
+        self.assertEqual(res.data, {'created': 1, 'failed': 0, 'errors': []})
+        detail = OfferDetail.objects.get(offer__title='CSV offer', offer_type='premium')
+        self.assertEqual(detail.features, ['Logo', 'Source files'])
+
+    def test_customers_cannot_import(self):
+        customer = User.objects.create_user(username='cust', password='pw', type='customer')
+        self.client.force_authenticate(customer)
+        res = self.client.generic('POST', '/api/offers/import/', '', content_type='application/x-ndjson')
+        self.assertEqual(res.status_code, 403)
+
+
+class OfferUpdateQueryBudgetTests(APITestCase):
+    def setUp(self):
+        self.business = User.objects.create_user(
+            username='biz', password='pw', type='business')
+        self.client.force_authenticate(self.business)
+        self.offer_id = self.client.post('/api/offers/', offer_payload(), format='json').data['id']
+        self.url = f'/api/offers/{self.offer_id}/'
+
+    def test_patch_with_all_details_has_a_fixed_query_budget(self):
+        payload = {'details': [
+            {'offer_type': t, 'price': p, 'delivery_time_in_days': 2}
+            for t, p in (('basic', 80), ('standard', 90), ('premium', 95))
+        ]}
+        # offer + user, details prefetch, savepoint, bulk_update, offer UPDATE, release
+        with self.assertNumQueries(6):
+            res = self.client.patch(self.url, payload, format='json')
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.data['min_price'], 80)
+        self.assertEqual(res.data['min_delivery_time'], 2)
+        self.assertEqual([d['price'] for d in res.data['details']], [80, 90, 95])
+        offer = Offer.objects.get(pk=self.offer_id)
+        self.assertEqual((offer.min_price, offer.min_delivery_time), (Decimal('80'), 2))
+
+    def test_put_title_change_has_a_fixed_query_budget(self):
+        # as above without bulk_update, plus delete/insert in the search index
+        with self.assertNumQueries(7):
+            res = self.client.put(self.url, {'title': 'New title'}, format='json')
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.data['title'], 'New title')
+
+    def test_unknown_offer_type_changes_nothing(self):
+        res = self.client.patch(self.url, {'details': [
+            {'offer_type': 'basic', 'price': 1}, {'title': 'no key'}]}, format='json')
+        self.assertEqual(res.status_code, 400)
+        self.assertEqual(Offer.objects.get(pk=self.offer_id).min_price, Decimal('100'))
+
+
+@override_settings(OFFERS_CACHE=CACHE_ON)
+class OfferFacetsTests(APITestCase):
+    def setUp(self):
+        self.business = User.objects.create_user(
+            username='biz', password='pw', type='business')
+        self.other = User.objects.create_user(
+            username='other', password='pw', type='business')
+        self.client.force_authenticate(self.business)
+        self.client.post('/api/offers/', offer_payload(prices=(10, 60, 120), days=(1, 3, 20)), format='json')
+        self.client.post('/api/offers/', offer_payload(prices=(40, 70, 80), days=(5, 5, 5)), format='json')
+        self.client.force_authenticate(self.other)
+        self.client.post('/api/offers/', offer_payload(prices=(500, 600, 700)), format='json')
+
+    def test_facets_in_one_grouped_query(self):
+        with self.assertNumQueries(1):
+            res = self.client.get(f'/api/offers/facets/?creator_id={self.business.pk}&price_bucket=50')
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.data['total_details'], 6)
+        basic = res.data['offer_types']['basic']
+        self.assertEqual(basic['count'], 2)
+        self.assertEqual(basic['price_histogram'], [{'from': 0, 'to': 50, 'count': 2}])
+        premium = res.data['offer_types']['premium']
+        self.assertEqual([b['from'] for b in premium['price_histogram']], [50, 100])
+        delivery = {b['bucket']: b['count'] for b in res.data['delivery_time']}
+        self.assertEqual(delivery, {'1': 1, '2-3': 1, '4-7': 3, '8-14': 0, '15+': 1})
+
+        self.assertEqual(self.client.get(
+            f'/api/offers/facets/?price_bucket=50&creator_id={self.business.pk}')['X-Cache'], 'HIT')
+
+    def test_facets_follow_search(self):
+        self.client.post('/api/offers/', offer_payload(title='Logo', prices=(5, 6, 7)), format='json')
+        Offer.objects.filter(title='Logo').update(description='Vector logos')
+        get_search_backend().rebuild()
+        res = self.client.get('/api/offers/facets/?search=website')
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.data['total_details'], 9)
+        res = self.client.get('/api/offers/facets/?search=logo')
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.data['total_details'], 3)
+
+    def test_invalid_bucket_returns_400(self):
+        res = self.client.get('/api/offers/facets/?price_bucket=0')
+        self.assertEqual(res.status_code, 400)
+
+    def test_non_finite_numbers_return_400(self):
+        for query in ('price_bucket=NaN', 'price_bucket=Infinity', 'min_price=-Infinity', 'min_price=nan'):
+            res = self.client.get(f'/api/offers/facets/?{query}')
+            self.assertEqual(res.status_code, 400, query)
+        res = self.client.get('/api/offers/?min_price=Infinity')
+        self.assertEqual(res.data['min_price'], 'Must be a number.')
+
+
+class OfferSparseFieldsetTests(APITestCase):
+    def setUp(self):
+        self.business = User.objects.create_user(
+            username='biz', password='pw', type='business')
+        self.client.force_authenticate(self.business)
+        self.offer_id = self.client.post('/api/offers/', offer_payload(), format='json').data['id']
+
+    def test_fields_prune_response_and_queries(self):
+        # count + page, no user join and no details prefetch
+        with self.assertNumQueries(2):
+            res = self.client.get('/api/offers/?fields=id,title,min_price')
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(set(res.data['results'][0]), {'id', 'title', 'min_price'})
+
+        res = self.client.get(f'/api/offers/{self.offer_id}/?fields=id,details')
+        self.assertEqual(set(res.data), {'id', 'details'})
+        self.assertEqual(set(res.data['details'][0]), {'id', 'url'})
+
+    def test_expand_inlines_details(self):
+        res = self.client.get('/api/offers/?fields=id,details&expand=details')
+        details = res.data['results'][0]['details']
+        self.assertEqual(len(details), 3)
+        self.assertEqual(details[0]['offer_type'], 'basic')
+        self.assertIn('features', details[0])
+
+        res = self.client.get(f'/api/offers/{self.offer_id}/?expand=details')
+        self.assertIn('price', res.data['details'][0])
+
+    def test_unknown_field_or_expansion_returns_400(self):
+        self.assertEqual(self.client.get('/api/offers/?fields=id,secret').status_code, 400)
+        self.assertEqual(self.client.get('/api/offers/?expand=user').status_code, 400)
@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.db import models
-from .models import Order
+from .models import ArchivedOrder, BusinessDailyStats, BusinessOrderCounter, Order
 
 
 @admin.register(Order)
@@ -24,7 +24,8 @@ class OrderAdmin(admin.ModelAdmin):
         'offer_detail__id',
     )
     date_hierarchy = 'created_at'
-    readonly_fields = ('created_at', 'updated_at')
+    # features are a content-addressed snapshot (FeatureSet), shown but not edited
+    readonly_fields = ('features', 'created_at', 'updated_at')
 
     # avoid huge dropdowns; show a lookup widget
     raw_id_fields = ('customer_user', 'business_user', 'offer_detail')
@@ -56,17 +57,66 @@ class OrderAdmin(admin.ModelAdmin):
     # quick actions for status changes
     actions = ['mark_in_progress', 'mark_completed', 'mark_cancelled']
 
+    def _mark(self, request, queryset, status):
+        result = queryset.set_status(status)
+        self.message_user(request, f'{len(result.changed)} order(s) set to {status}.')
+
     def mark_in_progress(self, request, queryset):
-        updated = queryset.update(status=Order.Status.IN_PROGRESS)
-        self.message_user(request, f'{updated} order(s) set to in_progress.')
+        self._mark(request, queryset, Order.Status.IN_PROGRESS)
     mark_in_progress.short_description = 'Mark as in_progress'
 
     def mark_completed(self, request, queryset):
-        updated = queryset.update(status=Order.Status.COMPLETED)
-        self.message_user(request, f'{updated} order(s) set to completed.')
+        self._mark(request, queryset, Order.Status.COMPLETED)
     mark_completed.short_description = 'Mark as completed'
 
     def mark_cancelled(self, request, queryset):
-        updated = queryset.update(status=Order.Status.CANCELLED)
-        self.message_user(request, f'{updated} order(s) set to cancelled.')
+        self._mark(request, queryset, Order.Status.CANCELLED)
     mark_cancelled.short_description = 'Mark as cancelled'
+
+
+@admin.register(BusinessOrderCounter)
+class BusinessOrderCounterAdmin(admin.ModelAdmin):
+    # maintained by orders_app.aggregates; repair with `manage.py reconcile_order_counters --fix`
+    list_display = ('business_user', 'status', 'count')
+    list_filter = ('status',)
+    raw_id_fields = ('business_user',)
+    readonly_fields = ('business_user', 'status', 'count')
+
+
+@admin.register(BusinessDailyStats)
+class BusinessDailyStatsAdmin(admin.ModelAdmin):
+    # maintained by orders_app.aggregates; rebuild with `manage.py rebuild_order_rollups`
+    list_display = ('business_user', 'day', 'offer_type', 'status', 'order_count', 'revenue')
+    list_filter = ('offer_type', 'status')
+    date_hierarchy = 'day'
+    raw_id_fields = ('business_user',)
+    readonly_fields = (
+        'business_user', 'day', 'offer_type', 'status',
+        'order_count', 'revenue', 'delivery_days_total',
+    )
+
+
+@admin.register(ArchivedOrder)
+class ArchivedOrderAdmin(admin.ModelAdmin):
+    # filled by `manage.py archive_orders`; read-only history
+    list_display = (
+        'id',
+        'title',
+        'offer_type',
+        'status',
+        'customer_user',
+        'business_user',
+        'price',
+        'updated_at',
+        'archived_at',
+    )
+    list_filter = ('status', 'offer_type')
+    search_fields = ('title', 'customer_user__username', 'business_user__username')
+    list_select_related = ('customer_user', 'business_user')
+    raw_id_fields = ('customer_user', 'business_user', 'offer_detail')
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,191 @@
+"""
+derived order aggregates that are maintained on write instead of computed on read.
+
+every code path that creates, deletes or changes the tracked fields of orders
+(Order.save, the post_delete signal, OrderQuerySet.set_status) reports the old and the new
+Order.State snapshots to record_order_changes(), inside the same transaction as the write.
+the same changes feed the pushed order events (orders_app.events).
+"""
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from decimal import Decimal
+from threading import local
+
+from django.contrib.auth import get_user_model
+from django.db.models import Count, OuterRef, Subquery, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from core.aggregates import apply_deltas
+
+from .events import notify_order_changes
+from .models import ArchivedOrder, BusinessDailyStats, BusinessOrderCounter, Order
+
+User = get_user_model()
+
+
+def count_deltas(removed=(), added=()):
+    """
+    {(business_user_id, status): {'count': delta}} for the given snapshots
+    """
+    deltas = Counter()
+    for state in removed:
+        deltas[(state.business_user_id, state.status)] -= 1
+    for state in added:
+        deltas[(state.business_user_id, state.status)] += 1
+    return {key: {'count': delta} for key, delta in deltas.items() if delta}
+
+
+def rollup_key(state):
+    return (state.business_user_id, timezone.localdate(state.created_at),
+            state.offer_type, state.status)
+
+
+def rollup_deltas(removed=(), added=()):
+    """
+    {(business_user_id, day, offer_type, status): {column: delta}} for BusinessDailyStats
+    """
+    deltas = defaultdict(lambda: {'order_count': 0, 'revenue': Decimal(0), 'delivery_days_total': 0})
+    for sign, states in ((-1, removed), (1, added)):
+        for state in states:
+            row = deltas[rollup_key(state)]
+            row['order_count'] += sign
+            row['revenue'] += sign * Decimal(state.price)
+            row['delivery_days_total'] += sign * state.delivery_time_in_days
+    return {key: row for key, row in deltas.items() if any(row.values())}
+
+
+_deferred = local()
+
+
+@contextmanager
+def deferred_order_changes(archiving=False):
+    """
+    collects the changes recorded inside the block and applies them once at the end,
+    for bulk jobs that would otherwise update the aggregates row by row.
+    with archiving=True deleted orders only leave the (hot) counters, the daily rollups
+    keep them since they cover the archive as well.
+    """
+    if getattr(_deferred, 'changes', None) is not None:
+        yield
+        return
+    _deferred.changes = ([], [])
+    try:
+        yield
+        removed, added = _deferred.changes
+    finally:
+        _deferred.changes = None
+    apply_deltas(BusinessOrderCounter, COUNTER_KEY, count_deltas(removed, added))
+    apply_deltas(BusinessDailyStats, ROLLUP_KEY,
+                 rollup_deltas([] if archiving else removed, added))
+    notify_order_changes(removed, added)
+
+
+COUNTER_KEY = ('business_user_id', 'status')
+ROLLUP_KEY = ('business_user_id', 'day', 'offer_type', 'status')
+
+
+def record_order_changes(removed=(), added=()):
+    """
+    entry point for all order writes; removed/added are Order.State snapshots
+    """
+    pending = getattr(_deferred, 'changes', None)
+    if pending is not None:
+        pending[0].extend(removed)
+        pending[1].extend(added)
+        return
+    apply_deltas(BusinessOrderCounter, COUNTER_KEY, count_deltas(removed, added))
+    apply_deltas(BusinessDailyStats, ROLLUP_KEY, rollup_deltas(removed, added))
+    notify_order_changes(removed, added)
+
+
+def order_counts(business_user_id, include_archived=False):
+    """
+    {status: count} for a business user in a single query, None if the id is not a business.
+    include_archived adds a grouped count over the (business_user, status) archive index.
+    """
+    counters = BusinessOrderCounter.objects.filter(business_user=OuterRef('pk'))
+    row = (User.objects
+           .filter(pk=business_user_id, type='business')
+           .values('pk')
+           .annotate(**{
+               status: Subquery(counters.filter(status=status).values('count')[:1])
+               for status in Order.Status.values
+           })
+           .first())
+    if row is None:
+        return None
+    counts = {status: row[status] or 0 for status in Order.Status.values}
+    if include_archived:
+        archived = (ArchivedOrder.objects.filter(business_user_id=business_user_id)
+                    .values('status').annotate(n=Count('pk')).order_by())
+        for r in archived:
+            counts[r['status']] += r['n']
+    return counts
+
+
+def computed_order_counts():
+    """
+    {(business_user_id, status): count} straight from the order table
+    """
+    rows = Order.objects.values('business_user_id', 'status').annotate(n=Count('pk')).order_by()
+    return {(r['business_user_id'], r['status']): r['n'] for r in rows}
+
+
+def computed_rollups(business_user_id=None):
+    """
+    BusinessDailyStats rows (unsaved) straight from the hot and the archived orders
+    """
+    stats = {}
+    for model in (Order, ArchivedOrder):
+        qs = model.objects.all()
+        if business_user_id is not None:
+            qs = qs.filter(business_user_id=business_user_id)
+        grouped = (qs.annotate(day=TruncDate('created_at'))
+                   .values(*ROLLUP_KEY)
+                   .annotate(n=Count('pk'), revenue=Sum('price'), days=Sum('delivery_time_in_days'))
+                   .order_by())
+        for r in grouped:
+            key = tuple(r[f] for f in ROLLUP_KEY)
+            if key not in stats:
+                stats[key] = BusinessDailyStats(**dict(zip(ROLLUP_KEY, key)))
+            row = stats[key]
+            row.order_count += r['n']
+            row.revenue += r['revenue']
+            row.delivery_days_total += r['days']
+    return list(stats.values())
+
+
+def daily_stats(business_user_id, start, end, offer_type=None, status=None):
+    """
+    per-day totals with an offer_type/status breakdown between start and end (inclusive),
+    read from the rollups only: one query over the (business_user, day, ..) unique index
+    """
+    rows = BusinessDailyStats.objects.filter(
+        business_user_id=business_user_id, day__range=(start, end))
+    if offer_type:
+        rows = rows.filter(offer_type=offer_type)
+    if status:
+        rows = rows.filter(status=status)
+
+    days, totals = {}, _stats_entry()
+    for row in rows.order_by('day', 'offer_type', 'status'):
+        if not row.order_count:
+            continue
+        day = days.setdefault(row.day, {'day': row.day, **_stats_entry(), 'breakdown': []})
+        part = {'offer_type': row.offer_type, 'status': row.status, **_stats_entry()}
+        for entry in (day, part, totals):
+            entry['orders'] += row.order_count
+            entry['revenue'] += row.revenue
+            entry['delivery_days_total'] += row.delivery_days_total
+        day['breakdown'].append(part)
+
+    for entry in (totals, *days.values(), *(p for d in days.values() for p in d['breakdown'])):
+        total_days = entry.pop('delivery_days_total')
+        entry['avg_delivery_time_in_days'] = (
+            round(total_days / entry['orders'], 2) if entry['orders'] else None)
+    return {'totals': totals, 'days': list(days.values())}
+
+
+def _stats_entry():
+    return {'orders': 0, 'revenue': Decimal(0), 'delivery_days_total': 0}
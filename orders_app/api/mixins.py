@@ -0,0 +1,72 @@
+import hashlib
+import json
+
+from django.db import IntegrityError, transaction
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from orders_app.models import IdempotencyKey
+
+
+class IdempotentCreateMixin:
+    """
+    honours an Idempotency-Key header on create requests: the first successful response
+    is stored with the key and replayed for retries with the same key and payload,
+    without running validation or writes again
+    """
+    idempotency_header = 'Idempotency-Key'
+    max_key_length = IdempotencyKey._meta.get_field('key').max_length
+
+    def request_hash(self, request):
+        payload = json.dumps(request.data, sort_keys=True, default=str)
+        return hashlib.sha256(f'{request.path}:{payload}'.encode()).hexdigest()
+
+    def replay(self, request, key, request_hash):
+        """stored response for the key, None if there is no live one"""
+        record = IdempotencyKey.objects.filter(user=request.user, key=key).first()
+        if record is None:
+            return None
+        if record.is_expired():
+            record.delete()
+            return None
+        if record.request_hash != request_hash:
+            return Response(
+                {'detail': 'Idempotency-Key wurde bereits für eine andere Anfrage verwendet.'},
+                status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            )
+        response = Response(record.response_body, status=record.response_status)
+        response['Idempotent-Replayed'] = 'true'
+        return response
+
+    def idempotent_response(self, request, build):
+        key = request.headers.get(self.idempotency_header)
+        if not key:
+            return build()
+        if len(key) > self.max_key_length:
+            raise ValidationError(
+                {self.idempotency_header: f'Must be at most {self.max_key_length} characters.'})
+
+        request_hash = self.request_hash(request)
+        response = self.replay(request, key, request_hash)
+        if response is not None:
+            return response
+
+        try:
+            # claiming the key first makes a concurrent duplicate wait on (or fail at) the
+            # unique constraint; failed requests roll the claim back so they can be retried
+            with transaction.atomic():
+                record = IdempotencyKey.objects.create(
+                    user=request.user, key=key, request_hash=request_hash)
+                response = build()
+                if not status.is_success(response.status_code):
+                    transaction.set_rollback(True)
+                    return response
+                record.response_status = response.status_code
+                record.response_body = response.data
+                record.save(update_fields=['response_status', 'response_body'])
+        except IntegrityError:
+            response = self.replay(request, key, request_hash)
+            if response is None:
+                raise
+        return response
@@ -0,0 +1,16 @@
+from core.pagination import UnionKeysetPagination
+
+
+class OrderKeysetPagination(UnionKeysetPagination):
+    """
+    opt-in: without the cursor param the order list stays an unpaginated array (kept for
+    backward compatibility with clients that read a plain list), ?cursor= (empty) returns
+    the first page; archived orders are only listed with the cursor
+    """
+    ordering_fields = ('updated_at',)
+    default_ordering = '-updated_at'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.cursor_query_param not in request.query_params:
+            return None
+        return super().paginate_queryset(queryset, request, view)
@@ -30,3 +30,17 @@ class IsOrderBusinessUser(BasePermission):
             getattr(user, 'type', None) == 'business' and
             obj.business_user_id == user.id
         )
+
+
+class IsBusinessUser(BasePermission):
+    """
+    Only business accounts.
+    """
+    message = 'Nur Geschäftsbenutzer dürfen den Status von Bestellungen ändern.'
+
+    def has_permission(self, request, view):
+        user = request.user
+        return (
+            bool(user and user.is_authenticated) and
+            getattr(user, 'type', None) == 'business'
+        )
@@ -1,13 +1,30 @@
+from django.db import models
+from django.db.models import prefetch_related_objects
 from rest_framework import serializers
 from ..models import Order
 from offers_app.models import OfferDetail
 
 
+class OrderListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        # one batched feature set lookup per page instead of one per order
+        orders = list(data.all() if isinstance(data, models.manager.BaseManager) else data)
+        per_model = {}
+        for order in orders:
+            if order.feature_set_id and not hasattr(order, '_features'):
+                per_model.setdefault(type(order), []).append(order)
+        for instances in per_model.values():
+            prefetch_related_objects(instances, 'feature_set')
+        return super().to_representation(orders)
+
+
 class OrderSerializer(serializers.ModelSerializer):
     id = serializers.IntegerField(source='offer_detail_id', read_only=True)
+    features = serializers.ListField(read_only=True)
 
     class Meta:
         model = Order
+        list_serializer_class = OrderListSerializer
         fields = [
             'id',
             'customer_user',
@@ -43,22 +60,71 @@ class OrderCreateSerializer(serializers.Serializer):
     def create(self, validated_data):
         request = self.context['request']
         detail = self.context['offer_detail']
-        offer = detail.offer
+        return Order.objects.create(**order_snapshot(detail, request.user))
+
+
+def order_snapshot(detail, customer):
+    """
+    field values of a new order for the given offer detail (detail.offer must be loaded)
+    """
+    offer = detail.offer
+    title = getattr(detail, 'title', None) or getattr(offer, 'title', '')
+    return dict(
+        offer_detail=detail,
+        customer_user=customer,
+        business_user=offer.business_user,
+        title=title,
+        revisions=getattr(detail, 'revisions', 0),
+        delivery_time_in_days=getattr(detail, 'delivery_time_in_days', 1),
+        price=getattr(detail, 'price', 0),
+        features=getattr(detail, 'features', []) or [],
+        offer_type=getattr(detail, 'offer_type', Order.OfferType.BASIC),
+        status=Order.Status.IN_PROGRESS,
+    )
+
+
+class OrderCheckoutSerializer(serializers.Serializer):
+    """
+    several orders in one request. all details are fetched with one in_bulk query and
+    every order is validated in memory, so the query count does not grow with the items.
+    nothing is created unless every item is valid.
+    """
+    offer_detail_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=50,
+    )
+
+    def validate(self, attrs):
+        customer = self.context['request'].user
+        ids = attrs['offer_detail_ids']
+        details = (OfferDetail.objects
+                   .select_related('offer', 'offer__business_user')
+                   .in_bulk(set(ids)))
 
-        title = getattr(detail, 'title', None) or getattr(offer, 'title', '')
+        seen, orders, results = set(), [], []
+        for detail_id in ids:
+            detail = details.get(detail_id)
+            if detail is None:
+                errors = ['OfferDetail mit dieser ID existiert nicht.']
+            elif detail_id in seen:
+                errors = ['Doppelte offer_detail_id.']
+            else:
+                order = Order(**order_snapshot(detail, customer))
+                errors = order.validation_errors()
+                orders.append(order)
+            seen.add(detail_id)
+            results.append({'offer_detail_id': detail_id, 'errors': errors})
 
-        return Order.objects.create(
-            offer_detail=detail,
-            customer_user=request.user,
-            business_user=offer.business_user,
-            title=title,
-            revisions=getattr(detail, 'revisions', 0),
-            delivery_time_in_days=getattr(detail, 'delivery_time_in_days', 1),
-            price=getattr(detail, 'price', 0),
-            features=getattr(detail, 'features', []) or [],
-            offer_type=getattr(detail, 'offer_type', Order.OfferType.BASIC),
-            status=Order.Status.IN_PROGRESS,
-        )
+        # kept raw so the view can answer with ints instead of stringified error details
+        self.item_results = results
+        if any(r['errors'] for r in results):
+            raise serializers.ValidationError('Mindestens ein Artikel ist ungültig.')
+        attrs['orders'] = orders
+        return attrs
+
+    def create(self, validated_data):
+        return Order.objects.bulk_create_orders(validated_data['orders'])
 
 
 class OrderStatusUpdateSerializer(serializers.ModelSerializer):
@@ -68,3 +134,21 @@ class OrderStatusUpdateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Order
         fields = ['status']
+
+    def update(self, instance, validated_data):
+        # a single UPDATE of status/updated_at, no re-validation of the parties
+        instance.status = validated_data.get('status', instance.status)
+        instance.save(update_fields=['status'])
+        return instance
+
+
+class OrderBulkStatusSerializer(serializers.Serializer):
+    """
+    ids are the order ids the API exposes (offer_detail_id)
+    """
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=500,
+    )
+    status = serializers.ChoiceField(choices=Order.Status.choices)
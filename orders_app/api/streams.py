@@ -0,0 +1,112 @@
+"""
+GET /api/orders/events/  server-sent events for the requesting user (customer or business)
+
+needs an ASGI server (core/asgi.py, e.g. `uvicorn core.asgi:application`): every open
+stream is a coroutine waiting on its queue instead of a blocked worker thread. under
+WSGI the endpoint answers 501 rather than holding a worker for the life of the stream.
+
+EventSource cannot send headers, so browsers first POST /api/orders/events/ticket/ with
+their token and open the stream with ?ticket=<ticket>: the ticket is signed for this
+endpoint only and expires after ORDER_EVENTS['TICKET_TTL'] seconds, so the long-lived
+token never ends up in a URL or an access log.
+"""
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views import View
+from rest_framework.authtoken.models import Token
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from orders_app.events import counts_for, get_broker, get_config
+
+TICKET_SALT = 'orders_app.events.ticket'
+
+
+def issue_ticket(user):
+    return signing.dumps(user.pk, salt=TICKET_SALT)
+
+
+def ticket_user_id(ticket):
+    """user id of a valid, unexpired ticket, else None"""
+    try:
+        return signing.loads(ticket, salt=TICKET_SALT, max_age=get_config()['TICKET_TTL'])
+    except signing.BadSignature:
+        return None
+
+
+def stream_user(request):
+    header = request.headers.get('Authorization', '')
+    if header.startswith('Token '):
+        token = Token.objects.select_related('user').filter(key=header[len('Token '):]).first()
+        user = token.user if token else None
+    else:
+        user_id = ticket_user_id(request.GET.get('ticket', ''))
+        user = get_user_model().objects.filter(pk=user_id).first() if user_id else None
+    return user if user and user.is_active else None
+
+
+def sse(event, data):
+    return f'event: {event}\ndata: {json.dumps(data, separators=(",", ":"))}\n\n'
+
+
+class OrderEventTicketView(APIView):
+    """
+    POST /api/orders/events/ticket/
+    -> {"ticket": "...", "expires_in": <seconds>} for opening the event stream
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        return Response({
+            'ticket': issue_ticket(request.user),
+            'expires_in': get_config()['TICKET_TTL'],
+        })
+
+
+class OrderEventStreamView(View):
+    """
+    pushes order_created / order_status_changed events (with the business's counts)
+    to the customer and the business of the order; business users get their current
+    counts right after connecting, so they no longer need to poll the count endpoints
+    """
+    http_method_names = ['get']
+
+    async def get(self, request, *args, **kwargs):
+        if not isinstance(request, ASGIRequest):
+            return JsonResponse(
+                {'detail': 'Ereignis-Streams sind nur über einen ASGI-Server verfügbar.'}, status=501)
+        user = await sync_to_async(stream_user)(request)
+        if user is None:
+            return JsonResponse(
+                {'detail': 'Anmeldedaten fehlen oder sind ungültig.'}, status=401)
+
+        initial = None
+        if getattr(user, 'type', None) == 'business':
+            initial = (await sync_to_async(counts_for)([user.pk]))[user.pk]
+
+        response = StreamingHttpResponse(
+            self.stream(user.pk, initial), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    async def stream(self, user_id, initial):
+        keepalive = get_config()['KEEPALIVE']
+        async with get_broker().subscribe(user_id) as queue:
+            yield 'retry: 5000\n\n'
+            if initial is not None:
+                yield sse('counts', {'counts': initial})
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=keepalive)
+                except asyncio.TimeoutError:
+                    yield ': keepalive\n\n'
+                    continue
+                yield sse(event['type'], event)
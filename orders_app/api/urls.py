@@ -1,5 +1,6 @@
 from django.urls import path
-from .views import OrdersListCreateView, OrderDetailView, OrderCountView, CompletedOrderCountView
+from .streams import OrderEventStreamView, OrderEventTicketView
+from .views import OrdersListCreateView, OrderCheckoutView, OrderBulkStatusView, OrderDetailView, OrderCountView, CompletedOrderCountView, OrderCountsView, OrderStatsView
 
 urlpatterns = [
     path(
@@ -7,6 +8,26 @@ urlpatterns = [
         OrdersListCreateView.as_view(),
         name='orders-list-create-view'
     ),
+    path(
+        'orders/checkout/',
+        OrderCheckoutView.as_view(),
+        name='orders-checkout'
+    ),
+    path(
+        'orders/events/',
+        OrderEventStreamView.as_view(),
+        name='orders-events'
+    ),
+    path(
+        'orders/events/ticket/',
+        OrderEventTicketView.as_view(),
+        name='orders-events-ticket'
+    ),
+    path(
+        'orders/status/',
+        OrderBulkStatusView.as_view(),
+        name='orders-bulk-status'
+    ),
     path(
         'orders/<int:pk>/',
         OrderDetailView.as_view(),
@@ -22,4 +43,14 @@ urlpatterns = [
         CompletedOrderCountView.as_view(),
         name='completed-order-count'
     ),
+    path(
+        'order-counts/<int:business_user_id>/',
+        OrderCountsView.as_view(),
+        name='order-counts'
+    ),
+    path(
+        'order-stats/<int:business_user_id>/',
+        OrderStatsView.as_view(),
+        name='order-stats'
+    ),
 ]
@@ -1,37 +1,100 @@
+from datetime import timedelta
+from functools import partial
+
 from rest_framework.generics import ListCreateAPIView, RetrieveUpdateDestroyAPIView
 from rest_framework.views import APIView
 from rest_framework.permissions import AllowAny, IsAuthenticated, IsAdminUser
-from .serializers import OrderSerializer, OrderCreateSerializer, OrderStatusUpdateSerializer
+from .serializers import (
+    OrderSerializer, OrderCreateSerializer, OrderStatusUpdateSerializer, OrderCheckoutSerializer,
+    OrderBulkStatusSerializer)
 from rest_framework.response import Response
 from django.http import Http404
+from django.utils import timezone
+from django.utils.dateparse import parse_date
 from rest_framework import permissions, status
-from orders_app.models import Order
-from .permissions import IsAuthenticatedAndCustomerForCreate, IsOrderBusinessUser
-from django.db.models import Q
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from orders_app.models import ArchivedOrder, Order
+from orders_app.aggregates import daily_stats, order_counts
+from .mixins import IdempotentCreateMixin
+from .pagination import OrderKeysetPagination
+from .permissions import IsAuthenticatedAndCustomerForCreate, IsOrderBusinessUser, IsBusinessUser
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
 
 
-class OrdersListCreateView(ListCreateAPIView):
+def include_archived(request):
+    """?include_archived=true|1 adds archived orders to order reads"""
+    return request.query_params.get('include_archived', '').lower() in ('1', 'true')
+
+
+class OrdersListCreateView(IdempotentCreateMixin, ListCreateAPIView):
     """
     GET  /api/orders/        lists orders where the requesting usere is customer OR business
+                             optional ?role=customer|business, ?status=<status>,
+                             ?include_archived=true (needs ?cursor=), ?cursor= switches to
+                             keyset pagination. without ?cursor= the hot orders are still
+                             returned as one unpaginated array on purpose: existing clients
+                             read that shape, so paging stays opt-in for backward compatibility
     POST /api/orders/        create order from offer_detail_id, only permitted for customer acc
+                             retries with the same Idempotency-Key header replay the first 201
     """
     permission_classes = [IsAuthenticatedAndCustomerForCreate]
+    pagination_class = OrderKeysetPagination
     queryset = Order.objects.all().order_by("-updated_at")
+    role_fields = {'customer': 'customer_user', 'business': 'business_user'}
 
-    def get_queryset(self):
+    def get_queryset_branches(self):
+        """
+        one queryset per (party, updated_at) index the user's orders can come from
+        """
         user = self.request.user
-        # Only orders involving the current user
-        return Order.objects.filter(
-            Q(customer_user=user) | Q(business_user=user)
-        ).order_by("-updated_at")
+        params = self.request.query_params
+
+        role = params.get('role')
+        if role and role not in self.role_fields:
+            raise ValidationError({'role': f"Must be one of: {', '.join(self.role_fields)}."})
+        status_filter = params.get('status')
+        if status_filter and status_filter not in Order.Status.values:
+            raise ValidationError({'status': f"Must be one of: {', '.join(Order.Status.values)}."})
+
+        fields = [self.role_fields[role]] if role else self.role_fields.values()
+        models = [Order, ArchivedOrder] if include_archived(self.request) else [Order]
+        branches = []
+        for model in models:
+            for field in fields:
+                qs = model.objects.filter(**{field: user})
+                if status_filter:
+                    qs = qs.filter(status=status_filter)
+                branches.append(qs)
+        return branches
+
+    def get_queryset(self):
+        # UNION of index scans instead of an OR filter that can't use either index
+        branches = [b for b in self.get_queryset_branches() if b.model is Order]
+        qs = branches[0].union(*branches[1:]) if len(branches) > 1 else branches[0]
+        return qs.order_by("-updated_at")
+
+    def list(self, request, *args, **kwargs):
+        if not include_archived(request):
+            return super().list(request, *args, **kwargs)
+        # hot and archived rows live in two tables; the pagination merges one bounded page
+        # of each, so the whole history is never loaded and sorted in python
+        cursor_param = self.paginator.cursor_query_param
+        if cursor_param not in request.query_params:
+            raise ValidationError({cursor_param: (
+                'Archived orders are listed page by page; '
+                'pass ?cursor= (empty for the first page).')})
+        page = self.paginate_queryset(self.get_queryset())
+        return self.get_paginated_response(self.get_serializer(page, many=True).data)
 
     def get_serializer_class(self):
         return OrderCreateSerializer if self.request.method == 'POST' else OrderSerializer
 
     def create(self, request, *args, **kwargs):
+        return self.idempotent_response(request, partial(self.create_order, request))
+
+    def create_order(self, request):
         ser_in = OrderCreateSerializer(
             data=request.data, context={"request": request})
         ser_in.is_valid(raise_exception=True)
@@ -41,12 +104,42 @@ class OrdersListCreateView(ListCreateAPIView):
         return Response(ser_out.data, status=status.HTTP_201_CREATED)
 
 
+class OrderCheckoutView(IdempotentCreateMixin, APIView):
+    """
+    POST /api/orders/checkout/   {"offer_detail_ids": [...]} creates one order per detail,
+                                 all or nothing; customers only, honours Idempotency-Key
+    -> 201 {"results": [{"offer_detail_id": .., "order": {...}}, ...]}
+    -> 400 {"results": [{"offer_detail_id": .., "errors": [...]}, ...]}
+    """
+    permission_classes = [IsAuthenticatedAndCustomerForCreate]
+
+    def post(self, request, *args, **kwargs):
+        return self.idempotent_response(request, partial(self.checkout, request))
+
+    def checkout(self, request):
+        ser_in = OrderCheckoutSerializer(data=request.data, context={"request": request})
+        if not ser_in.is_valid():
+            results = getattr(ser_in, 'item_results', None)
+            if results is None:
+                raise ValidationError(ser_in.errors)
+            return Response({'results': results}, status=status.HTTP_400_BAD_REQUEST)
+        orders = ser_in.save()
+
+        ser_out = OrderSerializer(orders, many=True, context={"request": request})
+        results = [
+            {'offer_detail_id': order.offer_detail_id, 'order': data}
+            for order, data in zip(orders, ser_out.data)
+        ]
+        return Response({'results': results}, status=status.HTTP_201_CREATED)
+
+
 class OrderDetailView(RetrieveUpdateDestroyAPIView):
     """
     PATCH /api/orders/{id}/ for business_users only. updates 'status' field
     DELETE /api/orders/{id}/ only allowed for staff/admin
     """
-    queryset = Order.objects.all()
+    # the PATCH response renders the features snapshot
+    queryset = Order.objects.select_related('feature_set')
     http_method_names = ['patch', 'delete']
     lookup_field = 'offer_detail_id'
     lookup_url_kwarg = 'pk' 
@@ -77,6 +170,48 @@ class OrderDetailView(RetrieveUpdateDestroyAPIView):
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
+class OrderBulkStatusView(APIView):
+    """
+    POST /api/orders/status/   {"ids": [...], "status": "completed"}
+    moves the requesting business's orders to the status in one UPDATE
+    -> {"status": .., "changed": [...], "unchanged": [...], "not_found": [...]}
+    ids that don't exist or belong to another business are reported as not_found;
+    an id that matches several orders (same offer detail ordered twice) is a 400
+    """
+    permission_classes = [IsBusinessUser]
+
+    def post(self, request, *args, **kwargs):
+        ser_in = OrderBulkStatusSerializer(data=request.data)
+        ser_in.is_valid(raise_exception=True)
+        ids = list(dict.fromkeys(ser_in.validated_data['ids']))
+        target = ser_in.validated_data['status']
+
+        try:
+            result = (Order.objects
+                      .filter(business_user=request.user, offer_detail_id__in=ids)
+                      .set_status(target, key='offer_detail_id'))
+        except Order.MultipleObjectsReturned as exc:
+            ambiguous = ', '.join(map(str, exc.args[0]))
+            raise ValidationError({'ids': f'Ambiguous id(s) {ambiguous}: each matches more than one order.'})
+        found = {*result.changed, *result.unchanged}
+        return Response({
+            'status': target,
+            'changed': sorted(set(result.changed)),
+            'unchanged': sorted(set(result.unchanged)),
+            'not_found': [i for i in ids if i not in found],
+        })
+
+
+def business_order_counts(request, business_user_id):
+    """
+    maintained counters of a business user; 404 if user doesn't exist OR is not a business
+    """
+    counts = order_counts(business_user_id, include_archived=include_archived(request))
+    if counts is None:
+        raise Http404('Kein Geschäftsbenutzer mit dieser ID gefunden.')
+    return counts
+
+
 class OrderCountView(APIView):
     """
     GET /api/order-count/<business_user_id>/
@@ -86,17 +221,8 @@ class OrderCountView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request, business_user_id):
-        # 404 if user doesn't exist OR is not a business
-        try:
-            user = User.objects.get(pk=business_user_id, type='business')
-        except User.DoesNotExist:
-            raise Http404('Kein Geschäftsbenutzer mit dieser ID gefunden.')
-
-        count = Order.objects.filter(
-            business_user_id=user.id,
-            status=Order.Status.IN_PROGRESS,
-        ).count()
-        return Response({'order_count': count})
+        counts = business_order_counts(request, business_user_id)
+        return Response({'order_count': counts[Order.Status.IN_PROGRESS]})
 
 
 class CompletedOrderCountView(APIView):
@@ -107,13 +233,64 @@ class CompletedOrderCountView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request, business_user_id):
-        try:
-            user = User.objects.get(pk=business_user_id, type='business')
-        except User.DoesNotExist:
+        counts = business_order_counts(request, business_user_id)
+        return Response({'completed_order_count': counts[Order.Status.COMPLETED]})
+
+
+class OrderCountsView(APIView):
+    """
+    GET /api/order-counts/<business_user_id>/
+    -> {"in_progress": <int>, "completed": <int>, "cancelled": <int>}
+    all status counts of a business user from the counter table, one query;
+    ?include_archived=true adds the archived orders (also on the two views above)
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, business_user_id):
+        return Response(business_order_counts(request, business_user_id))
+
+
+class OrderStatsView(APIView):
+    """
+    GET /api/order-stats/<business_user_id>/?from=YYYY-MM-DD&to=YYYY-MM-DD
+        optional ?offer_type=<type>&status=<status>; defaults to the last 30 days
+    daily orders, revenue and average delivery time of a business, read from the
+    BusinessDailyStats rollups only. visible to the business itself and to staff.
+    """
+    permission_classes = [IsAuthenticated]
+    default_days = 30
+
+    def get(self, request, business_user_id):
+        if request.user.pk != business_user_id and not request.user.is_staff:
+            raise PermissionDenied('Nur der Geschäftsbenutzer selbst darf seine Statistiken sehen.')
+        if not User.objects.filter(pk=business_user_id, type='business').exists():
             raise Http404('Kein Geschäftsbenutzer mit dieser ID gefunden.')
 
-        count = Order.objects.filter(
-            business_user_id=user.id,
-            status=Order.Status.COMPLETED,
-        ).count()
-        return Response({'completed_order_count': count})
+        params = request.query_params
+        end = self._parse_date(params.get('to'), 'to') or timezone.localdate()
+        start = self._parse_date(params.get('from'), 'from') or end - timedelta(days=self.default_days - 1)
+        if start > end:
+            raise ValidationError({'from': 'Must not be after "to".'})
+        offer_type = params.get('offer_type')
+        if offer_type and offer_type not in Order.OfferType.values:
+            raise ValidationError({'offer_type': f"Must be one of: {', '.join(Order.OfferType.values)}."})
+        status_filter = params.get('status')
+        if status_filter and status_filter not in Order.Status.values:
+            raise ValidationError({'status': f"Must be one of: {', '.join(Order.Status.values)}."})
+
+        stats = daily_stats(business_user_id, start, end, offer_type, status_filter)
+        return Response({'business_user': business_user_id, 'from': start, 'to': end, **stats})
+
+    def _parse_date(self, raw, field_name):
+        """
+        validates date query params
+        """
+        if not raw:
+            return None
+        try:
+            value = parse_date(raw)
+        except ValueError:
+            value = None
+        if value is None:
+            raise ValidationError({field_name: 'Must be a date (YYYY-MM-DD).'})
+        return value
@@ -0,0 +1,204 @@
+"""
+push notifications for order changes, consumed by the SSE stream (/api/orders/events/).
+
+order writes report their changes through orders_app.aggregates; after the transaction
+commits, order_created / order_status_changed events (with the business's fresh counts)
+are published to the customer and the business of each order.
+
+the broker is picked from settings.ORDER_EVENTS['BROKER']:
+- InProcessBroker: asyncio queues per connected user, for a single ASGI worker.
+  idle connections only wait on their queue and cost nothing.
+- DatabasePollingBroker: publishing writes OrderEvent rows and one poller per worker
+  process (only while it has subscribers) fans new rows out to its local connections,
+  for deployments with several workers.
+"""
+import asyncio
+import threading
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from functools import lru_cache
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import BusinessOrderCounter, Order, OrderEvent
+
+DEFAULTS = {
+    'BROKER': 'orders_app.events.InProcessBroker',
+    'KEEPALIVE': 15,
+    'POLL_INTERVAL': 1.0,
+    'QUEUE_SIZE': 100,
+    'RETENTION': 60 * 60,
+    'TICKET_TTL': 60,
+}
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'ORDER_EVENTS', {})}
+
+
+class InProcessBroker:
+    """
+    user id -> asyncio queues of the connections of that user in this process
+    """
+
+    def __init__(self):
+        self._subscribers = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def has_subscribers(self):
+        return bool(self._subscribers)
+
+    @asynccontextmanager
+    async def subscribe(self, user_id):
+        entry = (asyncio.get_running_loop(), asyncio.Queue(maxsize=get_config()['QUEUE_SIZE']))
+        with self._lock:
+            self._subscribers[user_id].add(entry)
+        try:
+            yield entry[1]
+        finally:
+            with self._lock:
+                self._subscribers[user_id].discard(entry)
+                if not self._subscribers[user_id]:
+                    del self._subscribers[user_id]
+
+    def publish(self, messages):
+        """messages: [(user_id, event)]; safe to call from any thread"""
+        self.deliver(messages)
+
+    def deliver(self, messages):
+        with self._lock:
+            targets = [(entry, event) for user_id, event in messages
+                       for entry in self._subscribers.get(user_id, ())]
+        for (loop, queue), event in targets:
+            loop.call_soon_threadsafe(_offer, queue, event)
+
+
+def _offer(queue, event):
+    # a client that stops reading loses events instead of growing the queue forever
+    if not queue.full():
+        queue.put_nowait(event)
+
+
+class DatabasePollingBroker(InProcessBroker):
+    """
+    fan-out across worker processes through the OrderEvent table
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._poller = None
+        self._last_id = None
+
+    def has_subscribers(self):
+        # other workers may have listeners
+        return True
+
+    def publish(self, messages):
+        OrderEvent.objects.bulk_create(
+            [OrderEvent(user_id=user_id, payload=event) for user_id, event in messages])
+
+    @asynccontextmanager
+    async def subscribe(self, user_id):
+        async with super().subscribe(user_id) as queue:
+            if self._poller is None or self._poller.done():
+                # start after the newest row: events written while nobody in this process
+                # listened are not replayed to whoever connects next
+                self._last_id = await sync_to_async(self.latest_id)()
+                self._poller = asyncio.create_task(self.poll())
+            yield queue
+
+    def latest_id(self):
+        return OrderEvent.objects.order_by('-pk').values_list('pk', flat=True).first() or 0
+
+    def fetch(self):
+        """
+        the next rows of all users, so the position moves past events nobody here listens to
+        """
+        return list(OrderEvent.objects
+                    .filter(pk__gt=self._last_id)
+                    .order_by('pk')
+                    .values_list('pk', 'user_id', 'payload')[:500])
+
+    async def poll(self):
+        """one query per interval for all connections of this process; stops when idle"""
+        interval = get_config()['POLL_INTERVAL']
+        while self._subscribers:
+            rows = await sync_to_async(self.fetch)()
+            if rows:
+                self._last_id = rows[-1][0]
+                self.deliver([(user_id, payload) for _, user_id, payload in rows
+                              if user_id in self._subscribers])
+            else:
+                await asyncio.sleep(interval)
+
+
+@lru_cache(maxsize=None)
+def _broker(path):
+    return import_string(path)()
+
+
+def get_broker():
+    return _broker(get_config()['BROKER'])
+
+
+def order_payload(state):
+    return {
+        'id': state.offer_detail_id,
+        'status': state.status,
+        'offer_type': state.offer_type,
+        'customer_user': state.customer_user_id,
+        'business_user': state.business_user_id,
+    }
+
+
+def order_events(removed=(), added=()):
+    """
+    (event type, state) for created orders and status changes; deletes are not pushed
+    """
+    before = {state.pk: state for state in removed}
+    events = []
+    for state in added:
+        old = before.get(state.pk)
+        if old is None:
+            events.append(('order_created', state))
+        elif old.status != state.status:
+            events.append(('order_status_changed', state))
+    return events
+
+
+def counts_for(business_user_ids):
+    counts = {pk: dict.fromkeys(Order.Status.values, 0) for pk in business_user_ids}
+    rows = BusinessOrderCounter.objects.filter(
+        business_user_id__in=business_user_ids).values_list('business_user_id', 'status', 'count')
+    for business_user_id, status, count in rows:
+        counts[business_user_id][status] = count
+    return counts
+
+
+def notify_order_changes(removed=(), added=()):
+    """
+    called inside the writing transaction; publishes once it commits
+    """
+    events = order_events(removed, added)
+    if not events or not get_broker().has_subscribers():
+        return
+
+    def publish():
+        counts = counts_for({state.business_user_id for _, state in events})
+        sent_at = timezone.now().isoformat()
+        messages = []
+        for kind, state in events:
+            event = {
+                'type': kind,
+                'order': order_payload(state),
+                'counts': counts[state.business_user_id],
+                'sent_at': sent_at,
+            }
+            messages += [(state.customer_user_id, event), (state.business_user_id, event)]
+        get_broker().publish(messages)
+
+    transaction.on_commit(publish)
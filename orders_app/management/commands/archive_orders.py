@@ -0,0 +1,58 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from orders_app.aggregates import deferred_order_changes
+from orders_app.models import ArchivedOrder, Order
+
+
+class Command(BaseCommand):
+    """
+    moves finished orders to ArchivedOrder in small transactions (copy + delete per batch),
+    so it can be stopped at any time and simply run again
+    """
+    help = 'Move completed/cancelled orders older than --older-than-days into the archive table.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than-days',
+            type=int,
+            default=settings.ORDER_ARCHIVE_AFTER_DAYS,
+            help='Archive finished orders whose updated_at is older than this.',
+        )
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report how many orders would be archived.',
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['older_than_days'])
+        candidates = Order.objects.filter(
+            status__in=[Order.Status.COMPLETED, Order.Status.CANCELLED],
+            updated_at__lt=cutoff,
+        ).order_by('pk')
+
+        if options['dry_run']:
+            self.stdout.write(f'{candidates.count()} order(s) would be archived.')
+            return
+
+        archived = 0
+        while True:
+            with transaction.atomic(), deferred_order_changes(archiving=True):
+                batch = list(candidates.select_for_update()[:options['batch_size']])
+                if not batch:
+                    break
+                # ignore_conflicts keeps a rerun safe if an archived copy already exists
+                ArchivedOrder.objects.bulk_create(
+                    [ArchivedOrder.from_order(order) for order in batch],
+                    ignore_conflicts=True,
+                )
+                Order.objects.filter(pk__in=[order.pk for order in batch]).delete()
+            archived += len(batch)
+            self.stdout.write(f'archived {archived} order(s) so far')
+        self.stdout.write(self.style.SUCCESS(f'Archived {archived} order(s).'))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from orders_app.models import IdempotencyKey
+
+
+class Command(BaseCommand):
+    """
+    sweeper for IdempotencyKey rows older than settings.ORDER_IDEMPOTENCY_KEY_TTL; meant for cron
+    """
+    help = 'Delete expired idempotency keys in batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        expired = IdempotencyKey.objects.expired()
+        deleted = 0
+        while True:
+            pks = list(expired.values_list('pk', flat=True)[:options['batch_size']])
+            if not pks:
+                break
+            deleted += IdempotencyKey.objects.filter(pk__in=pks).delete()[0]
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} expired key(s).'))
@@ -0,0 +1,28 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from orders_app.events import get_config
+from orders_app.models import OrderEvent
+
+
+class Command(BaseCommand):
+    """
+    sweeper for the OrderEvent outbox of the database polling broker; meant for cron
+    """
+    help = "Delete pushed order events older than ORDER_EVENTS['RETENTION'] seconds."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(seconds=get_config()['RETENTION'])
+        expired = OrderEvent.objects.filter(created_at__lt=cutoff)
+        deleted = 0
+        while True:
+            pks = list(expired.values_list('pk', flat=True)[:options['batch_size']])
+            if not pks:
+                break
+            deleted += OrderEvent.objects.filter(pk__in=pks).delete()[0]
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} order event(s).'))
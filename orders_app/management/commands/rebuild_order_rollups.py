@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from orders_app.aggregates import computed_rollups
+from orders_app.models import BusinessDailyStats
+
+
+class Command(BaseCommand):
+    """
+    recomputes BusinessDailyStats from the hot and archived orders
+    """
+    help = 'Rebuild the daily order rollups from scratch (optionally for one business user).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--business-user', type=int, help='Only rebuild this business user.')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        business_user_id = options['business_user']
+        with transaction.atomic():
+            existing = BusinessDailyStats.objects.all()
+            if business_user_id is not None:
+                existing = existing.filter(business_user_id=business_user_id)
+            # lock the rows the rebuild replaces so concurrent order writes queue behind it
+            list(existing.select_for_update().values_list('pk', flat=True))
+            existing.delete()
+            rows = BusinessDailyStats.objects.bulk_create(
+                computed_rollups(business_user_id), batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {len(rows)} rollup row(s).'))
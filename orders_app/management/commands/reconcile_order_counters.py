@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from orders_app.aggregates import computed_order_counts
+from orders_app.models import BusinessOrderCounter
+
+
+class Command(BaseCommand):
+    """
+    compares BusinessOrderCounter with a GROUP BY over the order table and optionally repairs it
+    """
+    help = 'Report (or with --fix repair) per-business order counters that drifted from the orders.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--fix',
+            action='store_true',
+            help='Overwrite drifted counters with the computed values.',
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            stored = {
+                (c.business_user_id, c.status): c
+                for c in BusinessOrderCounter.objects.select_for_update()
+            }
+            expected = computed_order_counts()
+
+            drifted = []
+            for key in stored.keys() | expected.keys():
+                have = stored[key].count if key in stored else 0
+                want = expected.get(key, 0)
+                if have != want:
+                    drifted.append((key, have, want))
+
+            for (business_user_id, status), have, want in sorted(drifted):
+                self.stdout.write(
+                    f'business #{business_user_id} {status}: stored {have}, actual {want}')
+
+            if not options['fix']:
+                self.stdout.write(f'{len(drifted)} counter(s) out of sync.')
+                return
+
+            to_update, to_create = [], []
+            for key, _, want in drifted:
+                if key in stored:
+                    stored[key].count = want
+                    to_update.append(stored[key])
+                else:
+                    to_create.append(BusinessOrderCounter(
+                        business_user_id=key[0], status=key[1], count=want))
+            BusinessOrderCounter.objects.bulk_update(to_update, ['count'])
+            BusinessOrderCounter.objects.bulk_create(to_create)
+        self.stdout.write(self.style.SUCCESS(f'Repaired {len(drifted)} counter(s).'))
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.6 on 2026-10-18 18:56
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_counters(apps, schema_editor):
+    Order = apps.get_model('orders_app', 'Order')
+    BusinessOrderCounter = apps.get_model('orders_app', 'BusinessOrderCounter')
+    rows = Order.objects.values('business_user_id', 'status').annotate(n=Count('pk')).order_by()
+    BusinessOrderCounter.objects.bulk_create([
+        BusinessOrderCounter(business_user_id=r['business_user_id'], status=r['status'], count=r['n'])
+        for r in rows
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders_app', '0003_alter_order_offer_detail'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BusinessOrderCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('in_progress', 'in_progress'), ('completed', 'completed'), ('cancelled', 'cancelled')], max_length=20)),
+                ('count', models.IntegerField(default=0)),
+                ('business_user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='order_counters', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('business_user', 'status'), name='unique_business_order_counter')],
+            },
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.6 on 2026-10-18 18:58
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('offers_app', '0004_offer_search_index'),
+        ('orders_app', '0004_business_order_counter'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['customer_user', 'updated_at'], name='orders_app__custome_739f75_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['business_user', 'updated_at'], name='orders_app__busines_4c419a_idx'),
+        ),
+    ]
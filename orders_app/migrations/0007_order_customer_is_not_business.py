@@ -0,0 +1,20 @@
+# Generated by Django 5.2.6 on 2026-10-18 19:05
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('offers_app', '0004_offer_search_index'),
+        ('orders_app', '0006_idempotency_key'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='order',
+            constraint=models.CheckConstraint(condition=models.Q(('customer_user', models.F('business_user')), _negated=True), name='order_customer_is_not_business'),
+        ),
+    ]
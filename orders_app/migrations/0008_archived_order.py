@@ -0,0 +1,40 @@
+# Generated by Django 5.2.6 on 2026-10-18 19:11
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('offers_app', '0004_offer_search_index'),
+        ('orders_app', '0007_order_customer_is_not_business'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedOrder',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('title', models.CharField(max_length=255)),
+                ('revisions', models.PositiveIntegerField(default=0)),
+                ('delivery_time_in_days', models.PositiveIntegerField(default=1)),
+                ('price', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('features', models.JSONField(blank=True, default=list)),
+                ('offer_type', models.CharField(choices=[('basic', 'basic'), ('standard', 'standard'), ('premium', 'premium')], max_length=20)),
+                ('status', models.CharField(choices=[('in_progress', 'in_progress'), ('completed', 'completed'), ('cancelled', 'cancelled')], max_length=20)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('business_user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_orders_as_business', to=settings.AUTH_USER_MODEL)),
+                ('customer_user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_orders_as_customer', to=settings.AUTH_USER_MODEL)),
+                ('offer_detail', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='archived_orders', to='offers_app.offerdetail')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['customer_user', 'updated_at'], name='orders_app__custome_4a9805_idx'), models.Index(fields=['business_user', 'updated_at'], name='orders_app__busines_1f55f5_idx'), models.Index(fields=['business_user', 'status'], name='orders_app__busines_293652_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.6 on 2026-10-18 19:15
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncDate
+
+KEY = ('business_user_id', 'day', 'offer_type', 'status')
+
+
+def backfill_rollups(apps, schema_editor):
+    BusinessDailyStats = apps.get_model('orders_app', 'BusinessDailyStats')
+    stats = {}
+    for name in ('Order', 'ArchivedOrder'):
+        grouped = (apps.get_model('orders_app', name).objects
+                   .annotate(day=TruncDate('created_at'))
+                   .values(*KEY)
+                   .annotate(n=Count('pk'), revenue=Sum('price'), days=Sum('delivery_time_in_days'))
+                   .order_by())
+        for r in grouped:
+            key = tuple(r[f] for f in KEY)
+            row = stats.setdefault(key, BusinessDailyStats(**dict(zip(KEY, key))))
+            row.order_count += r['n']
+            row.revenue += r['revenue']
+            row.delivery_days_total += r['days']
+    BusinessDailyStats.objects.bulk_create(stats.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders_app', '0008_archived_order'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BusinessDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('offer_type', models.CharField(choices=[('basic', 'basic'), ('standard', 'standard'), ('premium', 'premium')], max_length=20)),
+                ('status', models.CharField(choices=[('in_progress', 'in_progress'), ('completed', 'completed'), ('cancelled', 'cancelled')], max_length=20)),
+                ('order_count', models.IntegerField(default=0)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('delivery_days_total', models.IntegerField(default=0)),
+                ('business_user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_order_stats', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('business_user', 'day', 'offer_type', 'status'), name='unique_business_daily_stats')],
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.6 on 2026-10-18 19:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders_app', '0010_order_event'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeatureSet',
+            fields=[
+                ('hash', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('features', models.JSONField(default=list)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='archivedorder',
+            name='feature_set',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='archived_orders', to='orders_app.featureset'),
+        ),
+        migrations.AddField(
+            model_name='order',
+            name='feature_set',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='orders', to='orders_app.featureset'),
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.6 on 2026-10-18 19:25
+
+import hashlib
+import json
+
+from django.db import migrations
+
+MODELS = ('Order', 'ArchivedOrder')
+BATCH_SIZE = 1000
+
+
+def feature_hash(features):
+    canonical = json.dumps(features, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def dedupe_features(apps, schema_editor):
+    FeatureSet = apps.get_model('orders_app', 'FeatureSet')
+    for name in MODELS:
+        model = apps.get_model('orders_app', name)
+        last_pk = 0
+        while True:
+            rows = list(model.objects.filter(pk__gt=last_pk).order_by('pk')
+                        .values_list('pk', 'features')[:BATCH_SIZE])
+            if not rows:
+                break
+            last_pk = rows[-1][0]
+            by_hash = {}
+            for pk, features in rows:
+                features = features or []
+                by_hash.setdefault(feature_hash(features), (features, []))[1].append(pk)
+            FeatureSet.objects.bulk_create(
+                [FeatureSet(hash=h, features=features) for h, (features, _) in by_hash.items()],
+                ignore_conflicts=True,
+            )
+            for h, (_, pks) in by_hash.items():
+                model.objects.filter(pk__in=pks).update(feature_set_id=h)
+
+
+def inline_features(apps, schema_editor):
+    FeatureSet = apps.get_model('orders_app', 'FeatureSet')
+    for name in MODELS:
+        model = apps.get_model('orders_app', name)
+        for feature_set in FeatureSet.objects.iterator():
+            model.objects.filter(feature_set=feature_set).update(features=feature_set.features)
+
+
+# data only: on PostgreSQL the row updates must not share a transaction with the
+# ALTER TABLEs around them (0011 / 0013), or the schema change hits pending trigger events
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders_app', '0011_feature_set'),
+    ]
+
+    operations = [
+        migrations.RunPython(dedupe_features, inline_features),
+    ]
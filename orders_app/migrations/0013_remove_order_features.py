@@ -0,0 +1,21 @@
+# Generated by Django 5.2.6 on 2026-10-18 19:25
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders_app', '0012_backfill_feature_set'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='archivedorder',
+            name='features',
+        ),
+        migrations.RemoveField(
+            model_name='order',
+            name='features',
+        ),
+    ]
@@ -1,14 +1,133 @@
 # orders_app/models.py
+import hashlib
+import json
+from collections import namedtuple
+from datetime import timedelta
+
 from django.conf import settings
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import models, transaction
 from django.db.models import Q, F
 from django.utils import timezone
+from rest_framework.utils.encoders import JSONEncoder
 
 User = settings.AUTH_USER_MODEL
 
 
-class Order(models.Model):
+StatusChange = namedtuple('StatusChange', ('changed', 'unchanged'))
+
+
+class FeatureSet(models.Model):
+    """
+    content-addressed feature lists: every distinct list is stored once under the sha256
+    of its canonical JSON and referenced by the orders that snapshot it
+    """
+    hash = models.CharField(max_length=64, primary_key=True)
+    features = models.JSONField(default=list)
+
+    @staticmethod
+    def hash_for(features):
+        canonical = json.dumps(features, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+        return hashlib.sha256(canonical.encode()).hexdigest()
+
+    @classmethod
+    def intern(cls, feature_lists):
+        """
+        stores the given lists (one INSERT .. ON CONFLICT DO NOTHING) and returns their hashes
+        """
+        hashes = [cls.hash_for(features) for features in feature_lists]
+        rows = dict(zip(hashes, feature_lists))
+        if rows:
+            cls.objects.bulk_create(
+                [cls(hash=h, features=features) for h, features in rows.items()],
+                ignore_conflicts=True,
+            )
+        return hashes
+
+    def __str__(self):
+        return f"{self.hash[:12]} {self.features}"
+
+
+class FeatureSnapshotMixin:
+    """
+    inline `features` list on top of the feature_set reference; assigning a list marks it
+    for interning on save, reading a loaded order uses the (prefetched) feature set
+    """
+
+    @property
+    def features(self):
+        if hasattr(self, '_features'):
+            return self._features
+        return self.feature_set.features if self.feature_set_id else []
+
+    @features.setter
+    def features(self, value):
+        self._features = list(value or [])
+        self._features_dirty = True
+
+    def intern_features(self):
+        if getattr(self, '_features_dirty', False):
+            self.feature_set_id = FeatureSet.intern([self._features])[0]
+            self._features_dirty = False
+
+
+class OrderQuerySet(models.QuerySet):
+    def set_status(self, status, key='pk'):
+        """
+        moves every order of this queryset that is not yet in `status` to it with one
+        locking SELECT and a single UPDATE (bumping updated_at) and keeps the derived
+        aggregates in sync. returns the `key` values of the changed and unchanged rows;
+        raises MultipleObjectsReturned (nothing written) if a non-pk `key` value matches
+        more than one row.
+        """
+        from .aggregates import record_order_changes
+
+        with transaction.atomic():
+            rows = list(self.select_for_update().values('pk', key, *Order.TRACKED_FIELDS))
+            if key != 'pk':
+                seen, ambiguous = set(), set()
+                for row in rows:
+                    (ambiguous if row[key] in seen else seen).add(row[key])
+                if ambiguous:
+                    raise self.model.MultipleObjectsReturned(sorted(ambiguous))
+            before, changed, unchanged = [], [], []
+            for row in rows:
+                if row['status'] == status:
+                    unchanged.append(row[key])
+                    continue
+                changed.append(row[key])
+                before.append(Order.State(**{f: row[f] for f in Order.State._fields}))
+            if before:
+                self.filter(pk__in=[state.pk for state in before]).update(
+                    status=status, updated_at=timezone.now())
+                record_order_changes(
+                    removed=before,
+                    added=[state._replace(status=status) for state in before],
+                )
+        return StatusChange(changed, unchanged)
+
+    def bulk_create_orders(self, orders):
+        """
+        inserts already validated orders with one INSERT and records them in the aggregates
+        """
+        from .aggregates import record_order_changes
+
+        now = timezone.now()
+        for order in orders:
+            order.updated_at = now
+        with transaction.atomic():
+            pending = [order for order in orders if getattr(order, '_features_dirty', False)]
+            for order, h in zip(pending, FeatureSet.intern([o._features for o in pending])):
+                order.feature_set_id = h
+                order._features_dirty = False
+            created = self.bulk_create(orders)
+            record_order_changes(added=[order.current_state() for order in created])
+        for order in created:
+            order.remember_loaded()
+        return created
+
+
+class Order(FeatureSnapshotMixin, models.Model):
     class OfferType(models.TextChoices):
         BASIC = 'basic', 'basic'
         STANDARD = 'standard', 'standard'
@@ -37,7 +156,15 @@ class Order(models.Model):
     revisions = models.PositiveIntegerField(default=0)
     delivery_time_in_days = models.PositiveIntegerField(default=1)
     price = models.DecimalField(max_digits=10, decimal_places=2)
-    features = models.JSONField(default=list, blank=True)
+    # the features list lives in FeatureSet; read and assign it through `features`
+    feature_set = models.ForeignKey(
+        FeatureSet,
+        on_delete=models.PROTECT,
+        related_name='orders',
+        null=True,
+        blank=True,
+        editable=False,
+    )
 
     offer_type = models.CharField(
         max_length=20, choices=OfferType.choices, default=OfferType.BASIC
@@ -57,29 +184,311 @@ class Order(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(default=timezone.now)
 
+    objects = OrderQuerySet.as_manager()
+
+    # fields the derived aggregates (orders_app.aggregates) and the pushed events depend on
+    TRACKED_FIELDS = (
+        'business_user_id', 'status', 'offer_type', 'price', 'delivery_time_in_days', 'created_at',
+        'customer_user_id', 'offer_detail_id')
+    State = namedtuple('OrderState', ('pk',) + TRACKED_FIELDS)
+    RELATION_FIELDS = (
+        ('customer_user', 'customer_user_id'),
+        ('business_user', 'business_user_id'),
+        ('offer_detail', 'offer_detail_id'),
+    )
+
     class Meta:
         indexes = [
             models.Index(fields=['status']),
             models.Index(fields=['offer_type']),
             models.Index(fields=['created_at']),
             models.Index(fields=['offer_detail']),
+            models.Index(fields=['customer_user', 'updated_at']),
+            models.Index(fields=['business_user', 'updated_at']),
+        ]
+        constraints = [
+            models.CheckConstraint(
+                condition=~Q(customer_user=F('business_user')),
+                name='order_customer_is_not_business',
+            ),
         ]
 
     def clean(self):
         errors = {}
-        if getattr(self.customer_user, 'type', None) != 'customer':
+        # relations loaded unchanged from the database were checked when they were set,
+        # so only new or reassigned parties cost a user lookup
+        unchanged = self.unchanged_relations()
+        if 'customer_user' not in unchanged and getattr(self.customer_user, 'type', None) != 'customer':
             errors["customer_user"] = "Selected user is not of type 'customer'."
-        if getattr(self.business_user, "type", None) != 'business':
+        if 'business_user' not in unchanged and getattr(self.business_user, "type", None) != 'business':
             errors["business_user"] = "Selected user is not of type 'business'."
         if self.customer_user_id and self.customer_user_id == self.business_user_id:
             errors["customer_user"] = "Customer and business cannot be the same user."
         if errors:
             raise ValidationError(errors)
 
+    def validation_errors(self):
+        """
+        messages of clean_fields() and clean() without the per-FK existence queries of
+        full_clean(); for orders whose related objects are already loaded
+        """
+        try:
+            self.clean_fields(exclude=['customer_user', 'business_user', 'offer_detail', 'feature_set'])
+            self.clean()
+        except ValidationError as exc:
+            return exc.messages
+        return []
+
+    def unchanged_relations(self):
+        """
+        names of the foreign keys that still point where they pointed when loaded
+        """
+        loaded = getattr(self, '_loaded_relations', {})
+        return [
+            name for name, attname in self.RELATION_FIELDS
+            if attname in loaded and loaded[attname] == self.__dict__.get(attname)
+        ]
+
+    def remember_loaded(self):
+        self._loaded_state = self.current_state()
+        self._loaded_relations = {
+            attname: self.__dict__[attname]
+            for _, attname in self.RELATION_FIELDS if attname in self.__dict__
+        }
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.remember_loaded()
+        return instance
+
+    def current_state(self):
+        """
+        snapshot of the tracked fields, None if one of them is deferred
+        """
+        attrs = [self.__dict__.get(f, models.DEFERRED) for f in self.TRACKED_FIELDS]
+        if models.DEFERRED in attrs:
+            return None
+        return self.State(self.pk, *attrs)
+
+    def loaded_state(self):
+        """
+        tracked fields as they are stored in the database
+        """
+        state = getattr(self, '_loaded_state', None)
+        if state is None and self.pk is not None:
+            row = Order.objects.filter(pk=self.pk).values('pk', *self.TRACKED_FIELDS).first()
+            state = self.State(**row) if row else None
+        return state
+
     def save(self, *args, **kwargs):
-        self.full_clean()
+        from .aggregates import record_order_changes
+
+        # unchanged relations skip their FK existence query and the constraint checks on
+        # them; save(update_fields=...) only validates the fields it writes
+        # the feature set is interned by ourselves right below, no need to look it up
+        exclude = self.unchanged_relations() + ['feature_set']
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            update_fields = kwargs['update_fields'] = {*update_fields, 'updated_at'}
+            exclude += [
+                f.name for f in self._meta.concrete_fields
+                if f.name not in update_fields and f.attname not in update_fields
+            ]
+        self.full_clean(exclude=exclude)
         self.updated_at = timezone.now()
-        return super().save(*args, **kwargs)
+        adding = self._state.adding
+        with transaction.atomic(savepoint=False):
+            self.intern_features()
+            before = None if adding else self.loaded_state()
+            result = super().save(*args, **kwargs)
+            after = self.current_state()
+            if before != after:
+                record_order_changes(
+                    removed=[before] if before else [], added=[after])
+        self.remember_loaded()
+        return result
 
     def __str__(self):
         return f"Order #{self.pk} – {self.title}"
+
+
+class ArchivedOrder(FeatureSnapshotMixin, models.Model):
+    """
+    finished orders moved out of the hot Order table by `manage.py archive_orders`;
+    same columns and the same id as the original order, plus archived_at
+    """
+    id = models.BigIntegerField(primary_key=True)
+    customer_user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_orders_as_customer',
+    )
+    business_user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_orders_as_business',
+    )
+    title = models.CharField(max_length=255)
+    revisions = models.PositiveIntegerField(default=0)
+    delivery_time_in_days = models.PositiveIntegerField(default=1)
+    price = models.DecimalField(max_digits=10, decimal_places=2)
+    feature_set = models.ForeignKey(
+        FeatureSet,
+        on_delete=models.PROTECT,
+        related_name='archived_orders',
+        null=True,
+        blank=True,
+        editable=False,
+    )
+    offer_type = models.CharField(max_length=20, choices=Order.OfferType.choices)
+    offer_detail = models.ForeignKey(
+        'offers_app.OfferDetail',
+        on_delete=models.PROTECT,
+        related_name='archived_orders',
+    )
+    status = models.CharField(max_length=20, choices=Order.Status.choices)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(default=timezone.now)
+
+    # columns copied verbatim from Order
+    COPIED_FIELDS = (
+        'id', 'customer_user_id', 'business_user_id', 'title', 'revisions',
+        'delivery_time_in_days', 'price', 'feature_set_id', 'offer_type', 'offer_detail_id',
+        'status', 'created_at', 'updated_at',
+    )
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['customer_user', 'updated_at']),
+            models.Index(fields=['business_user', 'updated_at']),
+            models.Index(fields=['business_user', 'status']),
+        ]
+
+    @classmethod
+    def from_order(cls, order):
+        return cls(**{f: getattr(order, f) for f in cls.COPIED_FIELDS})
+
+    def __str__(self):
+        return f"Archived order #{self.pk} – {self.title}"
+
+
+class BusinessOrderCounter(models.Model):
+    """
+    number of (hot, not archived) orders per business user and status, maintained
+    transactionally by orders_app.aggregates on every order write;
+    reconcile_order_counters repairs drift
+    """
+    business_user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='order_counters',
+    )
+    status = models.CharField(max_length=20, choices=Order.Status.choices)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['business_user', 'status'],
+                name='unique_business_order_counter',
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.business_user_id} • {self.status}: {self.count}"
+
+
+def idempotency_cutoff():
+    """keys created before this moment are expired"""
+    return timezone.now() - timedelta(seconds=settings.ORDER_IDEMPOTENCY_KEY_TTL)
+
+
+class IdempotencyKeyQuerySet(models.QuerySet):
+    def expired(self):
+        return self.filter(created_at__lt=idempotency_cutoff())
+
+
+class IdempotencyKey(models.Model):
+    """
+    response of a create request, stored per user and client supplied Idempotency-Key so
+    retries are answered from here; the unique constraint settles concurrent duplicates
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='idempotency_keys',
+    )
+    key = models.CharField(max_length=255)
+    request_hash = models.CharField(max_length=64)
+    response_status = models.PositiveSmallIntegerField(null=True, blank=True)
+    # same encoder as the JSON renderer, so replays render byte-identical bodies
+    response_body = models.JSONField(null=True, blank=True, encoder=JSONEncoder)
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    objects = IdempotencyKeyQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'key'],
+                name='unique_user_idempotency_key',
+            )
+        ]
+
+    def is_expired(self):
+        return self.created_at < idempotency_cutoff()
+
+    def __str__(self):
+        return f"{self.user_id} • {self.key}"
+
+
+class BusinessDailyStats(models.Model):
+    """
+    orders, revenue and summed delivery days per business, day (of created_at),
+    offer_type and status. maintained incrementally by orders_app.aggregates, archived
+    orders included; `manage.py rebuild_order_rollups` recomputes it from scratch
+    """
+    business_user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='daily_order_stats',
+    )
+    day = models.DateField()
+    offer_type = models.CharField(max_length=20, choices=Order.OfferType.choices)
+    status = models.CharField(max_length=20, choices=Order.Status.choices)
+    order_count = models.IntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    delivery_days_total = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['business_user', 'day', 'offer_type', 'status'],
+                name='unique_business_daily_stats',
+            )
+        ]
+
+    def __str__(self):
+        return f"{self.business_user_id} • {self.day} {self.offer_type}/{self.status}: {self.order_count}"
+
+
+class OrderEvent(models.Model):
+    """
+    outbox of pushed order events for orders_app.events.DatabasePollingBroker, one row per
+    recipient; rows older than ORDER_EVENTS['RETENTION'] seconds are removed by
+    `manage.py purge_order_events`
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='order_events',
+    )
+    payload = models.JSONField()
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'id']),
+        ]
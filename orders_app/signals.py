@@ -0,0 +1,13 @@
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from .aggregates import record_order_changes
+from .models import Order
+
+
+@receiver(post_delete, sender=Order)
+def forget_deleted_order(sender, instance, **kwargs):
+    """single and cascading deletes take the order out of the aggregates"""
+    state = getattr(instance, '_loaded_state', None) or instance.current_state()
+    if state is not None:
+        record_order_changes(removed=[state])
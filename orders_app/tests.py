@@ -1,3 +1,570 @@
-from django.test import TestCase
+import asyncio
+from datetime import timedelta
+from io import StringIO
+from types import SimpleNamespace
+from unittest.mock import patch
 
-# Create your tests here.
+from asgiref.sync import async_to_sync, sync_to_async
+
+from django.contrib.admin.sites import site
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F
+from django.test import RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from offers_app.models import Offer, OfferDetail
+from orders_app.api.pagination import OrderKeysetPagination
+from orders_app.api.streams import OrderEventStreamView, ticket_user_id
+from orders_app.events import DatabasePollingBroker, InProcessBroker
+from orders_app.models import (
+    ArchivedOrder, BusinessDailyStats, BusinessOrderCounter, FeatureSet, IdempotencyKey, Order,
+)
+
+User = get_user_model()
+
+
+class OrderTestMixin:
+    def setUp(self):
+        self.business = User.objects.create_user(
+            username='biz', password='pw', type='business')
+        self.customer = User.objects.create_user(
+            username='cust', password='pw', type='customer')
+        self.admin = User.objects.create_superuser(
+            username='admin', password='pw', type='customer')
+        offer = Offer.objects.create(business_user=self.business, title='Website')
+        self.details = [
+            OfferDetail.objects.create(
+                offer=offer, title=f'{offer_type} package', revisions=1,
+                delivery_time_in_days=days, price=price, features=['Design'],
+                offer_type=offer_type,
+            )
+            for offer_type, price, days in (('basic', 100, 7), ('standard', 200, 5), ('premium', 300, 3))
+        ]
+
+    def place_order(self, detail=None):
+        self.client.force_authenticate(self.customer)
+        res = self.client.post(
+            '/api/orders/', {'offer_detail_id': (detail or self.details[0]).pk}, format='json')
+        self.assertEqual(res.status_code, 201)
+        return Order.objects.get(offer_detail=detail or self.details[0])
+
+    def counts(self):
+        self.client.force_authenticate(self.customer)
+        res = self.client.get(f'/api/order-counts/{self.business.pk}/')
+        self.assertEqual(res.status_code, 200)
+        return res.data
+
+
+class OrderCounterTests(OrderTestMixin, APITestCase):
+    def test_counters_follow_create_patch_and_delete(self):
+        self.place_order(self.details[0])
+        order = self.place_order(self.details[1])
+        self.assertEqual(self.counts(), {'in_progress': 2, 'completed': 0, 'cancelled': 0})
+
+        self.client.force_authenticate(self.business)
+        res = self.client.patch(
+            f'/api/orders/{order.offer_detail_id}/', {'status': 'completed'}, format='json')
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(self.counts(), {'in_progress': 1, 'completed': 1, 'cancelled': 0})
+
+        res = self.client.get(f'/api/completed-order-count/{self.business.pk}/')
+        self.assertEqual(res.data, {'completed_order_count': 1})
+        res = self.client.get(f'/api/order-count/{self.business.pk}/')
+        self.assertEqual(res.data, {'order_count': 1})
+
+        self.client.force_authenticate(self.admin)
+        res = self.client.delete(f'/api/orders/{order.offer_detail_id}/')
+        self.assertEqual(res.status_code, 204)
+        self.assertEqual(self.counts(), {'in_progress': 1, 'completed': 0, 'cancelled': 0})
+
+    def test_admin_bulk_action_updates_counters(self):
+        for detail in self.details:
+            self.place_order(detail)
+        request = RequestFactory().post('/')
+        request.user = self.admin
+        model_admin = site._registry[Order]
+        model_admin.message_user = lambda *args, **kwargs: None
+        model_admin.mark_cancelled(request, Order.objects.filter(offer_type__in=['basic', 'premium']))
+        self.assertEqual(self.counts(), {'in_progress': 1, 'completed': 0, 'cancelled': 2})
+
+    def test_counts_endpoint_is_one_query(self):
+        self.place_order()
+        self.client.force_authenticate(self.customer)
+        with self.assertNumQueries(1):
+            res = self.client.get(f'/api/order-counts/{self.business.pk}/')
+        self.assertEqual(res.data['in_progress'], 1)
+
+    def test_unknown_or_non_business_user_returns_404(self):
+        self.client.force_authenticate(self.customer)
+        self.assertEqual(self.client.get(f'/api/order-counts/{self.customer.pk}/').status_code, 404)
+        self.assertEqual(self.client.get('/api/order-count/9999/').status_code, 404)
+
+    def test_reconcile_reports_and_repairs_drift(self):
+        self.place_order()
+        BusinessOrderCounter.objects.filter(status='in_progress').update(count=5)
+
+        out = StringIO()
+        call_command('reconcile_order_counters', stdout=out)
+        self.assertIn('1 counter(s) out of sync', out.getvalue())
+        self.assertEqual(self.counts()['in_progress'], 5)
+
+        call_command('reconcile_order_counters', '--fix', stdout=StringIO())
+        self.assertEqual(self.counts()['in_progress'], 1)
+
+
+class OrderValidationQueryTests(OrderTestMixin, APITestCase):
+    def test_status_patch_issues_one_order_update(self):
+        order = self.place_order()
+        self.client.force_authenticate(self.business)
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.patch(
+                f'/api/orders/{order.offer_detail_id}/', {'status': 'completed'}, format='json')
+        self.assertEqual(res.status_code, 200)
+        order_writes = [q['sql'] for q in ctx.captured_queries
+                        if q['sql'].startswith('UPDATE "orders_app_order"')]
+        self.assertEqual(len(order_writes), 1)
+        self.assertNotIn('"title"', order_writes[0])
+        # besides it: get_object, two counter and two rollup queries, no validation reads
+        self.assertEqual(len(ctx.captured_queries), 6)
+
+    def test_reassigned_parties_are_still_validated(self):
+        order = self.place_order()
+        order.customer_user = self.business
+        with self.assertRaises(ValidationError) as ctx:
+            order.save()
+        self.assertIn('customer_user', ctx.exception.message_dict)
+
+    def test_self_order_is_rejected_by_the_database(self):
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Order.objects.bulk_create([Order(
+                customer_user=self.business, business_user=self.business,
+                offer_detail=self.details[0], title='self', price=1)])
+
+
+class OrderListPaginationTests(OrderTestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        # a user on both sides of different orders exercises the merge of both index scans
+        self.other = User.objects.create_user(username='other', password='pw', type='business')
+        now = timezone.now()
+        Order.objects.bulk_create([
+            Order(
+                customer_user=self.customer if i % 2 else self.business,
+                business_user=self.business if i % 2 else self.other,
+                offer_detail=self.details[i % 3], title=f'order {i}', price=100,
+                status='completed' if i % 3 == 0 else 'in_progress',
+                updated_at=now - timedelta(minutes=i),
+            )
+            for i in range(15)
+        ])
+
+    def walk(self, query=''):
+        self.client.force_authenticate(self.business)
+        url, titles = f'/api/orders/?cursor={query}', []
+        while url:
+            res = self.client.get(url)
+            self.assertEqual(res.status_code, 200)
+            self.assertNotIn('count', res.data)
+            titles += [order['title'] for order in res.data['results']]
+            url = res.data['next']
+        return titles
+
+    def test_cursor_walk_merges_both_roles_in_order(self):
+        self.assertEqual(self.walk(), [f'order {i}' for i in range(15)])
+
+    def test_role_and_status_filters(self):
+        self.assertEqual(self.walk('&role=customer'), [f'order {i}' for i in range(0, 15, 2)])
+        self.assertEqual(self.walk('&role=business&status=completed'), ['order 3', 'order 9'])
+
+    def test_merged_page_keeps_branch_joins_and_annotations(self):
+        request = Request(APIRequestFactory().get('/api/orders/', {'cursor': '', 'page_size': 4}))
+        branches = [
+            Order.objects.filter(**{field: self.business})
+            .select_related('offer_detail').annotate(double_price=F('price') * 2)
+            for field in ('customer_user', 'business_user')
+        ]
+        view = SimpleNamespace(get_queryset_branches=lambda: branches)
+        with self.assertNumQueries(1):
+            page = OrderKeysetPagination().paginate_queryset(branches[0], request, view)
+            loaded = [(order.offer_detail.title, order.double_price) for order in page]
+        self.assertEqual([order.title for order in page], [f'order {i}' for i in range(4)])
+        self.assertEqual(loaded[0], (self.details[0].title, 200))
+
+    def test_without_cursor_list_stays_unpaginated(self):
+        self.client.force_authenticate(self.business)
+        res = self.client.get('/api/orders/')
+        self.assertEqual(len(res.data), 15)
+        self.assertEqual(res.data[0]['title'], 'order 0')
+
+    def test_invalid_filters_return_400(self):
+        self.client.force_authenticate(self.business)
+        self.assertEqual(self.client.get('/api/orders/?role=admin').status_code, 400)
+        self.assertEqual(self.client.get('/api/orders/?status=done').status_code, 400)
+
+
+@override_settings(ORDER_IDEMPOTENCY_KEY_TTL=60)
+class OrderIdempotencyTests(OrderTestMixin, APITestCase):
+    def post(self, key, detail=None):
+        self.client.force_authenticate(self.customer)
+        return self.client.post(
+            '/api/orders/', {'offer_detail_id': (detail or self.details[0]).pk},
+            format='json', HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_retry_replays_first_response_without_new_order(self):
+        first = self.post('abc')
+        self.assertEqual(first.status_code, 201)
+        with self.assertNumQueries(1):
+            retry = self.post('abc')
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(retry.data, first.data)
+        self.assertEqual(Order.objects.count(), 1)
+        self.assertEqual(self.counts()['in_progress'], 1)
+
+    def test_same_key_with_other_payload_is_rejected(self):
+        self.post('abc')
+        self.assertEqual(self.post('abc', self.details[1]).status_code, 422)
+
+    def test_failed_request_does_not_keep_the_key(self):
+        self.client.force_authenticate(self.customer)
+        res = self.client.post('/api/orders/', {'offer_detail_id': 9999},
+                               format='json', HTTP_IDEMPOTENCY_KEY='abc')
+        self.assertEqual(res.status_code, 400)
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+    def test_expired_keys_are_not_replayed_and_get_purged(self):
+        self.post('abc')
+        IdempotencyKey.objects.update(created_at=timezone.now() - timedelta(minutes=5))
+        self.assertNotIn('Idempotent-Replayed', self.post('abc', self.details[1]))
+
+        IdempotencyKey.objects.update(created_at=timezone.now() - timedelta(minutes=5))
+        call_command('purge_idempotency_keys', stdout=StringIO())
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+
+class OrderCheckoutTests(OrderTestMixin, APITestCase):
+    def checkout(self, ids, **extra):
+        self.client.force_authenticate(self.customer)
+        return self.client.post(
+            '/api/orders/checkout/', {'offer_detail_ids': ids}, format='json', **extra)
+
+    def test_creates_all_orders_and_counts_them(self):
+        ids = [d.pk for d in self.details]
+        res = self.checkout(ids)
+        self.assertEqual(res.status_code, 201)
+        self.assertEqual([r['offer_detail_id'] for r in res.data['results']], ids)
+        self.assertEqual(res.data['results'][2]['order']['offer_type'], 'premium')
+        self.assertEqual(Order.objects.count(), 3)
+        self.assertEqual(self.counts()['in_progress'], 3)
+
+    def test_query_count_does_not_grow_with_items(self):
+        other = Offer.objects.create(business_user=self.business, title='Logo')
+        more = [
+            OfferDetail.objects.create(offer=other, title=t, price=10, offer_type=t)
+            for t in ('basic', 'standard', 'premium')
+        ]
+        self.client.force_authenticate(self.customer)
+        with self.assertNumQueries(9) as one:
+            self.checkout([self.details[0].pk])
+        with self.assertNumQueries(len(one.captured_queries)):
+            self.checkout([d.pk for d in self.details[1:] + more])
+
+    def test_invalid_item_rolls_back_everything(self):
+        res = self.checkout([self.details[0].pk, 9999, self.details[0].pk])
+        self.assertEqual(res.status_code, 400)
+        self.assertEqual(res.data['results'][0]['errors'], [])
+        self.assertEqual(res.data['results'][1]['offer_detail_id'], 9999)
+        self.assertEqual(len(res.data['results'][1]['errors']), 1)
+        self.assertEqual(len(res.data['results'][2]['errors']), 1)
+        self.assertFalse(Order.objects.exists())
+
+    def test_business_users_cannot_checkout(self):
+        self.client.force_authenticate(self.business)
+        res = self.client.post(
+            '/api/orders/checkout/', {'offer_detail_ids': [self.details[0].pk]}, format='json')
+        self.assertEqual(res.status_code, 403)
+
+
+class OrderBulkStatusTests(OrderTestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.orders = [self.place_order(detail) for detail in self.details]
+        self.other = User.objects.create_user(username='other', password='pw', type='business')
+        other_offer = Offer.objects.create(business_user=self.other, title='Logo')
+        self.foreign = self.place_order(
+            OfferDetail.objects.create(offer=other_offer, title='x', price=10, offer_type='basic'))
+
+    def bulk(self, ids, target='completed', user=None):
+        self.client.force_authenticate(user or self.business)
+        return self.client.post('/api/orders/status/', {'ids': ids, 'status': target}, format='json')
+
+    def test_changes_only_own_orders_and_reports_them(self):
+        self.orders[0].status = 'completed'
+        self.orders[0].save(update_fields=['status'])
+        ids = [o.offer_detail_id for o in self.orders] + [self.foreign.offer_detail_id, 9999]
+        # ownership SELECT, one UPDATE, two counter and two rollup queries
+        # (+ savepoint pair under TestCase)
+        with self.assertNumQueries(8):
+            res = self.bulk(ids)
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.data['changed'], sorted(o.offer_detail_id for o in self.orders[1:]))
+        self.assertEqual(res.data['unchanged'], [self.orders[0].offer_detail_id])
+        self.assertEqual(res.data['not_found'], [self.foreign.offer_detail_id, 9999])
+        self.assertEqual(Order.objects.get(pk=self.foreign.pk).status, 'in_progress')
+        self.assertEqual(self.counts(), {'in_progress': 0, 'completed': 3, 'cancelled': 0})
+
+    def test_updated_at_is_bumped(self):
+        before = self.orders[1].updated_at
+        self.bulk([self.orders[1].offer_detail_id], 'cancelled')
+        self.orders[1].refresh_from_db()
+        self.assertGreater(self.orders[1].updated_at, before)
+
+    def test_id_matching_several_orders_is_rejected(self):
+        self.client.force_authenticate(self.customer)
+        res = self.client.post('/api/orders/', {'offer_detail_id': self.details[0].pk}, format='json')
+        self.assertEqual(res.status_code, 201)
+        res = self.bulk([self.details[0].pk, self.details[1].pk])
+        self.assertEqual(res.status_code, 400)
+        self.assertEqual(
+            res.data['ids'], f'Ambiguous id(s) {self.details[0].pk}: each matches more than one order.')
+        self.assertEqual(
+            set(Order.objects.values_list('status', flat=True)), {'in_progress'})
+        self.assertEqual(self.counts()['completed'], 0)
+
+    def test_customers_and_bad_payloads_are_rejected(self):
+        self.assertEqual(self.bulk([1], user=self.customer).status_code, 403)
+        self.assertEqual(self.bulk([1], target='done').status_code, 400)
+        self.assertEqual(self.bulk([]).status_code, 400)
+
+
+class OrderArchiveTests(OrderTestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.orders = [self.place_order(detail) for detail in self.details]
+        Order.objects.filter(pk__in=[o.pk for o in self.orders[:2]]).set_status('completed')
+        Order.objects.filter(pk=self.orders[0].pk).update(
+            updated_at=timezone.now() - timedelta(days=400))
+
+    def archive(self, *args):
+        call_command('archive_orders', '--older-than-days=30', '--batch-size=1', *args, stdout=StringIO())
+
+    def test_moves_only_old_finished_orders_and_keeps_counters(self):
+        self.archive()
+        self.assertEqual(list(ArchivedOrder.objects.values_list('pk', flat=True)), [self.orders[0].pk])
+        self.assertFalse(Order.objects.filter(pk=self.orders[0].pk).exists())
+        self.assertEqual(self.counts(), {'in_progress': 1, 'completed': 1, 'cancelled': 0})
+
+        res = self.client.get(f'/api/order-counts/{self.business.pk}/?include_archived=true')
+        self.assertEqual(res.data, {'in_progress': 1, 'completed': 2, 'cancelled': 0})
+
+        self.archive()
+        self.assertEqual(ArchivedOrder.objects.count(), 1)
+
+    def test_dry_run_writes_nothing(self):
+        self.archive('--dry-run')
+        self.assertFalse(ArchivedOrder.objects.exists())
+
+    def test_order_list_includes_archive_only_when_asked(self):
+        self.archive()
+        self.client.force_authenticate(self.customer)
+        self.assertEqual(len(self.client.get('/api/orders/').data), 2)
+
+        res = self.client.get('/api/orders/?include_archived=true')
+        self.assertEqual(res.status_code, 400)
+        self.assertIn('cursor', res.data)
+
+        res = self.client.get('/api/orders/?include_archived=true&cursor=&page_size=2')
+        titles = [o['title'] for o in res.data['results']]
+        res = self.client.get(res.data['next'])
+        titles += [o['title'] for o in res.data['results']]
+        self.assertEqual(titles, ['standard package', 'premium package', 'basic package'])
+
+
+class OrderRollupTests(OrderTestMixin, APITestCase):
+    def stats(self, query=''):
+        self.client.force_authenticate(self.business)
+        res = self.client.get(f'/api/order-stats/{self.business.pk}/{query}')
+        self.assertEqual(res.status_code, 200)
+        return res.data
+
+    def test_rollups_follow_order_writes(self):
+        for detail in self.details:
+            self.place_order(detail)
+        order = Order.objects.get(offer_type='premium')
+        order.status = 'completed'
+        order.save(update_fields=['status'])
+
+        data = self.stats()
+        self.assertEqual(data['totals']['orders'], 3)
+        self.assertEqual(data['totals']['revenue'], 600)
+        self.assertEqual(data['totals']['avg_delivery_time_in_days'], 5)
+        self.assertEqual(len(data['days']), 1)
+
+        completed = self.stats('?status=completed')['totals']
+        self.assertEqual((completed['orders'], completed['revenue']), (1, 300))
+
+        order.delete()
+        self.assertEqual(self.stats()['totals']['orders'], 2)
+
+    def test_rebuild_matches_incremental_rows_and_archive_is_kept(self):
+        for detail in self.details:
+            self.place_order(detail)
+        Order.objects.filter(offer_type='basic').set_status('cancelled')
+        Order.objects.filter(offer_type='basic').update(updated_at=timezone.now() - timedelta(days=400))
+        call_command('archive_orders', '--older-than-days=30', stdout=StringIO())
+
+        fields = ('business_user_id', 'day', 'offer_type', 'status', 'order_count', 'revenue',
+                  'delivery_days_total')
+        incremental = set(BusinessDailyStats.objects.filter(order_count__gt=0).values_list(*fields))
+        call_command('rebuild_order_rollups', stdout=StringIO())
+        self.assertEqual(set(BusinessDailyStats.objects.values_list(*fields)), incremental)
+        self.assertEqual(self.stats()['totals']['orders'], 3)
+
+    def test_range_validation_and_access(self):
+        self.assertEqual(self.stats('?from=2000-01-01&to=2000-01-31')['days'], [])
+        self.client.force_authenticate(self.business)
+        url = f'/api/order-stats/{self.business.pk}/'
+        self.assertEqual(self.client.get(url + '?from=2020-02-01&to=2020-01-01').status_code, 400)
+        self.assertEqual(self.client.get(url + '?from=yesterday').status_code, 400)
+        self.client.force_authenticate(self.customer)
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+
+class OrderEventTests(OrderTestMixin, APITestCase):
+    def complete(self, order):
+        with self.captureOnCommitCallbacks(execute=True):
+            order.status = 'completed'
+            order.save(update_fields=['status'])
+
+    def test_status_change_is_pushed_to_customer_and_business(self):
+        order = self.place_order()
+        broker = InProcessBroker()
+        received = []
+
+        async def listen():
+            async with broker.subscribe(self.customer.pk) as customer, \
+                    broker.subscribe(self.business.pk) as business:
+                await sync_to_async(self.complete)(order)
+                for queue in (customer, business):
+                    received.append(await asyncio.wait_for(queue.get(), timeout=1))
+
+        with patch('orders_app.events.get_broker', return_value=broker):
+            async_to_sync(listen)()
+        self.assertEqual([e['type'] for e in received], ['order_status_changed'] * 2)
+        self.assertEqual(received[0]['order']['id'], order.offer_detail_id)
+        self.assertEqual(received[0]['counts'], {'in_progress': 0, 'completed': 1, 'cancelled': 0})
+
+    @override_settings(ORDER_EVENTS={'POLL_INTERVAL': 0.01})
+    def test_polling_broker_does_not_replay_events_to_late_subscribers(self):
+        broker = DatabasePollingBroker()
+        publish = sync_to_async(broker.publish)
+
+        async def listen():
+            async with broker.subscribe(self.customer.pk):
+                # written while only the customer listens in this process
+                await publish([(self.business.pk, {'n': 1})])
+                await asyncio.sleep(0.1)
+                async with broker.subscribe(self.business.pk) as business:
+                    await publish([(self.business.pk, {'n': 2})])
+                    first = await asyncio.wait_for(business.get(), timeout=1)
+            await broker._poller
+            # written while the poller is stopped
+            await publish([(self.business.pk, {'n': 3})])
+            async with broker.subscribe(self.business.pk) as business:
+                await publish([(self.business.pk, {'n': 4})])
+                second = await asyncio.wait_for(business.get(), timeout=1)
+            return first, second
+
+        self.assertEqual(async_to_sync(listen)(), ({'n': 2}, {'n': 4}))
+
+    def test_nothing_is_published_without_listeners(self):
+        order = self.place_order()
+        broker = InProcessBroker()
+        with patch('orders_app.events.get_broker', return_value=broker), \
+                self.captureOnCommitCallbacks() as callbacks:
+            order.status = 'completed'
+            order.save(update_fields=['status'])
+        self.assertEqual(callbacks, [])
+
+    async def test_stream_requires_a_ticket_and_starts_with_counts(self):
+        response = await self.async_client.get('/api/orders/events/')
+        self.assertEqual(response.status_code, 401)
+        token = await sync_to_async(Token.objects.create)(user=self.business)
+        response = await self.async_client.get(f'/api/orders/events/?token={token.key}')
+        self.assertEqual(response.status_code, 401)
+
+        response = await self.async_client.post(
+            '/api/orders/events/ticket/', headers={'Authorization': f'Token {token.key}'})
+        self.assertEqual(response.status_code, 200)
+        ticket = response.json()['ticket']
+        self.assertNotIn(token.key, ticket)
+        streams = []
+        view_stream = OrderEventStreamView.stream
+
+        def tracked_stream(view, *args):
+            streams.append(view_stream(view, *args))
+            return streams[-1]
+
+        with patch.object(OrderEventStreamView, 'stream', tracked_stream):
+            response = await self.async_client.get(f'/api/orders/events/?ticket={ticket}')
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        chunks = aiter(response.streaming_content)
+        try:
+            self.assertEqual(await anext(chunks), b'retry: 5000\n\n')
+            self.assertTrue((await anext(chunks)).startswith(b'event: counts\n'))
+        finally:
+            # the wrappers Django puts around the body don't close the view's generator
+            # (and its broker subscription), so close it here while the loop still runs
+            await streams[0].aclose()
+            await chunks.aclose()
+
+    def test_expired_or_foreign_tickets_are_rejected(self):
+        self.client.force_authenticate(self.business)
+        ticket = self.client.post('/api/orders/events/ticket/').data['ticket']
+        self.assertEqual(ticket_user_id(ticket), self.business.pk)
+        with override_settings(ORDER_EVENTS={'TICKET_TTL': -1}):
+            self.assertIsNone(ticket_user_id(ticket))
+        self.assertIsNone(ticket_user_id(signing.dumps(self.business.pk)))
+
+    def test_stream_is_not_served_under_wsgi(self):
+        self.client.force_authenticate(self.business)
+        ticket = self.client.post('/api/orders/events/ticket/').data['ticket']
+        response = self.client.get(f'/api/orders/events/?ticket={ticket}')
+        self.assertEqual(response.status_code, 501)
+
+
+class OrderFeatureSetTests(OrderTestMixin, APITestCase):
+    def test_identical_features_are_stored_once(self):
+        for detail in self.details:
+            self.place_order(detail)
+        self.assertEqual(FeatureSet.objects.count(), 1)
+        self.assertEqual(Order.objects.values('feature_set').distinct().count(), 1)
+        self.assertEqual(FeatureSet.objects.get().features, ['Design'])
+
+    def test_hash_ignores_key_order(self):
+        self.assertEqual(FeatureSet.hash_for([{'a': 1, 'b': 2}]), FeatureSet.hash_for([{'b': 2, 'a': 1}]))
+        self.assertNotEqual(FeatureSet.hash_for(['a', 'b']), FeatureSet.hash_for(['b', 'a']))
+
+    def test_list_renders_features_with_one_lookup(self):
+        for detail in self.details:
+            self.place_order(detail)
+        self.client.force_authenticate(self.customer)
+        # orders, then all their feature sets at once
+        with self.assertNumQueries(2):
+            res = self.client.get('/api/orders/')
+        self.assertEqual([o['features'] for o in res.data], [['Design']] * 3)
+
+    def test_archived_orders_keep_their_features(self):
+        order = self.place_order()
+        Order.objects.filter(pk=order.pk).set_status('completed')
+        Order.objects.filter(pk=order.pk).update(updated_at=timezone.now() - timedelta(days=365))
+        call_command('archive_orders', stdout=StringIO())
+        self.assertEqual(ArchivedOrder.objects.get().features, ['Design'])
@@ -2,6 +2,8 @@ from rest_framework import serializers
 from rest_framework.authtoken.serializers import AuthTokenSerializer
 from auth_app.models import User
 from rest_framework.generics import ListAPIView
+from reviews_app.aggregates import rating_summary_for
+from reviews_app.api.serializers import RatingSummarySerializer
 
 
 class CustomerProfileSerializer(serializers.ModelSerializer):
@@ -35,6 +37,7 @@ class CustomerProfileSerializer(serializers.ModelSerializer):
 
 class BusinessProfileSerializer(serializers.ModelSerializer):
     user = serializers.IntegerField(source='id', read_only=True)
+    rating = serializers.SerializerMethodField()
 
     class Meta:
         model = User
@@ -49,11 +52,18 @@ class BusinessProfileSerializer(serializers.ModelSerializer):
             'description',
             'working_hours',
             'type',
+            'rating',
         ]
         extra_kwargs = {
             'user': {'read_only': True},
         }
 
+    def get_rating(self, obj):
+        # maintained summary, select_related by the profile views
+        summary = RatingSummarySerializer(rating_summary_for(obj)).data
+        summary.pop('business_user')
+        return summary
+
     def get_fields(self):
         fields = super().get_fields()
         view = self.context.get('view')
@@ -18,14 +18,14 @@ class BusinessProfilesListView(ListAPIView):
     serializer_class = BusinessProfileSerializer
 
     def get_queryset(self):
-        qs = User.objects.filter(type='business')
+        qs = User.objects.filter(type='business').select_related('rating_summary')
         return qs.distinct()
 
 
 class ProfileDetailView(mixins.RetrieveModelMixin,
                         mixins.UpdateModelMixin,
                         viewsets.GenericViewSet):
-    queryset = User.objects.all()
+    queryset = User.objects.select_related('rating_summary')
     permission_classes = [IsProfileOwnerOrReadOnly]
     http_method_names = ['get', 'patch', 'head', 'options']
 
@@ -1,6 +1,6 @@
 # reviewer_app/admin.py
 from django.contrib import admin
-from .models import Review
+from .models import BusinessRatingSummary, Review
 
 
 @admin.register(Review)
@@ -30,3 +30,14 @@ class ReviewAdmin(admin.ModelAdmin):
         ('Bewertung', {'fields': ('rating', 'description')}),
         ('Zeitstempel', {'fields': ('created_at', 'updated_at')}),
     )
+
+
+@admin.register(BusinessRatingSummary)
+class BusinessRatingSummaryAdmin(admin.ModelAdmin):
+    # maintained by reviews_app.aggregates; rebuild with `manage.py rebuild_rating_summaries`
+    list_display = ('business_user', 'review_count', 'average_rating', 'last_reviewed_at')
+    raw_id_fields = ('business_user',)
+    readonly_fields = (
+        'business_user', 'review_count', 'rating_sum', *BusinessRatingSummary.HISTOGRAM_FIELDS,
+        'last_reviewed_at',
+    )
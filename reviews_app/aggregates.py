@@ -0,0 +1,78 @@
+"""
+per-business rating summaries, maintained on write instead of aggregated on read.
+
+Review.save and the post_delete signal report the old and the new Review.State snapshots
+to record_review_changes() inside the same transaction as the write; the same changes
+feed the platform-wide review numbers (core.stats).
+"""
+from collections import defaultdict
+
+from django.db.models import Count, Max, OuterRef, Q, Subquery, Sum
+
+from core.aggregates import apply_deltas
+from core.stats import record_platform_changes
+
+from .models import RATINGS, BusinessRatingSummary, Review
+
+
+def rating_deltas(removed=(), added=()):
+    """
+    {(business_user_id,): {column: delta}} for BusinessRatingSummary
+    """
+    deltas = defaultdict(lambda: defaultdict(int))
+    for sign, states in ((-1, removed), (1, added)):
+        for state in states:
+            row = deltas[(state.business_user_id,)]
+            row["review_count"] += sign
+            row["rating_sum"] += sign * state.rating
+            row[f"rating_{state.rating}"] += sign
+    return {key: dict(row) for key, row in deltas.items() if any(row.values())}
+
+
+def newest_review():
+    return Subquery(
+        Review.objects.filter(business_user_id=OuterRef("business_user_id"))
+        .order_by("-created_at").values("created_at")[:1]
+    )
+
+
+def record_review_changes(removed=(), added=()):
+    """
+    entry point for all review writes; removed/added are Review.State snapshots
+    """
+    apply_deltas(
+        BusinessRatingSummary, ("business_user_id",), rating_deltas(removed, added),
+        last_reviewed_at=newest_review(),
+    )
+    record_platform_changes(
+        review_count=len(added) - len(removed),
+        rating_sum=sum(s.rating for s in added) - sum(s.rating for s in removed),
+    )
+
+
+def rating_summary_for(business_user):
+    """
+    the summary of a (select_related) business user, an empty one if it has no reviews yet
+    """
+    try:
+        return business_user.rating_summary
+    except BusinessRatingSummary.DoesNotExist:
+        return BusinessRatingSummary(business_user=business_user)
+
+
+def computed_rating_summaries(business_user_id=None):
+    """
+    BusinessRatingSummary rows (unsaved) straight from the review table
+    """
+    reviews = Review.objects.all()
+    if business_user_id is not None:
+        reviews = reviews.filter(business_user_id=business_user_id)
+    rows = (reviews.values("business_user_id")
+            .annotate(
+                review_count=Count("pk"),
+                rating_sum=Sum("rating"),
+                last_reviewed_at=Max("created_at"),
+                **{f"rating_{n}": Count("pk", filter=Q(rating=n)) for n in RATINGS},
+            )
+            .order_by())
+    return [BusinessRatingSummary(**row) for row in rows]
@@ -0,0 +1,15 @@
+from core.pagination import KeysetPagination
+
+
+class ReviewKeysetPagination(KeysetPagination):
+    """
+    opt-in: without the cursor param the review list stays an unpaginated array,
+    ?cursor= (empty) returns the first page. seeks on (updated_at|rating, id).
+    """
+    ordering_fields = ('updated_at', 'rating')
+    default_ordering = '-updated_at'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.cursor_query_param not in request.query_params:
+            return None
+        return super().paginate_queryset(queryset, request, view)
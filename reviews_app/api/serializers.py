@@ -1,6 +1,8 @@
 from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
 from rest_framework import serializers
-from ..models import Review
+from rest_framework.settings import api_settings
+from ..models import BusinessRatingSummary, Review
 
 User = get_user_model()
 
@@ -17,7 +19,7 @@ class ReviewSerializer(serializers.ModelSerializer):
 
 
 class ReviewCreateSerializer(serializers.ModelSerializer):
-    """POST serializer (validation only)."""
+    """POST serializer; the duplicate check is left to the unique constraint."""
     class Meta:
         model = Review
         fields = ["business_user", "rating", "description"]
@@ -35,17 +37,21 @@ class ReviewCreateSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Du kannst dich nicht selbst bewerten.")
         return business_user
 
-    def validate(self, attrs):
-        request = self.context.get("request")
-        if not request:
-            return attrs
-        if Review.objects.filter(
-            reviewer=request.user, business_user=attrs["business_user"]
-        ).exists():
-            raise serializers.ValidationError(
-                "Du hast bereits eine Bewertung für diesen Geschäftsbenutzer abgegeben."
-            )
-        return attrs
+    def create(self, validated_data):
+        # no exists() pre-check: unique_reviewer_business_review rejects the duplicate,
+        # which also covers two concurrent submits
+        try:
+            with transaction.atomic():
+                return super().create(validated_data)
+        except IntegrityError:
+            if not Review.objects.filter(
+                reviewer=validated_data["reviewer"],
+                business_user=validated_data["business_user"],
+            ).exists():
+                raise
+        raise serializers.ValidationError({api_settings.NON_FIELD_ERRORS_KEY: [
+            "Du hast bereits eine Bewertung für diesen Geschäftsbenutzer abgegeben."
+        ]})
 
 
 class ReviewUpdateSerializer(serializers.ModelSerializer):
@@ -58,3 +64,27 @@ class ReviewUpdateSerializer(serializers.ModelSerializer):
         if value < 1 or value > 5:
             raise serializers.ValidationError("rating muss zwischen 1 und 5 liegen.")
         return value
+
+
+class RatingSummarySerializer(serializers.ModelSerializer):
+    """maintained rating aggregate of a business user (read only)."""
+    business_user = serializers.IntegerField(source="business_user_id", read_only=True)
+    average_rating = serializers.FloatField(read_only=True)
+    rating_distribution = serializers.DictField(child=serializers.IntegerField(), read_only=True)
+
+    class Meta:
+        model = BusinessRatingSummary
+        fields = [
+            "business_user", "review_count", "average_rating",
+            "rating_distribution", "last_reviewed_at",
+        ]
+        read_only_fields = fields
+
+
+class RatingSummaryBatchSerializer(serializers.Serializer):
+    """query params of the batched summary endpoint."""
+    business_user_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=50,
+    )
@@ -1,5 +1,5 @@
 from django.urls import path
-from .views import ReviewListCreateView, ReviewDetailView
+from .views import ReviewListCreateView, ReviewDetailView, RatingSummaryView, RatingSummaryBatchView
 
 app_name = "reviews"
 
@@ -14,4 +14,14 @@ urlpatterns = [
         ReviewDetailView.as_view(),
         name="review-detail"
     ),
+    path(
+        "rating-summary/<int:business_user_id>/",
+        RatingSummaryView.as_view(),
+        name="rating-summary"
+    ),
+    path(
+        "rating-summaries/",
+        RatingSummaryBatchView.as_view(),
+        name="rating-summary-batch"
+    ),
 ]
@@ -1,19 +1,32 @@
+from django.contrib.auth import get_user_model
+from django.http import Http404
 from rest_framework import status
+from rest_framework.exceptions import ValidationError
 from rest_framework.generics import ListCreateAPIView, RetrieveUpdateDestroyAPIView
+from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.views import APIView
+from ..aggregates import rating_summary_for
 from ..models import Review
+from .pagination import ReviewKeysetPagination
 from .permissions import IsAuthenticatedReadOnly, IsCustomer, IsReviewOwner
-from .serializers import ReviewSerializer, ReviewCreateSerializer,   ReviewUpdateSerializer
+from .serializers import (
+    ReviewSerializer, ReviewCreateSerializer, ReviewUpdateSerializer,
+    RatingSummarySerializer, RatingSummaryBatchSerializer,
+)
+
+User = get_user_model()
 
 
 class ReviewListCreateView(ListCreateAPIView):
     """
     /api/reviews/
-    GET
+    GET   ?business_user_id, ?reviewer_id, ?ordering; ?cursor= switches to keyset pagination
     POST
     """
     queryset = Review.objects.select_related("business_user", "reviewer")
     permission_classes = [IsAuthenticatedReadOnly, IsCustomer]
+    pagination_class = ReviewKeysetPagination
 
     def get_serializer_class(self):
         return ReviewCreateSerializer if self.request.method == "POST" else ReviewSerializer
@@ -25,9 +38,9 @@ class ReviewListCreateView(ListCreateAPIView):
         ordering = self.request.query_params.get("ordering")
 
         if bu_id:
-            qs = qs.filter(business_user_id=bu_id)
+            qs = qs.filter(business_user_id=self._parse_id(bu_id, "business_user_id"))
         if rev_id:
-            qs = qs.filter(reviewer_id=rev_id)
+            qs = qs.filter(reviewer_id=self._parse_id(rev_id, "reviewer_id"))
 
         allowed = {"updated_at", "rating", "-updated_at", "-rating"}
         if ordering in allowed:
@@ -35,6 +48,18 @@ class ReviewListCreateView(ListCreateAPIView):
 
         return qs
 
+    def _parse_id(self, raw, field_name):
+        """
+        validates id query params
+        """
+        try:
+            value = int(raw)
+        except (TypeError, ValueError):
+            raise ValidationError({field_name: "Must be an integer."})
+        if value < 1:
+            raise ValidationError({field_name: "Must be >= 1."})
+        return value
+
     def create(self, request, *args, **kwargs):
         ser_in = ReviewCreateSerializer(
             data=request.data, context={"request": request})
@@ -70,3 +95,43 @@ class ReviewDetailView(RetrieveUpdateDestroyAPIView):
         # respond with the full review object
         ser_out = ReviewSerializer(instance)
         return Response(ser_out.data, status=status.HTTP_200_OK)
+
+
+class RatingSummaryView(APIView):
+    """
+    GET /api/rating-summary/<business_user_id>/
+    review count, average rating and 1-5 distribution from the maintained summary (one query)
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, business_user_id):
+        business_user = (User.objects
+                         .filter(pk=business_user_id, type="business")
+                         .select_related("rating_summary")
+                         .first())
+        if business_user is None:
+            raise Http404("Kein Geschäftsbenutzer mit dieser ID gefunden.")
+        return Response(RatingSummarySerializer(rating_summary_for(business_user)).data)
+
+
+class RatingSummaryBatchView(APIView):
+    """
+    GET /api/rating-summaries/?business_user_ids=1,2,3 (at most 50 ids)
+    summaries of several business users in one query, in the requested order;
+    ids that are not business users are left out
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        raw = request.query_params.get("business_user_ids", "")
+        params = RatingSummaryBatchSerializer(
+            data={"business_user_ids": [part.strip() for part in raw.split(",") if part.strip()]})
+        params.is_valid(raise_exception=True)
+        ids = list(dict.fromkeys(params.validated_data["business_user_ids"]))
+
+        business_users = (User.objects
+                          .filter(pk__in=ids, type="business")
+                          .select_related("rating_summary")
+                          .in_bulk())
+        summaries = [rating_summary_for(business_users[pk]) for pk in ids if pk in business_users]
+        return Response({"results": RatingSummarySerializer(summaries, many=True).data})
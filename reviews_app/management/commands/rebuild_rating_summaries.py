@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from reviews_app.aggregates import computed_rating_summaries
+from reviews_app.models import BusinessRatingSummary
+
+
+class Command(BaseCommand):
+    """
+    recomputes BusinessRatingSummary from the reviews
+    """
+    help = 'Rebuild the per-business rating summaries from scratch (optionally for one business user).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--business-user', type=int, help='Only rebuild this business user.')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        business_user_id = options['business_user']
+        with transaction.atomic():
+            existing = BusinessRatingSummary.objects.all()
+            if business_user_id is not None:
+                existing = existing.filter(business_user_id=business_user_id)
+            # lock the rows the rebuild replaces so concurrent review writes queue behind it
+            list(existing.select_for_update().values_list('pk', flat=True))
+            existing.delete()
+            rows = BusinessRatingSummary.objects.bulk_create(
+                computed_rating_summaries(business_user_id), batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {len(rows)} rating summary row(s).'))
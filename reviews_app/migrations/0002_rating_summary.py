@@ -0,0 +1,55 @@
+# Generated by Django 5.2.6 on 2026-10-18 19:34
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max, Q, Sum
+
+
+def backfill_summaries(apps, schema_editor):
+    Review = apps.get_model('reviews_app', 'Review')
+    BusinessRatingSummary = apps.get_model('reviews_app', 'BusinessRatingSummary')
+    rows = (Review.objects.values('business_user_id')
+            .annotate(
+                review_count=Count('pk'),
+                rating_sum=Sum('rating'),
+                last_reviewed_at=Max('created_at'),
+                **{f'rating_{n}': Count('pk', filter=Q(rating=n)) for n in range(1, 6)},
+            )
+            .order_by())
+    BusinessRatingSummary.objects.bulk_create([BusinessRatingSummary(**row) for row in rows])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth_app', '0003_user_uploaded_at_alter_user_file_alter_user_tel_and_more'),
+        ('reviews_app', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BusinessRatingSummary',
+            fields=[
+                ('business_user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='rating_summary', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('review_count', models.IntegerField(default=0)),
+                ('rating_sum', models.IntegerField(default=0)),
+                ('rating_1', models.IntegerField(default=0)),
+                ('rating_2', models.IntegerField(default=0)),
+                ('rating_3', models.IntegerField(default=0)),
+                ('rating_4', models.IntegerField(default=0)),
+                ('rating_5', models.IntegerField(default=0)),
+                ('last_reviewed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='review',
+            index=models.Index(fields=['business_user', '-created_at'], name='review_business_created_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='review',
+            constraint=models.CheckConstraint(condition=models.Q(('rating__gte', 1), ('rating__lte', 5)), name='review_rating_between_1_and_5'),
+        ),
+        migrations.RunPython(backfill_summaries, migrations.RunPython.noop),
+    ]
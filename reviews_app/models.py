@@ -1,8 +1,13 @@
-from django.db import models
+from collections import namedtuple
+
+from django.db import models, transaction
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
 
+RATINGS = range(1, 6)
+
+
 class Review(models.Model):
     business_user = models.ForeignKey(
         User, on_delete=models.CASCADE, related_name="received_reviews"
@@ -17,14 +22,107 @@ class Review(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # fields the rating summaries are derived from (see reviews_app.aggregates)
+    TRACKED_FIELDS = ("business_user_id", "rating")
+    State = namedtuple("ReviewState", ("pk",) + TRACKED_FIELDS)
+
     class Meta:
         constraints = [
             models.UniqueConstraint(
                 fields=["business_user", "reviewer"],
                 name="unique_reviewer_business_review",
-            )
+            ),
+            models.CheckConstraint(
+                condition=models.Q(rating__gte=1, rating__lte=5),
+                name="review_rating_between_1_and_5",
+            ),
+        ]
+        indexes = [
+            # newest review per business for BusinessRatingSummary.last_reviewed_at
+            models.Index(fields=["business_user", "-created_at"], name="review_business_created_idx"),
+            # keyset pages of the review list (ReviewKeysetPagination seeks on (field, id))
+            models.Index(fields=["business_user", "-updated_at"], name="review_business_updated_idx"),
+            models.Index(fields=["business_user", "-rating", "-id"], name="review_business_rating_idx"),
+            models.Index(fields=["reviewer", "-updated_at"], name="review_reviewer_updated_idx"),
         ]
         ordering = ["-updated_at"]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_state = instance.current_state()
+        return instance
+
+    def current_state(self):
+        """
+        snapshot of the tracked fields, None if one of them is deferred
+        """
+        attrs = [self.__dict__.get(f, models.DEFERRED) for f in self.TRACKED_FIELDS]
+        if models.DEFERRED in attrs:
+            return None
+        return self.State(self.pk, *attrs)
+
+    def loaded_state(self):
+        """
+        tracked fields as they are stored in the database
+        """
+        state = getattr(self, "_loaded_state", None)
+        if state is None and self.pk is not None:
+            row = Review.objects.filter(pk=self.pk).values("pk", *self.TRACKED_FIELDS).first()
+            state = self.State(**row) if row else None
+        return state
+
+    def save(self, *args, **kwargs):
+        from .aggregates import record_review_changes
+
+        adding = self._state.adding
+        with transaction.atomic(savepoint=False):
+            before = None if adding else self.loaded_state()
+            result = super().save(*args, **kwargs)
+            after = self.current_state()
+            record_review_changes(
+                removed=[before] if before else [],
+                added=[after] if after else [],
+            )
+        self._loaded_state = after
+        return result
+
     def __str__(self):
         return f"Review #{self.pk} by {self.reviewer_id} for {self.business_user_id}"
+
+
+class BusinessRatingSummary(models.Model):
+    """
+    review count, rating sum and 1-5 histogram per business user, maintained by
+    reviews_app.aggregates on every review write; rebuild with `manage.py rebuild_rating_summaries`
+    """
+    business_user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="rating_summary",
+    )
+    review_count = models.IntegerField(default=0)
+    rating_sum = models.IntegerField(default=0)
+    rating_1 = models.IntegerField(default=0)
+    rating_2 = models.IntegerField(default=0)
+    rating_3 = models.IntegerField(default=0)
+    rating_4 = models.IntegerField(default=0)
+    rating_5 = models.IntegerField(default=0)
+    # created_at of the newest review
+    last_reviewed_at = models.DateTimeField(null=True, blank=True)
+
+    HISTOGRAM_FIELDS = tuple(f"rating_{n}" for n in RATINGS)
+
+    @property
+    def average_rating(self):
+        if not self.review_count:
+            return None
+        return round(self.rating_sum / self.review_count, 1)
+
+    @property
+    def rating_distribution(self):
+        return {str(n): getattr(self, f"rating_{n}") for n in RATINGS}
+
+    def __str__(self):
+        return f"{self.business_user_id}: {self.review_count} review(s), avg {self.average_rating}"
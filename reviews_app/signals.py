@@ -0,0 +1,13 @@
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from .aggregates import record_review_changes
+from .models import Review
+
+
+@receiver(post_delete, sender=Review)
+def forget_deleted_review(sender, instance, **kwargs):
+    """single and cascading deletes take the review out of the rating summary"""
+    state = getattr(instance, "_loaded_state", None) or instance.current_state()
+    if state is not None:
+        record_review_changes(removed=[state])
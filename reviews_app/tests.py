@@ -1,3 +1,197 @@
-from django.test import TestCase
+from io import StringIO
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from rest_framework.test import APITestCase
+
+from reviews_app.models import BusinessRatingSummary, Review
+
+User = get_user_model()
+
+
+class ReviewTestMixin:
+    def setUp(self):
+        self.business = User.objects.create_user(
+            username='biz', password='pw', type='business')
+        self.customers = [
+            User.objects.create_user(username=f'cust{i}', password='pw', type='customer')
+            for i in range(3)
+        ]
+
+    def post_review(self, customer, rating, business=None):
+        self.client.force_authenticate(customer)
+        res = self.client.post('/api/reviews/', {
+            'business_user': (business or self.business).pk,
+            'rating': rating,
+            'description': 'ok',
+        }, format='json')
+        self.assertEqual(res.status_code, 201, res.data)
+        return res.data
+
+    def summary(self, business=None):
+        self.client.force_authenticate(self.customers[0])
+        res = self.client.get(f'/api/rating-summary/{(business or self.business).pk}/')
+        self.assertEqual(res.status_code, 200)
+        return res.data
+
+
+class RatingSummaryTests(ReviewTestMixin, APITestCase):
+    def test_summary_follows_create_patch_and_delete(self):
+        first = self.post_review(self.customers[0], 5)
+        self.post_review(self.customers[1], 3)
+        summary = self.summary()
+        self.assertEqual(summary['review_count'], 2)
+        self.assertEqual(summary['average_rating'], 4.0)
+        self.assertEqual(summary['rating_distribution'], {'1': 0, '2': 0, '3': 1, '4': 0, '5': 1})
+
+        self.client.force_authenticate(self.customers[0])
+        res = self.client.patch(f"/api/reviews/{first['id']}/", {'rating': 1}, format='json')
+        self.assertEqual(res.status_code, 200)
+        summary = self.summary()
+        self.assertEqual(summary['average_rating'], 2.0)
+        self.assertEqual(summary['rating_distribution'], {'1': 1, '2': 0, '3': 1, '4': 0, '5': 0})
+
+        res = self.client.delete(f"/api/reviews/{first['id']}/")
+        self.assertEqual(res.status_code, 204)
+        summary = self.summary()
+        self.assertEqual(summary['review_count'], 1)
+        self.assertEqual(summary['rating_distribution']['1'], 0)
+        newest = Review.objects.get().created_at
+        self.assertEqual(BusinessRatingSummary.objects.get().last_reviewed_at, newest)
+
+    def test_deleting_a_reviewer_removes_their_reviews(self):
+        self.post_review(self.customers[0], 5)
+        self.post_review(self.customers[1], 2)
+        self.customers[0].delete()
+        row = BusinessRatingSummary.objects.get()
+        self.assertEqual((row.review_count, row.rating_sum, row.rating_5), (1, 2, 0))
+
+    def test_summary_is_a_single_query(self):
+        for customer, rating in zip(self.customers, (4, 5, 5)):
+            self.post_review(customer, rating)
+        self.client.force_authenticate(self.customers[0])
+        with self.assertNumQueries(1):
+            res = self.client.get(f'/api/rating-summary/{self.business.pk}/')
+        self.assertEqual(res.data['average_rating'], 4.7)
+
+    def test_business_without_reviews_and_unknown_ids(self):
+        self.assertEqual(self.summary()['review_count'], 0)
+        self.assertIsNone(self.summary()['average_rating'])
+        res = self.client.get(f'/api/rating-summary/{self.customers[0].pk}/')
+        self.assertEqual(res.status_code, 404)
+
+    def test_business_profile_shows_rating(self):
+        self.post_review(self.customers[0], 4)
+        res = self.client.get(f'/api/profile/{self.business.pk}/')
+        self.assertEqual(res.data['rating']['review_count'], 1)
+        res = self.client.get('/api/profiles/business/')
+        self.assertEqual(res.data[0]['rating']['average_rating'], 4.0)
+
+    def test_rebuild_repairs_drift(self):
+        self.post_review(self.customers[0], 4)
+        self.post_review(self.customers[1], 2)
+        BusinessRatingSummary.objects.update(review_count=99, rating_4=0)
+        call_command('rebuild_rating_summaries', stdout=StringIO())
+        row = BusinessRatingSummary.objects.get()
+        self.assertEqual((row.review_count, row.rating_sum, row.rating_4, row.rating_2), (2, 6, 1, 1))
+
+
+class ReviewListTests(ReviewTestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.customers += [
+            User.objects.create_user(username=f'cust{i}', password='pw', type='customer')
+            for i in range(3, 7)
+        ]
+        for customer, rating in zip(self.customers, (5, 3, 5, 1, 3, 5, 2)):
+            Review.objects.create(business_user=self.business, reviewer=customer, rating=rating)
+        self.client.force_authenticate(self.customers[0])
+
+    def walk(self, url):
+        seen = []
+        while url:
+            res = self.client.get(url)
+            self.assertEqual(res.status_code, 200)
+            seen += res.data['results']
+            url = res.data['next']
+        return seen
+
+    def test_cursor_pages_follow_rating_order(self):
+        seen = self.walk(f'/api/reviews/?business_user_id={self.business.pk}&ordering=-rating&cursor=&page_size=2')
+        self.assertEqual(len(seen), 7)
+        self.assertEqual([r['rating'] for r in seen], [5, 5, 5, 3, 3, 2, 1])
+        self.assertEqual(len({r['id'] for r in seen}), 7)
+
+    def test_first_page_is_a_single_query(self):
+        with self.assertNumQueries(1):
+            res = self.client.get(f'/api/reviews/?business_user_id={self.business.pk}&cursor=&page_size=3')
+        self.assertEqual(len(res.data['results']), 3)
+        self.assertIsNotNone(res.data['next'])
+
+    def test_without_cursor_the_list_stays_unpaginated(self):
+        res = self.client.get(f'/api/reviews/?reviewer_id={self.customers[1].pk}')
+        self.assertEqual([r['rating'] for r in res.data], [3])
+
+    def test_ids_must_be_integers(self):
+        res = self.client.get('/api/reviews/?business_user_id=abc')
+        self.assertEqual(res.status_code, 400)
+        self.assertEqual(res.data['business_user_id'], 'Must be an integer.')
+        res = self.client.get('/api/reviews/?reviewer_id=0')
+        self.assertEqual(res.status_code, 400)
+
+
+class ReviewCreateTests(ReviewTestMixin, APITestCase):
+    def test_duplicate_review_is_rejected_by_the_constraint(self):
+        self.post_review(self.customers[0], 4)
+        res = self.client.post('/api/reviews/', {
+            'business_user': self.business.pk, 'rating': 1}, format='json')
+        self.assertEqual(res.status_code, 400)
+        self.assertEqual(
+            res.data['non_field_errors'],
+            ['Du hast bereits eine Bewertung für diesen Geschäftsbenutzer abgegeben.'])
+        self.assertEqual(Review.objects.count(), 1)
+        self.assertEqual(BusinessRatingSummary.objects.get().rating_sum, 4)
+
+    def test_create_has_no_duplicate_pre_check(self):
+        self.client.force_authenticate(self.customers[0])
+        # business user lookup, savepoint, review INSERT, summary upsert (2),
+        # platform stats upsert (2), release
+        with self.assertNumQueries(8) as ctx:
+            res = self.client.post('/api/reviews/', {
+                'business_user': self.business.pk, 'rating': 5}, format='json')
+        self.assertEqual(res.status_code, 201)
+        self.assertEqual(res.data['reviewer'], self.customers[0].pk)
+        self.assertFalse(any(
+            q['sql'].startswith('SELECT') and '"reviews_app_review"' in q['sql']
+            for q in ctx.captured_queries))
+
+
+class RatingSummaryBatchTests(ReviewTestMixin, APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.businesses = [self.business] + [
+            User.objects.create_user(username=f'biz{i}', password='pw', type='business')
+            for i in range(4)
+        ]
+        for business in self.businesses[:3]:
+            self.post_review(self.customers[0], 4, business)
+        self.post_review(self.customers[1], 2, self.business)
+        self.client.force_authenticate(self.customers[0])
+
+    def test_query_count_does_not_grow_with_ids(self):
+        with self.assertNumQueries(1):
+            res = self.client.get(f'/api/rating-summaries/?business_user_ids={self.business.pk}')
+        self.assertEqual(res.data['results'][0]['average_rating'], 3.0)
+
+        ids = [b.pk for b in reversed(self.businesses)] + [self.customers[0].pk, 9999]
+        with self.assertNumQueries(1):
+            res = self.client.get(f"/api/rating-summaries/?business_user_ids={','.join(map(str, ids))}")
+        results = res.data['results']
+        self.assertEqual([r['business_user'] for r in results], ids[:5])
+        self.assertEqual([r['review_count'] for r in results], [0, 0, 1, 1, 2])
+
+    def test_ids_are_validated(self):
+        for query in ('', '?business_user_ids=', '?business_user_ids=1,x',
+                      '?business_user_ids=' + ','.join(map(str, range(1, 52)))):
+            res = self.client.get(f'/api/rating-summaries/{query}')
+            self.assertEqual(res.status_code, 400, query)